@@ -4,7 +4,7 @@ Modelos para el sistema de blacklist de tokens JWT.
 SEGURIDAD CRÍTICA: Este sistema previene el uso de tokens revocados
 después de logout o cuando las credenciales son comprometidas.
 """
-from mongoengine import Document, StringField, DateTimeField
+from mongoengine import Document, StringField, DateTimeField, IntField
 from datetime import datetime, timedelta
 from django.conf import settings
 
@@ -50,15 +50,21 @@ class TokenBlacklist(Document):
     )
 
     # Configuración de la colección MongoDB
+    # El índice TTL sobre expira_en no se declara aquí: lo crea
+    # asegurar_indice_ttl(), que además reemplaza el índice simple anterior
+    # (MongoDB no permite dos índices con la misma clave y opciones distintas).
     meta = {
         'collection': 'tokens_blacklist',
         'indexes': [
             'jti',
             'usuario_id',
-            'expira_en',  # Para auto-limpieza eficiente
+            'revocado_en',  # Para el refresco incremental de la cache en memoria
         ]
     }
 
+    # Si este proceso ya verificó el índice TTL
+    _indice_ttl_verificado = False
+
     def __str__(self) -> str:
         return f"Token {self.jti[:8]}... revocado por {self.razon}"
 
@@ -80,6 +86,14 @@ class TokenBlacklist(Document):
         Nota:
             Si el token ya está en la blacklist, no hace nada (idempotente).
         """
+        from .revocation_cache import cache_revocacion
+
+        # Visible de inmediato en este worker (los demás lo ven al refrescar)
+        cache_revocacion.registrar(jti, expira_en)
+
+        if not cls._indice_ttl_verificado:
+            cls.asegurar_indice_ttl()
+
         # Verificar si ya existe (evitar duplicados)
         existing = cls.objects(jti=jti).first()
         if existing:
@@ -108,8 +122,15 @@ class TokenBlacklist(Document):
             bool: True si está revocado, False si no
 
         Optimización:
-            Solo busca tokens que no han expirado aún.
+            Responde desde la cache en memoria del worker (ver revocation_cache),
+            que se sincroniza con la colección cada JWT_BLACKLIST_CACHE_SEGUNDOS.
+            Con la cache desactivada (valor 0) consulta MongoDB directamente.
         """
+        from .revocation_cache import cache_revocacion
+
+        if cache_revocacion.habilitada:
+            return cache_revocacion.esta_revocado(jti)
+
         from mongoengine.connection import get_db
 
         db = get_db()
@@ -124,7 +145,7 @@ class TokenBlacklist(Document):
         return resultado is not None
 
     @classmethod
-    def revocar_todos_usuario(cls, usuario_id: str) -> int:
+    def revocar_todos_usuario(cls, usuario_id: str, razon: str = 'admin_revoke') -> int:
         """
         Revoca todos los tokens activos de un usuario.
 
@@ -135,35 +156,57 @@ class TokenBlacklist(Document):
 
         Args:
             usuario_id (str): ID del usuario
+            razon (str): Razón de la revocación
 
         Returns:
-            int: Número de tokens revocados
+            int: Nueva época de tokens del usuario
 
         Nota:
-            Esta función NO agrega tokens a la blacklist directamente.
-            En su lugar, marca una flag en el usuario que invalida todos sus tokens.
-            Implementar según necesidades específicas.
+            No agrega una fila por jti: incrementa la época de tokens del
+            usuario (ver EpocaTokens) con una sola escritura. Los tokens
+            emitidos antes del incremento dejan de ser válidos.
         """
-        # Esta es una implementación simplificada
-        # En producción, considera agregar un campo 'tokens_validos_desde'
-        # en el modelo Usuario para invalidar todos los tokens anteriores
-        pass
+        return EpocaTokens.incrementar(usuario_id, razon=razon)
 
     @classmethod
-    def limpiar_expirados(cls) -> int:
+    def asegurar_indice_ttl(cls) -> bool:
         """
-        Elimina tokens expirados de la blacklist (mantenimiento).
+        Crea el índice TTL que elimina los tokens al llegar a expira_en.
 
-        Esta función debe ejecutarse periódicamente (ej: cron job diario)
-        para evitar que la colección crezca indefinidamente.
+        MongoDB borra los documentos vencidos en segundo plano (cada ~60 s),
+        por lo que la colección se mantiene acotada sin tareas externas. Si
+        existe el índice simple anterior sobre expira_en se reemplaza.
 
         Returns:
-            int: Número de tokens eliminados
+            bool: True si se creó el índice, False si ya existía
 
         Uso:
-            # En un cron job o tarea periódica
-            eliminados = TokenBlacklist.limpiar_expirados()
-            print(f"Eliminados {eliminados} tokens expirados")
+            python crear_indices.py
+        """
+        coleccion = cls._get_collection()
+        creado = False
+
+        indice = coleccion.index_information().get('expira_en_1')
+        if indice is None or indice.get('expireAfterSeconds') != 0:
+            if indice is not None:
+                coleccion.drop_index('expira_en_1')
+            coleccion.create_index('expira_en', expireAfterSeconds=0)
+            creado = True
+
+        cls._indice_ttl_verificado = True
+        return creado
+
+    @classmethod
+    def limpiar_expirados(cls) -> int:
+        """
+        Elimina de inmediato los tokens expirados de la blacklist.
+
+        El índice TTL (ver asegurar_indice_ttl) ya los elimina automáticamente;
+        este método solo sirve para forzar la limpieza sin esperar al monitor
+        TTL de MongoDB (ej: en pruebas o mantenimiento manual).
+
+        Returns:
+            int: Número de tokens eliminados
         """
         from mongoengine.connection import get_db
 
@@ -181,6 +224,9 @@ class TokenBlacklist(Document):
         """
         Retorna estadísticas sobre la blacklist.
 
+        RENDIMIENTO: Una sola agregación $facet (total, activos y conteo por
+        razón) en lugar de seis count_documents sobre la colección.
+
         Returns:
             dict: Estadísticas de la blacklist
         """
@@ -188,22 +234,131 @@ class TokenBlacklist(Document):
 
         db = get_db()
 
-        total = db.tokens_blacklist.count_documents({})
-        activos = db.tokens_blacklist.count_documents({
-            'expira_en': {'$gt': datetime.utcnow()}
-        })
-        expirados = total - activos
-
-        # Contar por razón
-        por_razon = {}
-        for razon in ['logout', 'compromiso', 'admin_revoke', 'password_change']:
-            count = db.tokens_blacklist.count_documents({'razon': razon})
-            if count > 0:
-                por_razon[razon] = count
+        resultado = next(db.tokens_blacklist.aggregate([
+            {'$facet': {
+                'total': [{'$count': 'n'}],
+                'activos': [
+                    {'$match': {'expira_en': {'$gt': datetime.utcnow()}}},
+                    {'$count': 'n'}
+                ],
+                'por_razon': [{'$group': {'_id': '$razon', 'n': {'$sum': 1}}}],
+            }}
+        ]), {})
+
+        # $count no produce documento cuando no hay coincidencias
+        total = resultado['total'][0]['n'] if resultado.get('total') else 0
+        activos = resultado['activos'][0]['n'] if resultado.get('activos') else 0
+        por_razon = {
+            grupo['_id']: grupo['n'] for grupo in resultado.get('por_razon', [])
+        }
 
         return {
             'total': total,
             'activos': activos,
-            'expirados': expirados,
+            'expirados': total - activos,
             'por_razon': por_razon
         }
+
+
+class EpocaTokens(Document):
+    """
+    Época (generación) de tokens de cada usuario.
+
+    RENDIMIENTO: generar_token incluye la época vigente en el claim 'tev'.
+    Revocar todas las sesiones de un usuario es un solo $inc; verificar_token
+    rechaza los tokens con 'tev' menor a la época actual. La comparación se
+    resuelve en memoria con la cache de revocación (ver revocation_cache).
+
+    Solo existen documentos para usuarios que alguna vez revocaron sesiones;
+    la época de los demás es 0.
+
+    Campos:
+        usuario_id (str): ID del usuario
+        epoca (int): Época actual de tokens
+        actualizado_en (datetime): Última revocación (refresco incremental)
+        razon (str): Razón de la última revocación
+    """
+
+    usuario_id = StringField(required=True, unique=True, max_length=24)
+    epoca = IntField(required=True, default=0, min_value=0)
+    actualizado_en = DateTimeField(default=datetime.utcnow, required=True)
+    razon = StringField(
+        required=True,
+        choices=['compromiso', 'admin_revoke', 'password_change'],
+        default='admin_revoke'
+    )
+
+    # Configuración de la colección MongoDB
+    meta = {
+        'collection': 'tokens_epocas',
+        'indexes': [
+            'usuario_id',
+            'actualizado_en',  # Para el refresco incremental de la cache en memoria
+        ]
+    }
+
+    def __str__(self) -> str:
+        return f"Usuario {self.usuario_id}: época {self.epoca}"
+
+    @classmethod
+    def epoca_actual(cls, usuario_id: str) -> int:
+        """
+        Lee la época vigente desde MongoDB (usado al emitir tokens).
+
+        Args:
+            usuario_id (str): ID del usuario
+
+        Returns:
+            int: Época actual (0 si nunca se revocaron sus sesiones)
+        """
+        documento = cls._get_collection().find_one(
+            {'usuario_id': str(usuario_id)}, {'_id': 0, 'epoca': 1}
+        )
+        return documento['epoca'] if documento else 0
+
+    @classmethod
+    def incrementar(cls, usuario_id: str, razon: str = 'admin_revoke') -> int:
+        """
+        Invalida todos los tokens emitidos hasta ahora para el usuario.
+
+        Args:
+            usuario_id (str): ID del usuario
+            razon (str): Razón de la revocación
+
+        Returns:
+            int: Nueva época del usuario
+        """
+        from pymongo import ReturnDocument
+        from .revocation_cache import cache_revocacion
+
+        ahora = datetime.utcnow()
+        documento = cls._get_collection().find_one_and_update(
+            {'usuario_id': str(usuario_id)},
+            {'$inc': {'epoca': 1}, '$set': {'actualizado_en': ahora, 'razon': razon}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+        # Visible de inmediato en este worker (los demás lo ven al refrescar)
+        cache_revocacion.registrar_epoca(str(usuario_id), documento['epoca'], ahora)
+
+        return documento['epoca']
+
+    @classmethod
+    def token_vigente(cls, usuario_id: str, epoca_token: int) -> bool:
+        """
+        Indica si un token emitido en `epoca_token` sigue siendo válido.
+
+        Args:
+            usuario_id (str): ID del usuario (claim 'user_id')
+            epoca_token (int): Época del token (claim 'tev', 0 en tokens antiguos)
+
+        Returns:
+            bool: False si las sesiones del usuario se revocaron después de emitirlo
+        """
+        from .revocation_cache import cache_revocacion
+
+        if cache_revocacion.habilitada:
+            return epoca_token >= cache_revocacion.epoca_usuario(str(usuario_id))
+
+        return epoca_token >= cls.epoca_actual(usuario_id)
@@ -86,6 +86,34 @@ def manejar_error_seguro(
     }, status=status_code)
 
 
+def crear_respuesta_servicio_saturado(request, retry_after: int = 1) -> Response:
+    """
+    Crea una respuesta 503 cuando un recurso acotado (ej: pool de bcrypt)
+    no puede aceptar más trabajo.
+
+    Args:
+        request: Request de Django
+        retry_after (int): Segundos sugeridos antes de reintentar
+
+    Returns:
+        Response: Respuesta HTTP 503 con header Retry-After
+    """
+    log_security_event(
+        'SERVICE_SATURATED',
+        ip_address=obtener_ip_cliente(request),
+        details=f'Servicio saturado en {request.path}',
+        severity='WARNING'
+    )
+
+    response = Response({
+        'status': 'error',
+        'message': 'El servicio está ocupado. Por favor intenta nuevamente en unos segundos.',
+        'tipo_error': 'service_unavailable'
+    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 def log_security_event(
     event_type: str,
     user_id: str = None,
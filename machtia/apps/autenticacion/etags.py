@@ -0,0 +1,115 @@
+"""
+ETags fuertes y respuestas 304 para las lecturas más frecuentes.
+
+RENDIMIENTO: El frontend vuelve a descargar el catálogo y /api/auth/me/ en
+cada navegación aunque nada haya cambiado. Cada vista calcula un ETag a
+partir de lo que determina su respuesta (versión del catálogo en memoria,
+filtros, huella del progreso del usuario y, si la respuesta pasa por los
+renderers de DRF, el media type negociado) ANTES de serializar; si coincide
+con If-None-Match responde 304 sin cuerpo. Para peticiones anónimas el ETag
+sale solo del catálogo en memoria, sin consultar MongoDB; con usuario, de
+la misma lectura con proyección que la vista ya hacía.
+
+Huella del usuario:
+    En lugar de un contador que cada escritura de `usuarios` tendría que
+    incrementar (y que una escritura olvidada dejaría desactualizado), la
+    huella es el digest de los campos de los que depende la respuesta. Cambia
+    exactamente cuando la respuesta cambia.
+
+Uso:
+    from apps.autenticacion.etags import calcular_etag, responder_con_etag
+
+    etag = calcular_etag('lecciones', catalogo.version(), huella_progreso(usuario))
+    return responder_con_etag(request, etag, lambda: Response(datos))
+"""
+import hashlib
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+
+# La respuesta depende del token (cookie httpOnly o header Authorization) y,
+# en las vistas que usan los renderers de DRF, del formato negociado (Accept)
+VARY = ('Accept', 'Cookie', 'Authorization')
+
+
+def calcular_etag(*partes) -> str:
+    """
+    ETag fuerte a partir de valores que determinan la respuesta.
+
+    Args:
+        *partes: Valores con repr estable (int, str, tuple, None...)
+
+    Returns:
+        str: ETag entre comillas, p. ej. '"3f2a..."'
+    """
+    digest = hashlib.blake2b(repr(partes).encode('utf-8'), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def huella_progreso(usuario):
+    """
+    Campos de progreso que usan los serializadores del catálogo.
+
+    Args:
+        usuario: ProgresoUsuario, UsuarioLigero o None
+
+    Returns:
+        tuple: Huella del progreso, o None si la petición es anónima
+    """
+    if usuario is None:
+        return None
+    return (
+        str(usuario.id),
+        usuario.progresoContiguo,
+        tuple(usuario.leccionesCompletadas),
+        tuple(usuario.nivelesCompletados),
+        usuario.nivelActual,
+    )
+
+
+def coincide(request, etag: str) -> bool:
+    """
+    Indica si If-None-Match incluye `etag` (comparación débil, RFC 9110).
+
+    Args:
+        request: Request de Django o DRF
+        etag (str): ETag actual de la respuesta
+
+    Returns:
+        bool: True si el cliente ya tiene esta versión
+    """
+    encabezado = request.META.get('HTTP_IF_NONE_MATCH')
+    if not encabezado:
+        return False
+    if encabezado.strip() == '*':
+        return True
+    return any(
+        candidato.strip().removeprefix('W/') == etag
+        for candidato in encabezado.split(',')
+    )
+
+
+def responder_con_etag(request, etag: str, construir):
+    """
+    Responde 304 si el cliente tiene `etag`; si no, construye la respuesta.
+
+    Args:
+        request: Request de Django o DRF
+        etag (str): ETag de la respuesta (ver calcular_etag)
+        construir (callable): Sin argumentos; retorna la respuesta completa.
+            Solo se llama si no hay coincidencia.
+
+    Returns:
+        HttpResponse: 304 sin cuerpo o la respuesta de `construir` con ETag
+    """
+    if coincide(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = construir()
+        if response.status_code != 200:
+            return response
+
+    response['ETag'] = etag
+    # Se puede guardar, pero se revalida siempre (el catálogo puede cambiar)
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, VARY)
+    return response
@@ -1,65 +1,146 @@
 """
 Modelos de autenticación usando Mongoengine (ODM para MongoDB)
 """
-from mongoengine import Document, StringField, IntField, ListField, DateTimeField, EmailField
+from mongoengine import Document, StringField, IntField, ListField, DictField, DateTimeField, EmailField
 from datetime import datetime, timedelta
-import bcrypt
 
 
-class Usuario(Document):
+def clave_tema(tema: str) -> str:
     """
-    Modelo de Usuario para la aplicación de aprendizaje de Náhuatl.
+    Convierte un tema en una clave válida de temasCompletados.
 
-    Campos:
-        email (str): Email único del usuario
-        nombre (str): Nombre completo del usuario
-        password (str): Contraseña hasheada con bcrypt
-        tomin (int): Monedas virtuales del usuario (nunca negativo)
-        vidas (int): Vidas disponibles (máximo 5)
-        leccionesCompletadas (list): Lista de IDs de lecciones completadas
-        leccionActual (int): ID de la lección actual
-        ultimaRegeneracionVida (datetime): Timestamp de última regeneración de vida
-        createdAt (datetime): Fecha de creación del usuario
+    MongoDB no admite '.' ni '$' inicial en nombres de campo; los temas del
+    catálogo son slugs ('saludos', 'numeros'), así que no suele cambiar nada.
+
+    Args:
+        tema (str): Tema de la lección
+
+    Returns:
+        str: Clave para temasCompletados.<clave>
     """
+    return tema.replace('.', '_').lstrip('$')
 
-    # Campos requeridos
-    email = EmailField(required=True, unique=True)
-    nombre = StringField(required=True, max_length=100)
-    password = StringField(required=True)
 
-    # SEGURIDAD: Sistema de roles para control de acceso (RBAC)
-    # - estudiante: Usuario normal, solo puede ver y completar lecciones
-    # - profesor: Puede crear y editar lecciones/niveles
-    # - admin: Acceso total (crear, editar, eliminar)
-    rol = StringField(
-        required=True,
-        default='estudiante',
-        choices=['estudiante', 'profesor', 'admin']
-    )
+def calcular_prefijo_contiguo(completadas, desde: int = 0) -> int:
+    """
+    Calcula la mayor lección N tal que 1..N están todas completadas.
 
-    # Campos de progreso
-    tomin = IntField(default=0, min_value=0)
-    vidas = IntField(default=3, min_value=0, max_value=5)
-    leccionesCompletadas = ListField(IntField(), default=list)
-    leccionActual = IntField(default=1)
+    Args:
+        completadas (set): IDs de lecciones completadas
+        desde (int): Prefijo ya conocido (se extiende a partir de él)
 
-    # Progreso de niveles
-    nivelesCompletados = ListField(IntField(), default=list)
-    nivelActual = IntField(default=1)
+    Returns:
+        int: Prefijo contiguo (0 si la lección 1 no está completada)
+    """
+    prefijo = desde
+    while prefijo + 1 in completadas:
+        prefijo += 1
+    return prefijo
 
-    # Campos de tiempo
-    ultimaRegeneracionVida = DateTimeField(default=datetime.utcnow)
-    createdAt = DateTimeField(default=datetime.utcnow)
 
-    # Configuración de la colección MongoDB
-    meta = {
-        'collection': 'usuarios',
-        'indexes': [
-            'email',
-            'leccionActual',
-            'nivelActual'
+class IndiceProgreso:
+    """
+    Índice del progreso de lecciones de un usuario.
+
+    RENDIMIENTO: Decidir si una lección está bloqueada requería recorrer la
+    lista leccionesCompletadas por cada lección anterior (O(L²·n) al listar
+    L lecciones). Con el prefijo contiguo (progresoContiguo, mantenido en el
+    documento) y un set de completadas, cada consulta es O(1).
+
+    Atributos:
+        prefijo (int): Mayor lección N con 1..N completadas
+        completadas (frozenset): IDs de lecciones completadas
+    """
+
+    __slots__ = ('prefijo', 'completadas')
+
+    def __init__(self, lecciones_completadas, prefijo: int = 0):
+        """
+        Args:
+            lecciones_completadas (list): IDs de lecciones completadas
+            prefijo (int): progresoContiguo almacenado (0 si no existe)
+        """
+        self.completadas = frozenset(lecciones_completadas)
+        self.prefijo = calcular_prefijo_contiguo(self.completadas, prefijo or 0)
+
+    def completada(self, leccion_id: int) -> bool:
+        """Indica si la lección está completada."""
+        return leccion_id in self.completadas
+
+    def bloqueada(self, leccion_id: int) -> bool:
+        """
+        Una lección está bloqueada si no está completada y alguna lección
+        anterior tampoco lo está.
+        """
+        return leccion_id > self.prefijo + 1 and leccion_id not in self.completadas
+
+    def faltantes(self, leccion_id: int) -> list:
+        """
+        Lecciones anteriores a `leccion_id` sin completar.
+
+        Solo recorre el tramo posterior al prefijo contiguo.
+
+        Returns:
+            list: IDs ordenados (vacía si la lección está desbloqueada)
+        """
+        return [
+            lid for lid in range(self.prefijo + 1, leccion_id)
+            if lid not in self.completadas
         ]
-    }
+
+
+def obtener_indice_progreso(usuario) -> IndiceProgreso:
+    """
+    Retorna el índice de progreso del usuario, construyéndolo una sola vez.
+
+    Args:
+        usuario: Usuario, UsuarioLigero o ProgresoUsuario
+
+    Returns:
+        IndiceProgreso: Índice memorizado en el objeto
+    """
+    indice = getattr(usuario, '_indice_progreso', None)
+    if indice is None:
+        indice = IndiceProgreso(
+            usuario.leccionesCompletadas, getattr(usuario, 'progresoContiguo', 0)
+        )
+        object.__setattr__(usuario, '_indice_progreso', indice)
+    return indice
+
+
+class UsuarioMixin:
+    """
+    Lógica de dominio del usuario (tomins, vidas, progreso).
+
+    RENDIMIENTO: La comparten el Document `Usuario` y la vista de lectura
+    `UsuarioLigero` (apps.autenticacion.read_models). Cada clase decide cómo
+    persistir los cambios implementando save(), _agregar_a_lista(),
+    _sincronizar_campo(), _avanzar_progreso_contiguo(), _diferir_incremento()
+    _contar_tema() y _sumar_contador().
+    """
+
+    __slots__ = ()
+
+    @property
+    def indice_progreso(self) -> IndiceProgreso:
+        """Índice O(1) de lecciones completadas/bloqueadas (ver IndiceProgreso)."""
+        return obtener_indice_progreso(self)
+
+    def temas_completados_confiables(self):
+        """
+        temasCompletados si cuenta todas las lecciones completadas.
+
+        Un usuario sin migrar (migrar_temas_completados.py) solo tiene los
+        temas de las lecciones completadas desde el despliegue: sus claves
+        subestiman los temas distintos. También deja de cuadrar si se
+        eliminó una lección ya completada.
+
+        Returns:
+            dict: temasCompletados, o None si no coincide con leccionesCompletadas
+        """
+        if sum(self.temasCompletados.values()) != len(self.leccionesCompletadas):
+            return None
+        return self.temasCompletados
 
     def __str__(self) -> str:
         """Representación en string del usuario"""
@@ -71,9 +152,14 @@ class Usuario(Document):
 
         Args:
             raw_password (str): Contraseña en texto plano
+
+        Raises:
+            PoolContrasenasSaturado: Si el pool de bcrypt está saturado
         """
-        hashed = bcrypt.hashpw(raw_password.encode('utf-8'), bcrypt.gensalt())
-        self.password = hashed.decode('utf-8')
+        from .password_pool import pool_contrasenas
+
+        # RENDIMIENTO: bcrypt corre en el pool acotado (BCRYPT_ROUNDS)
+        self.password = pool_contrasenas.hashear(raw_password)
 
     def check_password(self, raw_password: str) -> bool:
         """
@@ -84,11 +170,14 @@ class Usuario(Document):
 
         Returns:
             bool: True si la contraseña es correcta, False en caso contrario
+
+        Raises:
+            PoolContrasenasSaturado: Si el pool de bcrypt está saturado
         """
-        return bcrypt.checkpw(
-            raw_password.encode('utf-8'),
-            self.password.encode('utf-8')
-        )
+        from .password_pool import pool_contrasenas
+
+        # RENDIMIENTO: bcrypt corre en el pool acotado
+        return pool_contrasenas.verificar(raw_password, self.password)
 
     def agregar_tomin(self, cantidad: int) -> None:
         """
@@ -103,6 +192,10 @@ class Usuario(Document):
         from mongoengine.connection import get_db
         from bson import ObjectId
 
+        # Con el guardado diferido el $inc viaja en el update final
+        if self._diferir_incremento('tomin', cantidad):
+            return
+
         # OPERACIÓN ATÓMICA: Incrementar tomins
         db = get_db()
         result = db.usuarios.find_one_and_update(
@@ -113,7 +206,7 @@ class Usuario(Document):
 
         if result:
             # Actualizar objeto local con el valor atómico
-            self.tomin = result['tomin']
+            self._sincronizar_campo('tomin', result['tomin'])
 
     def usar_tomin(self, cantidad: int) -> bool:
         """
@@ -146,20 +239,37 @@ class Usuario(Document):
 
         if result:
             # Actualizar objeto local con el valor atómico
-            self.tomin = result['tomin']
+            self._sincronizar_campo('tomin', result['tomin'])
             return True
         return False
 
-    def completar_leccion(self, leccion_id: int, tomins_ganados: int) -> None:
+    def completar_leccion(self, leccion_id: int, tomins_ganados: int, tema: str = None,
+                          palabras: int = 0) -> None:
         """
         Marca una lección como completada y otorga tomins.
 
         Args:
             leccion_id (int): ID de la lección completada
             tomins_ganados (int): Cantidad de tomins a otorgar
+            tema (str, optional): Tema de la lección (cuenta en temasCompletados)
+            palabras (int): Palabras de la lección (se suman a palabrasAprendidas)
         """
-        if leccion_id not in self.leccionesCompletadas:
-            self.leccionesCompletadas.append(leccion_id)
+        if not self.indice_progreso.completada(leccion_id):
+            self._agregar_a_lista('leccionesCompletadas', leccion_id)
+
+            # RENDIMIENTO: Contador por tema en el mismo update; los logros
+            # por tema se evalúan sin leer las lecciones completadas
+            if tema:
+                self._contar_tema(clave_tema(tema))
+            if palabras:
+                self._sumar_contador('palabrasAprendidas', palabras)
+
+            # Mantener el prefijo contiguo junto con la lista (mismo update)
+            indice = IndiceProgreso(self.leccionesCompletadas, self.indice_progreso.prefijo)
+            object.__setattr__(self, '_indice_progreso', indice)
+            if indice.prefijo > (self.progresoContiguo or 0):
+                self._avanzar_progreso_contiguo(indice.prefijo)
+
             self.agregar_tomin(tomins_ganados)
 
             # Avanzar a la siguiente lección si corresponde
@@ -176,7 +286,7 @@ class Usuario(Document):
             nivel_id (int): ID del nivel completado
         """
         if nivel_id not in self.nivelesCompletados:
-            self.nivelesCompletados.append(nivel_id)
+            self._agregar_a_lista('nivelesCompletados', nivel_id)
 
             # Avanzar al siguiente nivel si corresponde
             if nivel_id == self.nivelActual:
@@ -282,7 +392,7 @@ class Usuario(Document):
 
         if result:
             # Actualizar objeto local con el valor atómico
-            self.vidas = result['vidas']
+            self._sincronizar_campo('vidas', result['vidas'])
             return True
         return False
 
@@ -320,7 +430,7 @@ class Usuario(Document):
 
         if result:
             # Actualizar objeto local con el valor atómico
-            self.vidas = result['vidas']
+            self._sincronizar_campo('vidas', result['vidas'])
 
     def tiene_vidas_disponibles(self) -> bool:
         """
@@ -361,3 +471,124 @@ class Usuario(Document):
             'minutos_restantes': int(minutos_restantes),
             'segundos_restantes': segundos_restantes
         }
+
+    def _agregar_a_lista(self, campo: str, valor) -> None:
+        """
+        Agrega un valor a un campo lista (se persiste en el siguiente save()).
+
+        Args:
+            campo (str): Nombre del campo lista
+            valor: Valor a agregar
+        """
+        getattr(self, campo).append(valor)
+
+    def _diferir_incremento(self, campo: str, cantidad: int) -> bool:
+        """
+        Acumula un incremento para el siguiente save() en lugar de aplicarlo
+        de inmediato (solo con guardado diferido, ver UsuarioLigero).
+
+        Returns:
+            bool: True si el incremento quedó pendiente
+        """
+        return False
+
+    def _contar_tema(self, clave: str) -> None:
+        """
+        Suma una lección completada al tema (se persiste en el siguiente save()).
+
+        Args:
+            clave (str): Clave del tema (ver clave_tema)
+        """
+        self.temasCompletados[clave] = self.temasCompletados.get(clave, 0) + 1
+
+    def _sumar_contador(self, campo: str, cantidad: int) -> None:
+        """
+        Suma a un contador del usuario (se persiste en el siguiente save()).
+
+        Args:
+            campo (str): Nombre del campo entero
+            cantidad (int): Cantidad a sumar
+        """
+        setattr(self, campo, (getattr(self, campo) or 0) + cantidad)
+
+    def _avanzar_progreso_contiguo(self, prefijo: int) -> None:
+        """
+        Actualiza progresoContiguo (se persiste en el siguiente save()).
+
+        Args:
+            prefijo (int): Nuevo prefijo contiguo (nunca menor al actual)
+        """
+        self.progresoContiguo = prefijo
+
+    def _sincronizar_campo(self, campo: str, valor) -> None:
+        """
+        Actualiza el valor local con el que devolvió una operación atómica
+        (el valor ya está persistido en MongoDB).
+
+        Args:
+            campo (str): Nombre del campo
+            valor: Valor devuelto por MongoDB
+        """
+        setattr(self, campo, valor)
+
+
+class Usuario(UsuarioMixin, Document):
+    """
+    Modelo de Usuario para la aplicación de aprendizaje de Náhuatl.
+
+    Campos:
+        email (str): Email único del usuario
+        nombre (str): Nombre completo del usuario
+        password (str): Contraseña hasheada con bcrypt
+        tomin (int): Monedas virtuales del usuario (nunca negativo)
+        vidas (int): Vidas disponibles (máximo 5)
+        leccionesCompletadas (list): Lista de IDs de lecciones completadas
+        progresoContiguo (int): Mayor lección N con 1..N completadas (índice de bloqueo)
+        temasCompletados (dict): Lecciones completadas por tema {tema: cantidad}
+        palabrasAprendidas (int): Suma de las palabras de las lecciones completadas
+        leccionActual (int): ID de la lección actual
+        ultimaRegeneracionVida (datetime): Timestamp de última regeneración de vida
+        createdAt (datetime): Fecha de creación del usuario
+    """
+
+    # Campos requeridos
+    email = EmailField(required=True, unique=True)
+    nombre = StringField(required=True, max_length=100)
+    password = StringField(required=True)
+
+    # SEGURIDAD: Sistema de roles para control de acceso (RBAC)
+    # - estudiante: Usuario normal, solo puede ver y completar lecciones
+    # - profesor: Puede crear y editar lecciones/niveles
+    # - admin: Acceso total (crear, editar, eliminar)
+    rol = StringField(
+        required=True,
+        default='estudiante',
+        choices=['estudiante', 'profesor', 'admin']
+    )
+
+    # Campos de progreso
+    tomin = IntField(default=0, min_value=0)
+    vidas = IntField(default=3, min_value=0, max_value=5)
+    leccionesCompletadas = ListField(IntField(), default=list)
+    progresoContiguo = IntField(default=0, min_value=0)
+    temasCompletados = DictField(field=IntField(min_value=0), default=dict)
+    palabrasAprendidas = IntField(default=0, min_value=0)
+    leccionActual = IntField(default=1)
+
+    # Progreso de niveles
+    nivelesCompletados = ListField(IntField(), default=list)
+    nivelActual = IntField(default=1)
+
+    # Campos de tiempo
+    ultimaRegeneracionVida = DateTimeField(default=datetime.utcnow)
+    createdAt = DateTimeField(default=datetime.utcnow)
+
+    # Configuración de la colección MongoDB
+    meta = {
+        'collection': 'usuarios',
+        'indexes': [
+            'email',
+            'leccionActual',
+            'nivelActual'
+        ]
+    }
@@ -0,0 +1,279 @@
+"""
+Pool acotado de hilos para hashear y verificar contraseñas con bcrypt.
+
+RENDIMIENTO: bcrypt consume cientos de milisegundos de CPU por operación.
+En un pico de logins todos los hilos del servidor quedaban ocupados
+calculando hashes y las peticiones baratas (lecciones, progreso) esperaban
+detrás. Este módulo limita cuántas operaciones bcrypt corren a la vez
+(PASSWORD_POOL_WORKERS) y cuántas pueden esperar turno
+(PASSWORD_POOL_MAX_PENDIENTES). Si el pool está saturado la petición se
+rechaza de inmediato con PoolContrasenasSaturado, que las vistas convierten
+en un 503 con header Retry-After.
+
+bcrypt libera el GIL mientras calcula, por lo que los hilos del pool
+corren en paralelo real sin bloquear al resto del proceso.
+
+Rehash transparente:
+    Si BCRYPT_ROUNDS cambia, los hashes antiguos se recalculan en segundo
+    plano tras un login exitoso (ver rehashear_si_necesario).
+
+Uso:
+    from apps.autenticacion.password_pool import pool_contrasenas
+
+    hashed = pool_contrasenas.hashear('contraseña')
+    es_valida = pool_contrasenas.verificar('contraseña', hashed)
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+import bcrypt
+from django.conf import settings
+
+security_logger = logging.getLogger('security')
+
+
+class PoolContrasenasSaturado(Exception):
+    """
+    El pool de contraseñas no acepta más trabajo en este momento.
+
+    Atributos:
+        retry_after (int): Segundos sugeridos antes de reintentar
+    """
+
+    def __init__(self, mensaje: str = 'Servicio de autenticación saturado', retry_after: int = 1):
+        super().__init__(mensaje)
+        self.retry_after = retry_after
+
+
+def rondas_de_hash(hashed: str) -> int:
+    """
+    Extrae el factor de costo de un hash bcrypt ($2b$<rondas>$...).
+
+    Args:
+        hashed (str): Hash bcrypt
+
+    Returns:
+        int: Rondas del hash o 0 si el formato no es reconocido
+    """
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+class PoolContrasenas:
+    """
+    Ejecuta bcrypt en un ThreadPoolExecutor con profundidad de cola acotada.
+
+    Atributos de métricas:
+        completadas (int): Operaciones terminadas
+        rechazadas (int): Operaciones rechazadas por saturación
+        expiradas (int): Operaciones que superaron el tiempo de espera
+        rehashes (int): Contraseñas recalculadas con el costo actual
+    """
+
+    def __init__(self, workers: int = None, max_pendientes: int = None, timeout_segundos: float = None):
+        self._workers = workers
+        self._max_pendientes = max_pendientes
+        self._timeout = timeout_segundos
+        self._executor = None
+        self._cupos = None
+        self._lock = threading.Lock()
+        self._en_curso = 0
+
+        self.completadas = 0
+        self.rechazadas = 0
+        self.expiradas = 0
+        self.rehashes = 0
+
+    @property
+    def workers(self) -> int:
+        if self._workers is not None:
+            return self._workers
+        return getattr(settings, 'PASSWORD_POOL_WORKERS', 2)
+
+    @property
+    def max_pendientes(self) -> int:
+        if self._max_pendientes is not None:
+            return self._max_pendientes
+        return getattr(settings, 'PASSWORD_POOL_MAX_PENDIENTES', 8)
+
+    @property
+    def timeout(self) -> float:
+        if self._timeout is not None:
+            return self._timeout
+        return getattr(settings, 'PASSWORD_POOL_TIMEOUT_SEGUNDOS', 5)
+
+    @property
+    def rondas(self) -> int:
+        """Factor de costo configurado para hashes nuevos."""
+        return getattr(settings, 'BCRYPT_ROUNDS', 12)
+
+    def _inicializar(self) -> None:
+        # Creación perezosa: el pool no existe hasta el primer login
+        with self._lock:
+            if self._executor is None:
+                self._cupos = threading.BoundedSemaphore(self.workers + self.max_pendientes)
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='bcrypt'
+                )
+
+    def enviar(self, funcion, *args):
+        """
+        Encola una operación sin esperar su resultado.
+
+        Args:
+            funcion: Callable a ejecutar en el pool
+            *args: Argumentos de la función
+
+        Returns:
+            Future: Resultado futuro de la operación
+
+        Raises:
+            PoolContrasenasSaturado: Si ya hay workers + max_pendientes operaciones
+        """
+        if self._executor is None:
+            self._inicializar()
+
+        if not self._cupos.acquire(blocking=False):
+            self.rechazadas += 1
+            raise PoolContrasenasSaturado(retry_after=max(1, int(self.timeout)))
+
+        with self._lock:
+            self._en_curso += 1
+
+        try:
+            futuro = self._executor.submit(funcion, *args)
+        except Exception:
+            self._liberar()
+            raise
+        futuro.add_done_callback(lambda _: self._liberar())
+        return futuro
+
+    def ejecutar(self, funcion, *args):
+        """
+        Ejecuta una operación en el pool y espera su resultado.
+
+        Raises:
+            PoolContrasenasSaturado: Si el pool está lleno o la espera supera el timeout
+        """
+        futuro = self.enviar(funcion, *args)
+        try:
+            resultado = futuro.result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            futuro.cancel()
+            self.expiradas += 1
+            raise PoolContrasenasSaturado(retry_after=max(1, int(self.timeout)))
+
+        self.completadas += 1
+        return resultado
+
+    def _liberar(self) -> None:
+        with self._lock:
+            self._en_curso -= 1
+        self._cupos.release()
+
+    def hashear(self, raw_password: str) -> str:
+        """
+        Hashea una contraseña con el costo configurado (BCRYPT_ROUNDS).
+
+        Args:
+            raw_password (str): Contraseña en texto plano
+
+        Returns:
+            str: Hash bcrypt
+        """
+        hashed = self.ejecutar(
+            bcrypt.hashpw, raw_password.encode('utf-8'), bcrypt.gensalt(self.rondas)
+        )
+        return hashed.decode('utf-8')
+
+    def verificar(self, raw_password: str, hashed: str) -> bool:
+        """
+        Verifica una contraseña contra su hash.
+
+        Args:
+            raw_password (str): Contraseña en texto plano
+            hashed (str): Hash bcrypt almacenado
+
+        Returns:
+            bool: True si coincide
+        """
+        return self.ejecutar(bcrypt.checkpw, raw_password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def necesita_rehash(self, hashed: str) -> bool:
+        """Indica si un hash se calculó con un costo distinto al configurado."""
+        return rondas_de_hash(hashed) != self.rondas
+
+    def rehashear_si_necesario(self, usuario_id, raw_password: str, hashed: str) -> bool:
+        """
+        Recalcula en segundo plano un hash con costo desactualizado.
+
+        Se llama tras verificar la contraseña (es el único momento en que se
+        conoce el texto plano). Si el pool está saturado se omite: se
+        reintentará en el siguiente login.
+
+        Args:
+            usuario_id: ObjectId del usuario
+            raw_password (str): Contraseña ya verificada
+            hashed (str): Hash actual almacenado
+
+        Returns:
+            bool: True si se encoló el rehash
+        """
+        if not self.necesita_rehash(hashed):
+            return False
+
+        rondas = self.rondas
+
+        def rehashear():
+            from mongoengine.connection import get_db
+
+            nuevo = bcrypt.hashpw(raw_password.encode('utf-8'), bcrypt.gensalt(rondas)).decode('utf-8')
+            # Condicionado al hash anterior: no pisar un cambio de contraseña concurrente
+            resultado = get_db().usuarios.update_one(
+                {'_id': usuario_id, 'password': hashed},
+                {'$set': {'password': nuevo}}
+            )
+            if resultado.modified_count:
+                self.rehashes += 1
+
+        try:
+            futuro = self.enviar(rehashear)
+        except PoolContrasenasSaturado:
+            return False
+
+        futuro.add_done_callback(self._registrar_error_rehash)
+        return True
+
+    def _registrar_error_rehash(self, futuro) -> None:
+        error = futuro.exception()
+        if error is not None:
+            security_logger.warning(
+                f'PASSWORD_REHASH_FAILED | {error}',
+                extra={'user_id': 'system', 'ip': 'local'}
+            )
+
+    def estadisticas(self) -> dict:
+        """
+        Métricas del pool para operadores.
+
+        Returns:
+            dict: {workers, max_pendientes, en_curso, completadas, rechazadas,
+                   expiradas, rehashes, rondas}
+        """
+        return {
+            'workers': self.workers,
+            'max_pendientes': self.max_pendientes,
+            'en_curso': self._en_curso,
+            'completadas': self.completadas,
+            'rechazadas': self.rechazadas,
+            'expiradas': self.expiradas,
+            'rehashes': self.rehashes,
+            'rondas': self.rondas,
+        }
+
+
+# Instancia única por proceso (cada worker de gunicorn tiene la suya)
+pool_contrasenas = PoolContrasenas()
@@ -4,6 +4,10 @@ Decoradores de Rate Limiting para endpoints de la API.
 Este módulo proporciona decoradores configurados para diferentes tipos de endpoints
 y protege contra ataques de fuerza bruta, DoS, y abuso de la API.
 
+RENDIMIENTO/SEGURIDAD: Los contadores viven en un almacén compartido por
+todos los workers (ver rate_limit_engine), por lo que el límite configurado
+es el límite real aunque haya varios procesos o servidores.
+
 Uso:
     from apps.autenticacion.rate_limit_decorators import rate_limit_login
 
@@ -17,20 +21,33 @@ Tipos de rate limits:
     - rate_limit_leccion: 20 lecciones por hora por usuario (completar/fallar)
     - rate_limit_compra: 10 compras por minuto por usuario (vidas/tomins)
     - rate_limit_api: 100 peticiones por minuto por IP (general)
+    - rate_limit_admin: 30 operaciones por minuto por usuario (CRUD admin)
+
+Headers de respuesta:
+    RateLimit-Limit, RateLimit-Remaining, RateLimit-Reset, RateLimit-Policy
+    y Retry-After cuando se responde 429.
 """
 from functools import wraps
-from django_ratelimit.decorators import ratelimit
 from rest_framework.response import Response
 from rest_framework import status
 from .error_handler import log_security_event, obtener_ip_cliente
+from .rate_limit_engine import Limite, motor_rate_limit
+
+
+LIMITE_LOGIN = Limite('login', cantidad=5, periodo=60, clave='ip', metodos=['POST'])
+LIMITE_LECCION = Limite('leccion', cantidad=20, periodo=3600, clave='user', metodos=['POST'])
+LIMITE_COMPRA = Limite('compra', cantidad=10, periodo=60, clave='user', metodos=['POST'])
+LIMITE_API = Limite('api', cantidad=100, periodo=60, clave='ip')
+LIMITE_ADMIN = Limite('admin', cantidad=30, periodo=60, clave='user', metodos=['POST', 'PUT', 'PATCH', 'DELETE'])
 
 
-def crear_respuesta_rate_limit(request):
+def crear_respuesta_rate_limit(request, resultado=None):
     """
     Crea una respuesta estandarizada cuando se excede el rate limit.
 
     Args:
         request: Request de Django
+        resultado (ResultadoLimite, optional): Decisión del motor (agrega headers)
 
     Returns:
         Response: Respuesta HTTP 429 con mensaje informativo
@@ -46,27 +63,70 @@ def crear_respuesta_rate_limit(request):
         severity='WARNING'
     )
 
-    return Response({
+    response = Response({
         'status': 'error',
         'message': 'Demasiadas peticiones. Por favor espera un momento antes de intentar nuevamente.',
         'tipo_error': 'rate_limit_exceeded',
         'ayuda': 'Si continúas teniendo problemas, contacta al soporte.'
     }, status=status.HTTP_429_TOO_MANY_REQUESTS)
 
+    if resultado is not None:
+        for header, valor in resultado.headers().items():
+            response[header] = valor
 
-def verificar_rate_limit(request):
+    return response
+
+
+def obtener_identificador(request, clave: str) -> str:
     """
-    Verifica si la petición ha sido rate limited y retorna respuesta apropiada.
+    Obtiene el identificador con el que se cuentan las peticiones.
 
     Args:
         request: Request de Django
+        clave (str): 'ip' o 'user'
+
+    Returns:
+        str: 'u:<id>' para usuarios autenticados, 'ip:<ip>' en otro caso
+    """
+    if clave == 'user':
+        # request.user lo asigna require_auth (UsuarioLigero con .id)
+        usuario_id = getattr(getattr(request, 'user', None), 'id', None)
+        if usuario_id is not None:
+            return f'u:{usuario_id}'
+    return f'ip:{obtener_ip_cliente(request)}'
+
+
+def limitar(limite: Limite):
+    """
+    Crea un decorador que aplica `limite` con el motor compartido.
+
+    Args:
+        limite (Limite): Política a aplicar
 
     Returns:
-        Response or None: Response de rate limit si fue limitado, None si está OK
+        function: Decorador para vistas
     """
-    if getattr(request, 'limited', False):
-        return crear_respuesta_rate_limit(request)
-    return None
+    def decorador(func):
+        @wraps(func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in limite.metodos or not motor_rate_limit.habilitado:
+                return func(request, *args, **kwargs)
+
+            resultado = motor_rate_limit.consumir(
+                limite, obtener_identificador(request, limite.clave)
+            )
+            if not resultado.permitido:
+                return crear_respuesta_rate_limit(request, resultado)
+
+            # Continuar con la función original
+            response = func(request, *args, **kwargs)
+            for header, valor in resultado.headers().items():
+                response[header] = valor
+            return response
+
+        return wrapper
+
+    return decorador
 
 
 def rate_limit_login(func):
@@ -82,18 +142,7 @@ def rate_limit_login(func):
         def login(request):
             # ... código ...
     """
-    @wraps(func)
-    @ratelimit(key='ip', rate='5/m', method='POST')
-    def wrapper(request, *args, **kwargs):
-        # Verificar si fue rate limited
-        respuesta_limit = verificar_rate_limit(request)
-        if respuesta_limit:
-            return respuesta_limit
-
-        # Continuar con la función original
-        return func(request, *args, **kwargs)
-
-    return wrapper
+    return limitar(LIMITE_LOGIN)(func)
 
 
 def rate_limit_leccion(func):
@@ -110,18 +159,7 @@ def rate_limit_leccion(func):
         def completar_leccion(request, leccion_id):
             # ... código ...
     """
-    @wraps(func)
-    @ratelimit(key='user', rate='20/h', method='POST')
-    def wrapper(request, *args, **kwargs):
-        # Verificar si fue rate limited
-        respuesta_limit = verificar_rate_limit(request)
-        if respuesta_limit:
-            return respuesta_limit
-
-        # Continuar con la función original
-        return func(request, *args, **kwargs)
-
-    return wrapper
+    return limitar(LIMITE_LECCION)(func)
 
 
 def rate_limit_compra(func):
@@ -138,18 +176,7 @@ def rate_limit_compra(func):
         def comprar_vida(request):
             # ... código ...
     """
-    @wraps(func)
-    @ratelimit(key='user', rate='10/m', method='POST')
-    def wrapper(request, *args, **kwargs):
-        # Verificar si fue rate limited
-        respuesta_limit = verificar_rate_limit(request)
-        if respuesta_limit:
-            return respuesta_limit
-
-        # Continuar con la función original
-        return func(request, *args, **kwargs)
-
-    return wrapper
+    return limitar(LIMITE_COMPRA)(func)
 
 
 def rate_limit_api(func):
@@ -165,18 +192,7 @@ def rate_limit_api(func):
         def listar_lecciones(request):
             # ... código ...
     """
-    @wraps(func)
-    @ratelimit(key='ip', rate='100/m', method=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
-    def wrapper(request, *args, **kwargs):
-        # Verificar si fue rate limited
-        respuesta_limit = verificar_rate_limit(request)
-        if respuesta_limit:
-            return respuesta_limit
-
-        # Continuar con la función original
-        return func(request, *args, **kwargs)
-
-    return wrapper
+    return limitar(LIMITE_API)(func)
 
 
 def rate_limit_admin(func):
@@ -194,15 +210,4 @@ def rate_limit_admin(func):
         def crear_leccion(request):
             # ... código ...
     """
-    @wraps(func)
-    @ratelimit(key='user', rate='30/m', method=['POST', 'PUT', 'PATCH', 'DELETE'])
-    def wrapper(request, *args, **kwargs):
-        # Verificar si fue rate limited
-        respuesta_limit = verificar_rate_limit(request)
-        if respuesta_limit:
-            return respuesta_limit
-
-        # Continuar con la función original
-        return func(request, *args, **kwargs)
-
-    return wrapper
+    return limitar(LIMITE_ADMIN)(func)
@@ -0,0 +1,313 @@
+"""
+Motor de rate limiting compartido entre workers (ventana deslizante).
+
+RENDIMIENTO/SEGURIDAD: django_ratelimit guardaba los contadores en la cache
+por defecto de Django (locmem, por proceso), así que con N workers de
+gunicorn el límite real era N veces el configurado y no se compartía entre
+servidores. Este motor guarda los contadores en MongoDB (colección
+`rate_limits`, con TTL) y los actualiza con operaciones atómicas.
+
+Algoritmo (contador de ventana deslizante):
+    Se cuenta por ventanas fijas de `periodo` segundos y la tasa se estima
+    como  actual + anterior * (fracción de la ventana anterior que aún cae
+    dentro de los últimos `periodo` segundos). Cada petición es un único
+    $inc con upsert; el conteo de la ventana anterior ya no cambia cuando
+    esta se cierra, así que se lee una vez y se recuerda en memoria.
+
+Nivel previo en proceso:
+    Cuando una clave supera el límite, el worker recuerda hasta cuándo está
+    bloqueada y rechaza las siguientes peticiones sin consultar MongoDB.
+
+Backends (RATE_LIMIT_BACKEND):
+    - 'mongo': compartido entre workers y servidores (producción)
+    - 'memoria': por proceso, para desarrollo y tests
+
+Uso:
+    from apps.autenticacion.rate_limit_engine import Limite, motor_rate_limit
+
+    limite = Limite('login', cantidad=5, periodo=60, clave='ip', metodos=['POST'])
+    resultado = motor_rate_limit.consumir(limite, '203.0.113.7')
+    if not resultado.permitido:
+        ...  # 429 con resultado.retry_after
+"""
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from django.conf import settings
+
+security_logger = logging.getLogger('security')
+
+
+class Limite:
+    """
+    Política de rate limit.
+
+    Atributos:
+        nombre (str): Identificador de la política (parte de la clave)
+        cantidad (int): Peticiones permitidas por periodo
+        periodo (int): Duración de la ventana en segundos
+        clave (str): 'ip' o 'user' (usuario autenticado, IP como respaldo)
+        metodos (list): Métodos HTTP a los que aplica
+    """
+
+    __slots__ = ('nombre', 'cantidad', 'periodo', 'clave', 'metodos')
+
+    def __init__(self, nombre: str, cantidad: int, periodo: int, clave: str = 'ip', metodos: list = None):
+        self.nombre = nombre
+        self.cantidad = cantidad
+        self.periodo = periodo
+        self.clave = clave
+        self.metodos = metodos or ['GET', 'POST', 'PUT', 'PATCH', 'DELETE']
+
+    @property
+    def politica(self) -> str:
+        """Valor del header RateLimit-Policy (ej: '5;w=60')."""
+        return f'{self.cantidad};w={self.periodo}'
+
+
+class ResultadoLimite:
+    """
+    Resultado de consumir una petición de un límite.
+
+    Atributos:
+        permitido (bool): Si la petición puede continuar
+        limite (Limite): Política aplicada
+        restantes (int): Peticiones restantes estimadas en la ventana
+        reinicio (int): Segundos hasta que se libera capacidad
+        retry_after (int): Segundos a esperar (solo si no está permitido)
+    """
+
+    __slots__ = ('permitido', 'limite', 'restantes', 'reinicio', 'retry_after')
+
+    def __init__(self, permitido: bool, limite: Limite, restantes: int, reinicio: int, retry_after: int = 0):
+        self.permitido = permitido
+        self.limite = limite
+        self.restantes = restantes
+        self.reinicio = reinicio
+        self.retry_after = retry_after
+
+    def headers(self) -> dict:
+        """Headers RateLimit-* (y Retry-After si fue rechazada)."""
+        headers = {
+            'RateLimit-Limit': str(self.limite.cantidad),
+            'RateLimit-Remaining': str(self.restantes),
+            'RateLimit-Reset': str(self.reinicio),
+            'RateLimit-Policy': self.limite.politica,
+        }
+        if not self.permitido:
+            headers['Retry-After'] = str(self.retry_after)
+        return headers
+
+
+class BackendMemoria:
+    """Contadores por ventana en memoria del proceso (desarrollo y tests)."""
+
+    def __init__(self):
+        self._contadores = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, clave: str, expira_en: float) -> int:
+        with self._lock:
+            conteo, _ = self._contadores.get(clave, (0, expira_en))
+            self._contadores[clave] = (conteo + 1, expira_en)
+
+            # Limpieza oportunista de ventanas vencidas
+            if len(self._contadores) > 10000:
+                ahora = time.time()
+                self._contadores = {
+                    k: v for k, v in self._contadores.items() if v[1] > ahora
+                }
+            return conteo + 1
+
+    def leer(self, clave: str) -> int:
+        with self._lock:
+            return self._contadores.get(clave, (0, 0))[0]
+
+
+class BackendMongo:
+    """
+    Contadores por ventana en la colección `rate_limits`.
+
+    Cada documento es {_id: '<politica>:<clave>:<ventana>', n, expira_en};
+    el índice TTL sobre expira_en elimina las ventanas vencidas.
+    """
+
+    def __init__(self):
+        self._indice_creado = False
+
+    def _coleccion(self):
+        from mongoengine.connection import get_db
+
+        coleccion = get_db().rate_limits
+        if not self._indice_creado:
+            coleccion.create_index('expira_en', expireAfterSeconds=0)
+            self._indice_creado = True
+        return coleccion
+
+    def incrementar(self, clave: str, expira_en: float) -> int:
+        from pymongo import ReturnDocument
+
+        documento = self._coleccion().find_one_and_update(
+            {'_id': clave},
+            {
+                '$inc': {'n': 1},
+                '$setOnInsert': {'expira_en': datetime.utcfromtimestamp(expira_en)}
+            },
+            upsert=True,
+            projection={'n': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        return documento['n']
+
+    def leer(self, clave: str) -> int:
+        documento = self._coleccion().find_one({'_id': clave}, {'n': 1})
+        return documento['n'] if documento else 0
+
+
+class MotorRateLimit:
+    """
+    Aplica límites de ventana deslizante sobre un backend compartido.
+
+    Atributos de métricas:
+        consultas_backend (int): Operaciones enviadas al backend
+        rechazos_locales (int): Rechazos resueltos por el nivel en proceso
+        rechazos (int): Total de peticiones rechazadas
+        errores_backend (int): Fallos del backend (la petición se permite)
+    """
+
+    def __init__(self, backend=None, reloj=time.time):
+        self._backend = backend
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        self._bloqueados = {}  # clave -> timestamp hasta el que está bloqueada
+        self._ventanas_cerradas = {}  # clave de ventana cerrada -> conteo final
+
+        self.consultas_backend = 0
+        self.rechazos_locales = 0
+        self.rechazos = 0
+        self.errores_backend = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            if getattr(settings, 'RATE_LIMIT_BACKEND', 'mongo') == 'memoria':
+                self._backend = BackendMemoria()
+            else:
+                self._backend = BackendMongo()
+        return self._backend
+
+    @property
+    def habilitado(self) -> bool:
+        return getattr(settings, 'RATE_LIMIT_HABILITADO', True)
+
+    def consumir(self, limite: Limite, identificador: str) -> ResultadoLimite:
+        """
+        Registra una petición y decide si está dentro del límite.
+
+        Args:
+            limite (Limite): Política a aplicar
+            identificador (str): IP o ID de usuario
+
+        Returns:
+            ResultadoLimite: Decisión y datos para los headers
+        """
+        ahora = self._reloj()
+        clave = f'{limite.nombre}:{identificador}'
+
+        # Nivel previo: clave bloqueada recientemente en este worker
+        bloqueado_hasta = self._bloqueados.get(clave)
+        if bloqueado_hasta is not None:
+            if bloqueado_hasta > ahora:
+                self.rechazos_locales += 1
+                self.rechazos += 1
+                espera = max(1, math.ceil(bloqueado_hasta - ahora))
+                return ResultadoLimite(False, limite, 0, espera, espera)
+            with self._lock:
+                self._bloqueados.pop(clave, None)
+
+        ventana = int(ahora // limite.periodo)
+        inicio_ventana = ventana * limite.periodo
+        fin_ventana = inicio_ventana + limite.periodo
+
+        try:
+            actual = self.backend.incrementar(
+                f'{clave}:{ventana}',
+                fin_ventana + limite.periodo  # Se necesita como "anterior" una ventana más
+            )
+            anterior = self._conteo_ventana_cerrada(f'{clave}:{ventana - 1}')
+            self.consultas_backend += 1
+        except Exception as e:
+            # Fallar abierto: un problema del almacén no debe tumbar la API
+            self.errores_backend += 1
+            security_logger.warning(
+                f'RATE_LIMIT_BACKEND_FAILED | {e}',
+                extra={'user_id': 'system', 'ip': 'local'}
+            )
+            return ResultadoLimite(True, limite, limite.cantidad, limite.periodo)
+
+        peso_anterior = 1 - (ahora - inicio_ventana) / limite.periodo
+        estimado = actual + anterior * peso_anterior
+        restantes = max(0, int(limite.cantidad - estimado))
+        reinicio = max(1, math.ceil(fin_ventana - ahora))
+
+        if estimado <= limite.cantidad:
+            return ResultadoLimite(True, limite, restantes, reinicio)
+
+        espera = self._segundos_hasta_liberar(limite, actual, anterior, ahora, inicio_ventana)
+        with self._lock:
+            self._bloqueados[clave] = ahora + espera
+            if len(self._bloqueados) > 10000:
+                self._bloqueados = {
+                    k: v for k, v in self._bloqueados.items() if v > ahora
+                }
+        self.rechazos += 1
+        return ResultadoLimite(False, limite, 0, reinicio, max(1, math.ceil(espera)))
+
+    def _conteo_ventana_cerrada(self, clave_ventana: str) -> int:
+        # Una ventana cerrada ya no recibe incrementos: su conteo es definitivo
+        conteo = self._ventanas_cerradas.get(clave_ventana)
+        if conteo is None:
+            conteo = self.backend.leer(clave_ventana)
+            self.consultas_backend += 1
+            with self._lock:
+                if len(self._ventanas_cerradas) > 10000:
+                    self._ventanas_cerradas.clear()
+                self._ventanas_cerradas[clave_ventana] = conteo
+        return conteo
+
+    @staticmethod
+    def _segundos_hasta_liberar(limite: Limite, actual: int, anterior: int,
+                                ahora: float, inicio_ventana: float) -> float:
+        """Tiempo hasta que el estimado vuelva a quedar dentro del límite."""
+        fin_ventana = inicio_ventana + limite.periodo
+        if actual > limite.cantidad or anterior == 0:
+            # Solo se libera al empezar la siguiente ventana
+            return fin_ventana - ahora
+
+        # actual + anterior * (1 - t/periodo) <= cantidad  =>  despejar t
+        t = limite.periodo * (1 - (limite.cantidad - actual) / anterior)
+        return max(0.0, min(inicio_ventana + t, fin_ventana) - ahora)
+
+    def estadisticas(self) -> dict:
+        """
+        Métricas del motor para operadores.
+
+        Returns:
+            dict: {backend, claves_bloqueadas, consultas_backend,
+                   rechazos_locales, rechazos, errores_backend}
+        """
+        ahora = self._reloj()
+        return {
+            'backend': type(self.backend).__name__,
+            'claves_bloqueadas': sum(1 for v in self._bloqueados.values() if v > ahora),
+            'consultas_backend': self.consultas_backend,
+            'rechazos_locales': self.rechazos_locales,
+            'rechazos': self.rechazos,
+            'errores_backend': self.errores_backend,
+        }
+
+
+# Instancia única por proceso (el estado compartido vive en el backend)
+motor_rate_limit = MotorRateLimit()
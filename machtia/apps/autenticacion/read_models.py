@@ -0,0 +1,186 @@
+"""
+Vistas de lectura ligeras (sin mongoengine) para las rutas calientes.
+
+RENDIMIENTO: Reconstruir un Document `Usuario(**usuario_dict)` en cada
+petición autenticada valida todos los campos y crea el estado de tracking
+de mongoengine. `UsuarioLigero` se decodifica directamente del dict de
+PyMongo en un objeto con __slots__ y comparte la lógica de dominio con
+`Usuario` a través de `UsuarioMixin`.
+
+Los cambios no reemplazan el documento completo: save() los traduce a
+operadores atómicos ($set para campos asignados, $addToSet para elementos
+agregados a listas, $max para progresoContiguo e $inc para incrementos
+diferidos y para los contadores: temasCompletados y palabrasAprendidas). `operaciones_actualizacion()` expone ese update.
+
+Guardado diferido:
+    Tras diferir_guardado(), save() no escribe y los incrementos atómicos
+    (agregar_tomin) se acumulan. Quien difiere aplica el update completo y
+    llama a marcar_guardado() (ver apps.progreso.completion_engine).
+
+Uso:
+    usuario = UsuarioLigero(usuario_data)
+    usuario.nombre = 'Nuevo'
+    usuario.operaciones_actualizacion()  # {'$set': {'nombre': 'Nuevo'}}
+    usuario.save()
+"""
+from datetime import datetime
+from .models import UsuarioMixin
+from .request_context import invalidar_documento
+
+# Campos persistentes y su valor por defecto (mismos defaults que Usuario)
+CAMPOS_USUARIO = {
+    'email': None,
+    'nombre': None,
+    'password': None,
+    'rol': 'estudiante',
+    'tomin': 0,
+    'vidas': 3,
+    'leccionesCompletadas': list,
+    'progresoContiguo': 0,
+    'temasCompletados': dict,
+    'palabrasAprendidas': 0,
+    'leccionActual': 1,
+    'nivelesCompletados': list,
+    'nivelActual': 1,
+    'ultimaRegeneracionVida': datetime.utcnow,
+    'createdAt': datetime.utcnow,
+}
+
+
+class UsuarioLigero(UsuarioMixin):
+    """
+    Usuario decodificado del documento crudo de MongoDB.
+
+    Tiene los mismos atributos y métodos de dominio que `Usuario`, por lo que
+    las vistas y serializadores lo usan sin cambios.
+    """
+
+    __slots__ = (
+        'id', '_cambios', '_agregados', '_maximos', '_incrementos', '_diferido', '_indice_progreso'
+    ) + tuple(CAMPOS_USUARIO)
+
+    def __init__(self, usuario_data: dict):
+        """
+        Args:
+            usuario_data (dict): Documento de la colección `usuarios`
+        """
+        asignar = object.__setattr__
+        asignar(self, 'id', usuario_data['_id'])
+        asignar(self, '_cambios', set())
+        asignar(self, '_agregados', {})
+        asignar(self, '_maximos', {})
+        asignar(self, '_incrementos', {})
+        asignar(self, '_diferido', False)
+        asignar(self, '_indice_progreso', None)
+
+        for campo, default in CAMPOS_USUARIO.items():
+            valor = usuario_data.get(campo)
+            if valor is None:
+                valor = default() if callable(default) else default
+            elif isinstance(valor, (list, dict)):
+                # Copia: el dict puede estar compartido en el mapa de identidad
+                valor = type(valor)(valor)
+            asignar(self, campo, valor)
+
+    def __setattr__(self, campo: str, valor) -> None:
+        object.__setattr__(self, campo, valor)
+        if campo in CAMPOS_USUARIO:
+            self._cambios.add(campo)
+
+    @property
+    def pk(self):
+        return self.id
+
+    def _agregar_a_lista(self, campo: str, valor) -> None:
+        getattr(self, campo).append(valor)
+        self._agregados.setdefault(campo, []).append(valor)
+
+    def _diferir_incremento(self, campo: str, cantidad: int) -> bool:
+        if not self._diferido:
+            return False
+        object.__setattr__(self, campo, getattr(self, campo) + cantidad)
+        self._incrementos[campo] = self._incrementos.get(campo, 0) + cantidad
+        return True
+
+    def _contar_tema(self, clave: str) -> None:
+        self.temasCompletados[clave] = self.temasCompletados.get(clave, 0) + 1
+        campo = f'temasCompletados.{clave}'
+        self._incrementos[campo] = self._incrementos.get(campo, 0) + 1
+
+    def _sumar_contador(self, campo: str, cantidad: int) -> None:
+        object.__setattr__(self, campo, getattr(self, campo) + cantidad)
+        self._incrementos[campo] = self._incrementos.get(campo, 0) + cantidad
+
+    def _avanzar_progreso_contiguo(self, prefijo: int) -> None:
+        # $max: una completación concurrente nunca hace retroceder el prefijo
+        object.__setattr__(self, 'progresoContiguo', prefijo)
+        self._maximos['progresoContiguo'] = prefijo
+
+    def _sincronizar_campo(self, campo: str, valor) -> None:
+        object.__setattr__(self, campo, valor)
+        self._cambios.discard(campo)
+
+    def operaciones_actualizacion(self) -> dict:
+        """
+        Traduce los cambios pendientes a operadores de actualización.
+
+        Returns:
+            dict: Update para update_one (vacío si no hay cambios)
+        """
+        operaciones = {}
+
+        if self._cambios:
+            operaciones['$set'] = {campo: getattr(self, campo) for campo in self._cambios}
+
+        agregados = {
+            campo: {'$each': valores}
+            for campo, valores in self._agregados.items()
+            if campo not in self._cambios  # Un $set del campo completo ya los incluye
+        }
+        if agregados:
+            operaciones['$addToSet'] = agregados
+
+        maximos = {
+            campo: valor for campo, valor in self._maximos.items()
+            if campo not in self._cambios
+        }
+        if maximos:
+            operaciones['$max'] = maximos
+
+        incrementos = {
+            campo: cantidad for campo, cantidad in self._incrementos.items()
+            if campo.split('.', 1)[0] not in self._cambios
+        }
+        if incrementos:
+            operaciones['$inc'] = incrementos
+
+        return operaciones
+
+    def diferir_guardado(self) -> None:
+        """save() deja de escribir hasta marcar_guardado()."""
+        object.__setattr__(self, '_diferido', True)
+
+    def marcar_guardado(self) -> None:
+        """Descarta los cambios pendientes (ya aplicados por quien difirió)."""
+        self._cambios.clear()
+        self._agregados.clear()
+        self._maximos.clear()
+        self._incrementos.clear()
+        object.__setattr__(self, '_diferido', False)
+
+        # El documento cacheado en la petición ya no refleja MongoDB
+        invalidar_documento('usuarios', self.id)
+
+    def save(self) -> None:
+        """Persiste los cambios pendientes con una sola operación atómica."""
+        if self._diferido:
+            return
+
+        operaciones = self.operaciones_actualizacion()
+        if not operaciones:
+            return
+
+        from mongoengine.connection import get_db
+
+        get_db().usuarios.update_one({'_id': self.id}, operaciones)
+        self.marcar_guardado()
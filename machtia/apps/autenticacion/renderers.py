@@ -0,0 +1,114 @@
+"""
+Renderers de DRF basados en orjson (JSON) y msgpack (opcional).
+
+RENDIMIENTO: El JSONRenderer de DRF codifica con json.dumps y un encoder en
+Python que se invoca por cada valor no nativo; en los listados la
+codificación es buena parte del CPU de la petición. orjson codifica en C,
+maneja datetime de forma nativa y solo llama a `_convertir` para tipos
+propios de MongoDB (ObjectId) o de Django (Decimal, textos lazy).
+
+El renderer de MessagePack se registra solo si el paquete `msgpack` está
+instalado (ver REST_FRAMEWORK en settings). El frontend lo negocia con
+`Accept: application/msgpack`; sin ese header la respuesta es JSON.
+
+Uso:
+    from apps.autenticacion.renderers import codificar_json
+
+    cuerpo = codificar_json({'fecha': datetime.utcnow(), 'id': ObjectId()})
+"""
+import datetime
+import decimal
+import orjson
+from bson import ObjectId
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+# Misma salida que el JSONEncoder de DRF: claves no str ({1: x} -> {"1": x},
+# {None: x} -> {"null": x}) y fechas UTC con 'Z' en lugar de '+00:00'
+OPCIONES = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def _convertir(valor):
+    """Tipos que orjson no codifica por sí mismo (mismo criterio que DRF)."""
+    if isinstance(valor, ObjectId):
+        return str(valor)
+    if isinstance(valor, decimal.Decimal):
+        return float(valor)
+    if isinstance(valor, Promise):
+        return str(valor)
+    if isinstance(valor, datetime.timedelta):
+        return str(valor.total_seconds())
+    if isinstance(valor, bytes):
+        return valor.decode()
+    if hasattr(valor, 'tolist'):
+        return valor.tolist()
+    if hasattr(valor, '__iter__'):
+        # sets, generadores, QuerySets
+        return list(valor)
+    raise TypeError(f'Tipo no serializable: {type(valor).__name__}')
+
+
+def codificar_json(datos) -> bytes:
+    """
+    Codifica `datos` como JSON compacto en UTF-8.
+
+    Args:
+        datos: Estructura con dict, list, str, int, float, bool, None,
+            datetime, ObjectId, Decimal
+
+    Returns:
+        bytes: JSON codificado
+
+    Raises:
+        TypeError: Si algún valor no es serializable
+    """
+    return orjson.dumps(datos, default=_convertir, option=OPCIONES)
+
+
+class RenderizadorJSON(BaseRenderer):
+    """
+    Reemplazo de rest_framework.renderers.JSONRenderer con orjson.
+
+    Produce el mismo JSON compacto UTF-8 que DRF (UNICODE_JSON y
+    COMPACT_JSON), incluidas claves no str y fechas UTC con 'Z'. Única
+    diferencia: NaN e Infinity se codifican como null en lugar de fallar.
+    """
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return codificar_json(data)
+
+
+class RenderizadorMsgPack(BaseRenderer):
+    """
+    Respuestas en MessagePack para clientes que lo piden en Accept.
+
+    Las fechas y los ObjectId se envían como texto (igual que en JSON), así
+    el frontend recibe los mismos valores con cualquiera de los dos formatos.
+    """
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    @staticmethod
+    def _convertir(valor):
+        if hasattr(valor, 'isoformat'):
+            representacion = valor.isoformat()
+            if representacion.endswith('+00:00'):
+                representacion = representacion[:-6] + 'Z'
+            return representacion
+        return _convertir(valor)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import msgpack
+
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self._convertir, use_bin_type=True)
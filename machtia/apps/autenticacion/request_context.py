@@ -0,0 +1,183 @@
+"""
+Contexto por petición: mapa de identidad y contador de consultas a MongoDB.
+
+RENDIMIENTO: Durante una misma petición el usuario, su racha y las lecciones
+se cargaban varias veces (decoradores de auth, vistas y métodos de los
+modelos). El mapa de identidad garantiza que cada documento se lee como
+máximo una vez por petición, y el contador permite verificarlo en tests.
+
+El contexto vive en una ContextVar que activa ContextoPeticionMiddleware;
+fuera de una petición (scripts, shell) las funciones consultan MongoDB
+directamente sin cachear.
+
+Uso:
+    from apps.autenticacion.request_context import obtener_documento
+
+    leccion_data = obtener_documento('lecciones', leccion_id)
+    racha_data = obtener_documento('rachas', usuario_id, campo='usuario_id')
+"""
+import contextvars
+from pymongo import monitoring
+
+_contexto_actual = contextvars.ContextVar('contexto_peticion', default=None)
+
+
+class MapaIdentidad:
+    """
+    Documentos crudos (dicts de PyMongo) cargados durante la petición.
+
+    Las claves son (colección, campo, valor). Un resultado None también se
+    recuerda para no repetir búsquedas que no encontraron nada.
+    """
+
+    def __init__(self, db=None):
+        self._db = db
+        self._documentos = {}
+        self.cargas = 0
+
+    def _obtener_db(self):
+        if self._db is None:
+            from mongoengine.connection import get_db
+            self._db = get_db()
+        return self._db
+
+    def obtener(self, coleccion: str, valor, campo: str = '_id', proyeccion: dict = None):
+        """
+        Retorna el documento, leyéndolo de MongoDB solo la primera vez.
+
+        Args:
+            coleccion (str): Nombre de la colección
+            valor: Valor buscado
+            campo (str): Campo único por el que se busca (default: _id)
+            proyeccion (dict, optional): Campos a traer si no está en el mapa
+
+        Returns:
+            dict: Documento encontrado o None
+        """
+        clave = (coleccion, campo, valor)
+        if clave in self._documentos:
+            return self._documentos[clave]
+
+        # Una proyección nunca sustituye al documento completo
+        if proyeccion:
+            clave_parcial = clave + (tuple(sorted(proyeccion)),)
+            if clave_parcial not in self._documentos:
+                self._documentos[clave_parcial] = self._cargar(coleccion, campo, valor, proyeccion)
+            return self._documentos[clave_parcial]
+
+        self._documentos[clave] = self._cargar(coleccion, campo, valor)
+        return self._documentos[clave]
+
+    def _cargar(self, coleccion: str, campo: str, valor, proyeccion: dict = None):
+        self.cargas += 1
+        return self._obtener_db()[coleccion].find_one({campo: valor}, proyeccion)
+
+    def registrar(self, coleccion: str, documento: dict, campo: str = '_id') -> None:
+        """Agrega al mapa un documento obtenido por otra vía (ej: tras un insert)."""
+        self._documentos[(coleccion, campo, documento[campo])] = documento
+
+    def invalidar(self, coleccion: str, valor, campo: str = '_id') -> None:
+        """Olvida un documento (y sus proyecciones) tras modificarlo."""
+        self._documentos = {
+            clave: doc for clave, doc in self._documentos.items()
+            if clave[:3] != (coleccion, campo, valor)
+        }
+
+
+class ContextoPeticion:
+    """
+    Estado asociado a una petición HTTP.
+
+    Atributos:
+        mapa (MapaIdentidad): Documentos ya cargados
+        consultas (int): Comandos enviados a MongoDB durante la petición
+    """
+
+    def __init__(self, db=None):
+        self.mapa = MapaIdentidad(db)
+        self.consultas = 0
+        self._resueltos = {}
+
+    def resolver_una_vez(self, clave, funcion):
+        """
+        Ejecuta `funcion` una sola vez por petición y memoriza el resultado
+        (o la excepción, que se vuelve a lanzar en llamadas posteriores).
+        """
+        if clave not in self._resueltos:
+            try:
+                self._resueltos[clave] = (funcion(), None)
+            except Exception as e:
+                self._resueltos[clave] = (None, e)
+
+        valor, error = self._resueltos[clave]
+        if error is not None:
+            raise error
+        return valor
+
+
+def obtener_contexto():
+    """Retorna el ContextoPeticion activo o None fuera de una petición."""
+    return _contexto_actual.get()
+
+
+def activar_contexto(contexto: ContextoPeticion):
+    """Activa un contexto y retorna el token para restaurar el anterior."""
+    return _contexto_actual.set(contexto)
+
+
+def desactivar_contexto(token) -> None:
+    _contexto_actual.reset(token)
+
+
+def obtener_documento(coleccion: str, valor, campo: str = '_id', proyeccion: dict = None):
+    """
+    Carga un documento a través del mapa de identidad de la petición actual.
+
+    Args:
+        coleccion (str): Nombre de la colección
+        valor: Valor buscado
+        campo (str): Campo único por el que se busca (default: _id)
+        proyeccion (dict, optional): Campos a traer
+
+    Returns:
+        dict: Documento encontrado o None
+    """
+    contexto = _contexto_actual.get()
+    if contexto is not None:
+        return contexto.mapa.obtener(coleccion, valor, campo, proyeccion)
+
+    from mongoengine.connection import get_db
+    return get_db()[coleccion].find_one({campo: valor}, proyeccion)
+
+
+def registrar_documento(coleccion: str, documento: dict, campo: str = '_id') -> None:
+    """Agrega un documento al mapa de la petición actual (si hay una)."""
+    contexto = _contexto_actual.get()
+    if contexto is not None:
+        contexto.mapa.registrar(coleccion, documento, campo)
+
+
+def invalidar_documento(coleccion: str, valor, campo: str = '_id') -> None:
+    """Olvida un documento del mapa de la petición actual (si hay una)."""
+    contexto = _contexto_actual.get()
+    if contexto is not None:
+        contexto.mapa.invalidar(coleccion, valor, campo)
+
+
+class ContadorConsultas(monitoring.CommandListener):
+    """
+    Listener de PyMongo que cuenta los comandos enviados durante cada petición.
+
+    Se registra en mongoengine.connect(event_listeners=[...]) desde settings.
+    """
+
+    def started(self, event):
+        contexto = _contexto_actual.get()
+        if contexto is not None:
+            contexto.consultas += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
@@ -0,0 +1,37 @@
+"""
+Middleware que crea el contexto por petición (mapa de identidad + métricas).
+
+RENDIMIENTO: Con el contexto activo, el usuario autenticado se resuelve de
+forma perezosa y una sola vez (aunque require_auth y require_role se apliquen
+a la misma vista) y cada documento se lee de MongoDB como máximo una vez.
+"""
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+from .request_context import ContextoPeticion, activar_contexto, desactivar_contexto
+
+
+class ContextoPeticionMiddleware(MiddlewareMixin):
+    """
+    Activa un ContextoPeticion durante el procesamiento de cada petición.
+
+    En desarrollo (DEBUG=True) agrega el header X-Consultas-DB con el número
+    de comandos enviados a MongoDB, para poder verificarlo desde los scripts
+    de prueba.
+    """
+
+    def process_request(self, request):
+        request.contexto_peticion = ContextoPeticion()
+        request._token_contexto = activar_contexto(request.contexto_peticion)
+        return None
+
+    def process_response(self, request, response):
+        token = getattr(request, '_token_contexto', None)
+        if token is None:
+            return response
+
+        if settings.DEBUG:
+            response['X-Consultas-DB'] = str(request.contexto_peticion.consultas)
+
+        desactivar_contexto(token)
+        request._token_contexto = None
+        return response
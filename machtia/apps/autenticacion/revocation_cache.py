@@ -0,0 +1,265 @@
+"""
+Cache en memoria (por worker) de tokens JWT revocados.
+
+RENDIMIENTO: Cada petición autenticada consultaba `tokens_blacklist` para
+saber si el jti estaba revocado, y casi siempre la respuesta era "no".
+Este módulo mantiene en memoria el conjunto de jti revocados que aún no
+expiran, refrescándolo desde MongoDB cada pocos segundos, de forma que la
+respuesta común ("no revocado") nunca toca la base de datos.
+
+También guarda la época de tokens de los usuarios cuyas sesiones fueron
+revocadas en bloque (colección `tokens_epocas`, ver EpocaTokens), de modo
+que verificar el claim 'tev' tampoco toca la base de datos.
+
+Ventana de inconsistencia:
+    Un token (o una época) revocado en OTRO worker puede seguir aceptándose
+    como máximo durante JWT_BLACKLIST_CACHE_SEGUNDOS. Las revocaciones hechas en el
+    mismo worker se registran en la cache inmediatamente.
+
+Uso:
+    from apps.autenticacion.revocation_cache import cache_revocacion
+
+    if cache_revocacion.esta_revocado(jti):
+        raise InvalidTokenError('Token revocado')
+
+    if tev < cache_revocacion.epoca_usuario(user_id):
+        raise InvalidTokenError('Token revocado')
+
+    # Métricas para operadores
+    cache_revocacion.estadisticas()
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from django.conf import settings
+
+security_logger = logging.getLogger('security')
+
+# Solapamiento entre sincronizaciones para tolerar diferencias de reloj
+# entre servidores (revocado_en lo escribe el worker que revoca)
+MARGEN_SINCRONIZACION = timedelta(seconds=30)
+
+
+class CacheRevocacion:
+    """
+    Conjunto en memoria de jti revocados con TTL tomado de `expira_en`.
+
+    El refresco es incremental: la primera carga trae todos los tokens
+    revocados activos y las siguientes solo los revocados desde la última
+    sincronización (usa el índice sobre `revocado_en`).
+
+    Atributos de métricas:
+        aciertos (int): Consultas que encontraron el jti revocado
+        fallos (int): Consultas resueltas como "no revocado" desde memoria
+        refrescos (int): Sincronizaciones exitosas contra MongoDB
+        errores_refresco (int): Sincronizaciones fallidas (se sirve la copia anterior)
+    """
+
+    def __init__(self, intervalo_segundos: int = None, reloj=time.monotonic):
+        self._intervalo = intervalo_segundos
+        self._reloj = reloj
+        self._revocados = {}  # jti -> expira_en
+        self._epocas = {}  # usuario_id -> (epoca, actualizado_en)
+        self._lock = threading.Lock()
+        self._lock_refresco = threading.Lock()
+        self._marca_sincronizacion = None  # datetime UTC de la última sincronización
+        self._ultimo_refresco = None  # valor del reloj monotónico
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.refrescos = 0
+        self.errores_refresco = 0
+
+    @property
+    def intervalo(self) -> int:
+        """Segundos entre sincronizaciones (0 desactiva la cache)."""
+        if self._intervalo is not None:
+            return self._intervalo
+        return getattr(settings, 'JWT_BLACKLIST_CACHE_SEGUNDOS', 5)
+
+    @property
+    def habilitada(self) -> bool:
+        return self.intervalo > 0
+
+    def esta_revocado(self, jti: str) -> bool:
+        """
+        Indica si el jti está revocado usando únicamente memoria
+        (salvo cuando toca sincronizar).
+
+        Args:
+            jti (str): JWT ID del token
+
+        Returns:
+            bool: True si el token está revocado y aún no expira
+        """
+        self._refrescar_si_necesario()
+
+        expira_en = self._revocados.get(jti)
+        if expira_en is not None and expira_en > datetime.utcnow():
+            self.aciertos += 1
+            return True
+
+        self.fallos += 1
+        return False
+
+    def epoca_usuario(self, usuario_id: str) -> int:
+        """
+        Época de tokens vigente del usuario usando únicamente memoria
+        (salvo cuando toca sincronizar).
+
+        Args:
+            usuario_id (str): ID del usuario
+
+        Returns:
+            int: Época actual (0 si sus sesiones nunca se revocaron en bloque)
+        """
+        self._refrescar_si_necesario()
+
+        entrada = self._epocas.get(usuario_id)
+        return entrada[0] if entrada else 0
+
+    def registrar_epoca(self, usuario_id: str, epoca: int, actualizado_en: datetime) -> None:
+        """
+        Registra un incremento de época hecho en este worker (visible de inmediato).
+
+        Args:
+            usuario_id (str): ID del usuario
+            epoca (int): Nueva época
+            actualizado_en (datetime): Momento de la revocación
+        """
+        with self._lock:
+            actual = self._epocas.get(usuario_id)
+            if not actual or actual[0] < epoca:
+                self._epocas[usuario_id] = (epoca, actualizado_en)
+
+    def registrar(self, jti: str, expira_en: datetime) -> None:
+        """
+        Registra una revocación hecha en este worker (visible de inmediato).
+
+        Args:
+            jti (str): JWT ID del token revocado
+            expira_en (datetime): Expiración del token (TTL de la entrada)
+        """
+        with self._lock:
+            self._revocados[jti] = expira_en
+
+    def refrescar(self) -> None:
+        """
+        Sincroniza la cache con las colecciones `tokens_blacklist` y `tokens_epocas`.
+
+        Raises:
+            Exception: Errores de conexión con MongoDB
+        """
+        from mongoengine.connection import get_db
+
+        db = get_db()
+        ahora = datetime.utcnow()
+
+        filtro = {'expira_en': {'$gt': ahora}}
+        carga_completa = self._marca_sincronizacion is None
+        if not carga_completa:
+            filtro['revocado_en'] = {'$gte': self._marca_sincronizacion - MARGEN_SINCRONIZACION}
+
+        cursor = db.tokens_blacklist.find(filtro, {'_id': 0, 'jti': 1, 'expira_en': 1})
+        nuevos = {doc['jti']: doc['expira_en'] for doc in cursor}
+
+        # Una época más antigua que la vida de un refresh token ya no invalida
+        # nada: todos los tokens emitidos antes de ella expiraron
+        vigencia_epocas = ahora - timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRATION_DAYS)
+        filtro_epocas = {'actualizado_en': {'$gt': vigencia_epocas}}
+        if not carga_completa:
+            filtro_epocas['actualizado_en'] = {'$gte': self._marca_sincronizacion - MARGEN_SINCRONIZACION}
+
+        cursor = db.tokens_epocas.find(
+            filtro_epocas, {'_id': 0, 'usuario_id': 1, 'epoca': 1, 'actualizado_en': 1}
+        )
+        nuevas_epocas = {
+            doc['usuario_id']: (doc['epoca'], doc['actualizado_en']) for doc in cursor
+        }
+
+        with self._lock:
+            if carga_completa:
+                revocados = nuevos
+            else:
+                revocados = dict(self._revocados)
+                revocados.update(nuevos)
+
+            # Descartar entradas expiradas (ya no necesitan estar revocadas)
+            self._revocados = {
+                jti: expira_en for jti, expira_en in revocados.items()
+                if expira_en > ahora
+            }
+
+            epocas = {} if carga_completa else dict(self._epocas)
+            for usuario_id, entrada in nuevas_epocas.items():
+                actual = epocas.get(usuario_id)
+                if not actual or actual[0] <= entrada[0]:
+                    epocas[usuario_id] = entrada
+            self._epocas = {
+                usuario_id: entrada for usuario_id, entrada in epocas.items()
+                if entrada[1] > vigencia_epocas
+            }
+            self._marca_sincronizacion = ahora
+            self._ultimo_refresco = self._reloj()
+            self.refrescos += 1
+
+    def invalidar(self) -> None:
+        """Fuerza una carga completa en la próxima consulta."""
+        with self._lock:
+            self._revocados = {}
+            self._epocas = {}
+            self._marca_sincronizacion = None
+            self._ultimo_refresco = None
+
+    def _refrescar_si_necesario(self) -> None:
+        if (self._ultimo_refresco is not None
+                and self._reloj() - self._ultimo_refresco < self.intervalo):
+            return
+
+        # Solo un hilo refresca; el resto sigue con la copia actual
+        if not self._lock_refresco.acquire(blocking=self._ultimo_refresco is None):
+            return
+
+        try:
+            self.refrescar()
+        except Exception as e:
+            self.errores_refresco += 1
+            security_logger.warning(
+                f'BLACKLIST_CACHE_REFRESH_FAILED | {e}',
+                extra={'user_id': 'system', 'ip': 'local'}
+            )
+            if self._ultimo_refresco is None:
+                # Sin copia previa no podemos responder desde memoria
+                raise
+        finally:
+            self._lock_refresco.release()
+
+    def estadisticas(self) -> dict:
+        """
+        Métricas de la cache para operadores.
+
+        Returns:
+            dict: {habilitada, entradas, usuarios_revocados, aciertos, fallos,
+                   refrescos, errores_refresco, antiguedad_segundos,
+                   ventana_maxima_segundos}
+        """
+        antiguedad = None
+        if self._ultimo_refresco is not None:
+            antiguedad = round(self._reloj() - self._ultimo_refresco, 3)
+
+        return {
+            'habilitada': self.habilitada,
+            'entradas': len(self._revocados),
+            'usuarios_revocados': len(self._epocas),
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'refrescos': self.refrescos,
+            'errores_refresco': self.errores_refresco,
+            'antiguedad_segundos': antiguedad,
+            'ventana_maxima_segundos': self.intervalo,
+        }
+
+
+# Instancia única por proceso (cada worker de gunicorn tiene la suya)
+cache_revocacion = CacheRevocacion()
@@ -1,3 +1,669 @@
-from django.test import TestCase
+"""
+Tests para el módulo de autenticación
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+from unittest import mock
+import jwt
+from django.conf import settings
+from django.test import SimpleTestCase, RequestFactory, override_settings
+from bson import ObjectId
+from apps.autenticacion.revocation_cache import CacheRevocacion
+from apps.autenticacion.request_context import (
+    ContextoPeticion, ContadorConsultas, activar_contexto, desactivar_contexto,
+    obtener_documento
+)
+from apps.autenticacion.utils import obtener_progreso_opcional, verificar_token
+from apps.autenticacion.read_models import UsuarioLigero
+from apps.autenticacion.models import IndiceProgreso
+from apps.autenticacion.token_cache import CacheTokens
+from apps.autenticacion.password_pool import PoolContrasenas, PoolContrasenasSaturado, rondas_de_hash
+from apps.autenticacion.rate_limit_engine import BackendMemoria, Limite, MotorRateLimit
+from apps.autenticacion.rate_limit_decorators import limitar
+from apps.autenticacion.blacklist_models import TokenBlacklist
+from apps.autenticacion.etags import calcular_etag, huella_progreso, responder_con_etag
+from apps.autenticacion.renderers import RenderizadorJSON, codificar_json
 
-# Create your tests here.
+
+class ColeccionFalsa:
+    """Colección en memoria que registra los filtros recibidos"""
+
+    def __init__(self, documentos):
+        self.documentos = documentos
+        self.filtros = []
+
+    def find(self, filtro, proyeccion=None):
+        self.filtros.append(filtro)
+        return list(self.documentos)
+
+    def find_one(self, filtro, proyeccion=None):
+        self.filtros.append(filtro)
+        campo, valor = next(iter(filtro.items()))
+        for documento in self.documentos:
+            if documento.get(campo) == valor:
+                return documento
+        return None
+
+
+class CacheRevocacionTest(SimpleTestCase):
+    """Tests para la cache en memoria de tokens revocados"""
+
+    def setUp(self):
+        self.ahora = 1000.0
+        self.cache = CacheRevocacion(intervalo_segundos=5, reloj=lambda: self.ahora)
+        self.expira = datetime.utcnow() + timedelta(minutes=15)
+        self.coleccion = ColeccionFalsa([{'jti': 'revocado', 'expira_en': self.expira}])
+        self.epocas = ColeccionFalsa([
+            {'usuario_id': 'u1', 'epoca': 2, 'actualizado_en': datetime.utcnow()}
+        ])
+        db = mock.Mock(tokens_blacklist=self.coleccion, tokens_epocas=self.epocas)
+        patcher = mock.patch('mongoengine.connection.get_db', return_value=db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_no_revocado_se_resuelve_en_memoria(self):
+        """Test: Dentro del intervalo no se vuelve a consultar MongoDB"""
+        self.assertFalse(self.cache.esta_revocado('otro'))
+        self.assertTrue(self.cache.esta_revocado('revocado'))
+        self.assertFalse(self.cache.esta_revocado('otro'))
+
+        self.assertEqual(len(self.coleccion.filtros), 1)
+        self.assertEqual(self.cache.aciertos, 1)
+        self.assertEqual(self.cache.fallos, 2)
+
+    def test_refresco_incremental(self):
+        """Test: Tras el intervalo solo se piden las revocaciones nuevas"""
+        self.cache.esta_revocado('x')
+        self.ahora += 6
+        self.cache.esta_revocado('x')
+
+        self.assertEqual(len(self.coleccion.filtros), 2)
+        self.assertNotIn('revocado_en', self.coleccion.filtros[0])
+        self.assertIn('revocado_en', self.coleccion.filtros[1])
+        self.assertEqual(self.cache.estadisticas()['refrescos'], 2)
+
+    def test_registro_local_inmediato(self):
+        """Test: Una revocación en el mismo worker es visible sin refrescar"""
+        self.cache.esta_revocado('x')
+        self.cache.registrar('nuevo', self.expira)
+        self.assertTrue(self.cache.esta_revocado('nuevo'))
+
+    def test_entradas_expiradas_no_cuentan(self):
+        """Test: Un jti cuyo token ya expiró no se considera revocado"""
+        self.cache.esta_revocado('x')
+        self.cache.registrar('viejo', datetime.utcnow() - timedelta(seconds=1))
+        self.assertFalse(self.cache.esta_revocado('viejo'))
+
+    def test_epoca_de_usuario_en_memoria(self):
+        """Test: Las épocas se cargan junto con la blacklist"""
+        self.assertEqual(self.cache.epoca_usuario('u1'), 2)
+        self.assertEqual(self.cache.epoca_usuario('otro'), 0)
+        self.cache.registrar_epoca('otro', 1, datetime.utcnow())
+        self.assertEqual(self.cache.epoca_usuario('otro'), 1)
+        self.assertEqual(len(self.epocas.filtros), 1)
+
+    def test_verificar_token_rechaza_epocas_anteriores(self):
+        """Test: Un token con 'tev' menor a la época del usuario está revocado"""
+        def token(tev):
+            return jwt.encode({
+                'user_id': 'u1', 'jti': f'jti-{tev}', 'tev': tev,
+                'exp': datetime.utcnow() + timedelta(minutes=5)
+            }, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+        with mock.patch('apps.autenticacion.revocation_cache.cache_revocacion', self.cache):
+            with self.assertRaisesMessage(jwt.InvalidTokenError, 'Token revocado'):
+                verificar_token(token(1))
+            self.assertEqual(verificar_token(token(2))['tev'], 2)
+
+
+class ContextoPeticionTest(SimpleTestCase):
+    """Tests para el mapa de identidad por petición"""
+
+    def setUp(self):
+        self.coleccion = ColeccionFalsa([{'_id': 1, 'tema': 'saludos'}])
+        self.contexto = ContextoPeticion(db={'lecciones': self.coleccion})
+        token = activar_contexto(self.contexto)
+        self.addCleanup(desactivar_contexto, token)
+
+    def test_documento_se_lee_una_vez(self):
+        """Test: Lecturas repetidas del mismo documento usan el mapa"""
+        primero = obtener_documento('lecciones', 1)
+        segundo = obtener_documento('lecciones', 1)
+
+        self.assertIs(primero, segundo)
+        self.assertEqual(len(self.coleccion.filtros), 1)
+        self.assertEqual(self.contexto.mapa.cargas, 1)
+
+    def test_documento_inexistente_tambien_se_recuerda(self):
+        """Test: Una búsqueda sin resultado no se repite"""
+        self.assertIsNone(obtener_documento('lecciones', 99))
+        self.assertIsNone(obtener_documento('lecciones', 99))
+        self.assertEqual(len(self.coleccion.filtros), 1)
+
+    def test_invalidar_fuerza_nueva_lectura(self):
+        """Test: Tras invalidar, el documento se vuelve a leer"""
+        obtener_documento('lecciones', 1)
+        self.contexto.mapa.invalidar('lecciones', 1)
+        obtener_documento('lecciones', 1)
+        self.assertEqual(len(self.coleccion.filtros), 2)
+
+    def test_resolver_una_vez_memoriza_excepciones(self):
+        """Test: La función se ejecuta una vez aunque lance una excepción"""
+        llamadas = []
+
+        def funcion():
+            llamadas.append(1)
+            raise ValueError('token inválido')
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.contexto.resolver_una_vez(('usuario', 'x'), funcion)
+        self.assertEqual(len(llamadas), 1)
+
+    def test_contador_de_consultas(self):
+        """Test: El listener cuenta los comandos de la petición activa"""
+        contador = ContadorConsultas()
+        contador.started(mock.Mock())
+        contador.started(mock.Mock())
+        self.assertEqual(self.contexto.consultas, 2)
+
+
+class ProgresoOpcionalTest(SimpleTestCase):
+    """Tests para la autenticación opcional de los endpoints públicos"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.usuario_id = ObjectId()
+        self.coleccion = ColeccionFalsa([{
+            '_id': self.usuario_id, 'leccionesCompletadas': [1, 2], 'nivelActual': 2
+        }])
+        self.contexto = ContextoPeticion(db={'usuarios': self.coleccion})
+        token = activar_contexto(self.contexto)
+        self.addCleanup(desactivar_contexto, token)
+
+    def test_peticion_anonima(self):
+        """Test: Sin token no se consulta MongoDB"""
+        self.assertIsNone(obtener_progreso_opcional(self.factory.get('/')))
+        self.assertEqual(self.coleccion.filtros, [])
+
+    def test_token_invalido_es_anonimo(self):
+        """Test: Un token inválido se trata como petición anónima"""
+        request = self.factory.get('/', HTTP_AUTHORIZATION='Bearer basura')
+        self.assertIsNone(obtener_progreso_opcional(request))
+
+    def test_progreso_desde_cookie(self):
+        """Test: El token de la cookie httpOnly se resuelve una sola vez"""
+        request = self.factory.get('/')
+        request.COOKIES['access_token'] = 'token'
+        payload = {'user_id': str(self.usuario_id)}
+
+        with mock.patch('apps.autenticacion.utils.verificar_token', return_value=payload):
+            progreso = obtener_progreso_opcional(request)
+            obtener_progreso_opcional(request)
+
+        self.assertEqual(progreso.leccionesCompletadas, [1, 2])
+        self.assertEqual(progreso.nivelesCompletados, [])
+        self.assertEqual(progreso.nivelActual, 2)
+        self.assertEqual(len(self.coleccion.filtros), 1)
+
+
+class UsuarioLigeroTest(SimpleTestCase):
+    """Tests para la vista ligera del usuario"""
+
+    def setUp(self):
+        self.db = mock.Mock()
+        patcher = mock.patch('mongoengine.connection.get_db', return_value=self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.usuario_data = {
+            '_id': ObjectId(), 'email': 'a@b.com', 'nombre': 'Ana', 'password': 'x',
+            'tomin': 10, 'vidas': 3, 'leccionesCompletadas': [1], 'leccionActual': 2
+        }
+
+    def test_defaults_del_modelo(self):
+        """Test: Los campos ausentes toman los defaults de Usuario"""
+        usuario = UsuarioLigero(self.usuario_data)
+        self.assertEqual(usuario.rol, 'estudiante')
+        self.assertEqual(usuario.nivelesCompletados, [])
+        self.assertEqual(usuario.nivelActual, 1)
+        self.assertEqual(usuario.operaciones_actualizacion(), {})
+
+    def test_cambios_se_traducen_a_operadores(self):
+        """Test: Asignaciones -> $set, elementos agregados -> $addToSet"""
+        usuario = UsuarioLigero(self.usuario_data)
+        usuario.vidas = 5
+        usuario._agregar_a_lista('leccionesCompletadas', 2)
+        usuario._sincronizar_campo('tomin', 15)
+
+        self.assertEqual(usuario.operaciones_actualizacion(), {
+            '$set': {'vidas': 5},
+            '$addToSet': {'leccionesCompletadas': {'$each': [2]}}
+        })
+        # El documento original no se modifica
+        self.assertEqual(self.usuario_data['leccionesCompletadas'], [1])
+
+        usuario.save()
+        self.db.usuarios.update_one.assert_called_once()
+        self.assertEqual(usuario.operaciones_actualizacion(), {})
+
+    def test_completar_leccion_avanza_prefijo_contiguo(self):
+        """Test: Completar cierra el hueco y el prefijo se guarda con $max"""
+        self.usuario_data['leccionesCompletadas'] = [1, 3, 4]
+        self.usuario_data['progresoContiguo'] = 1
+        self.db.usuarios.find_one_and_update.return_value = {'tomin': 15}
+        usuario = UsuarioLigero(self.usuario_data)
+        self.assertFalse(usuario.indice_progreso.bloqueada(3))
+        self.assertTrue(usuario.indice_progreso.bloqueada(5))
+
+        usuario.completar_leccion(2, 5)
+
+        operaciones = self.db.usuarios.update_one.call_args[0][1]
+        self.assertEqual(operaciones['$max'], {'progresoContiguo': 4})
+        self.assertEqual(operaciones['$addToSet'], {'leccionesCompletadas': {'$each': [2]}})
+        self.assertFalse(usuario.indice_progreso.bloqueada(5))
+
+    def test_update_profile_valida_nombre(self):
+        """Test: El nombre se valida antes del $set (sin validación de mongoengine)"""
+        from rest_framework.test import APIRequestFactory
+        from apps.autenticacion.views import update_profile
+        usuario = UsuarioLigero(self.usuario_data)
+
+        def actualizar(nombre):
+            request = APIRequestFactory().put('/api/auth/profile/', {'nombre': nombre}, format='json')
+            with mock.patch('apps.autenticacion.utils.extraer_token_de_request', return_value='t'), \
+                    mock.patch('apps.autenticacion.utils.resolver_usuario', return_value=usuario):
+                return update_profile(request)
+
+        for invalido in ('x' * 101, {'$ne': ''}, ['Ana'], '   '):
+            self.assertEqual(actualizar(invalido).status_code, 400)
+        self.db.usuarios.update_one.assert_not_called()
+
+        self.assertEqual(actualizar('  Ana María ').status_code, 200)
+        operaciones = self.db.usuarios.update_one.call_args[0][1]
+        self.assertEqual(operaciones['$set'], {'nombre': 'Ana María'})
+
+
+class IndiceProgresoTest(SimpleTestCase):
+    """Tests del índice de progreso de lecciones"""
+
+    def test_bloqueo_equivalente_al_recorrido_lineal(self):
+        """Test: Mismo resultado que revisar todas las lecciones anteriores"""
+        completadas = [1, 2, 3, 5, 8]
+        indice = IndiceProgreso(completadas)
+        self.assertEqual(indice.prefijo, 3)
+
+        for leccion_id in range(1, 12):
+            esperado = leccion_id not in completadas and not all(
+                lid in completadas for lid in range(1, leccion_id)
+            )
+            self.assertEqual(indice.bloqueada(leccion_id), esperado, leccion_id)
+
+        self.assertEqual(indice.faltantes(9), [4, 6, 7])
+        self.assertEqual(indice.faltantes(4), [])
+
+    def test_prefijo_almacenado_se_extiende(self):
+        """Test: El prefijo guardado es el punto de partida (usuarios sin backfill parten de 0)"""
+        self.assertEqual(IndiceProgreso([1, 2, 3, 4], prefijo=2).prefijo, 4)
+        self.assertEqual(IndiceProgreso([2, 3], prefijo=None).prefijo, 0)
+
+
+@override_settings(BCRYPT_ROUNDS=4)
+class PoolContrasenasTest(SimpleTestCase):
+    """Tests para el pool acotado de bcrypt"""
+
+    def test_hashear_y_verificar(self):
+        """Test: El hash usa BCRYPT_ROUNDS y se verifica en el pool"""
+        pool = PoolContrasenas(workers=1, max_pendientes=1)
+        hashed = pool.hashear('Contraseña-Segura-1')
+
+        self.assertEqual(rondas_de_hash(hashed), 4)
+        self.assertTrue(pool.verificar('Contraseña-Segura-1', hashed))
+        self.assertFalse(pool.verificar('otra', hashed))
+        self.assertFalse(pool.necesita_rehash(hashed))
+
+    def test_rechazo_inmediato_si_esta_saturado(self):
+        """Test: Sin cupo en la cola se lanza PoolContrasenasSaturado"""
+        pool = PoolContrasenas(workers=1, max_pendientes=0)
+        liberar = threading.Event()
+        futuro = pool.enviar(liberar.wait)
+
+        with self.assertRaises(PoolContrasenasSaturado):
+            pool.hashear('x')
+        self.assertEqual(pool.estadisticas()['rechazadas'], 1)
+
+        liberar.set()
+        futuro.result()
+        pool.hashear('x')  # El cupo se liberó
+
+    def test_create_test_user_saturado_responde_503(self):
+        """Test: create_test_user rechaza con 503 y Retry-After, como register y login"""
+        from rest_framework.test import APIRequestFactory
+        from apps.autenticacion.views import create_test_user
+        request = APIRequestFactory().post(
+            '/api/auth/create-test-user/',
+            {'email': 'a@b.com', 'nombre': 'Ana', 'password': 'Password-Segura-123'}, format='json'
+        )
+
+        with mock.patch('apps.autenticacion.views.Usuario') as usuario_cls:
+            usuario_cls.objects.return_value.first.return_value = None
+            usuario_cls.return_value.set_password.side_effect = PoolContrasenasSaturado(retry_after=3)
+            response = create_test_user(request)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '3')
+        usuario_cls.return_value.save.assert_not_called()
+
+    def test_rehash_con_costo_distinto(self):
+        """Test: Un hash con otro costo se recalcula condicionado al hash anterior"""
+        pool = PoolContrasenas(workers=1, max_pendientes=1)
+        db = mock.Mock()
+        viejo = '$2b$05$' + 'a' * 53
+
+        with mock.patch('mongoengine.connection.get_db', return_value=db):
+            self.assertTrue(pool.rehashear_si_necesario('id', 'x', viejo))
+            pool._executor.shutdown(wait=True)
+
+        filtro, operaciones = db.usuarios.update_one.call_args[0]
+        self.assertEqual(filtro, {'_id': 'id', 'password': viejo})
+        self.assertEqual(rondas_de_hash(operaciones['$set']['password']), 4)
+
+
+class CacheTokensTest(SimpleTestCase):
+    """Tests para la cache LRU de tokens verificados"""
+
+    def setUp(self):
+        self.ahora = 1000.0
+        self.cache = CacheTokens(capacidad=2, reloj=lambda: self.ahora)
+
+    def test_lru_y_tasa_de_aciertos(self):
+        """Test: Se expulsa el token usado hace más tiempo"""
+        self.cache.guardar('a', {'user_id': '1', 'exp': 2000})
+        self.cache.guardar('b', {'user_id': '2', 'exp': 2000})
+        self.assertEqual(self.cache.obtener('a')['user_id'], '1')
+        self.cache.guardar('c', {'user_id': '3', 'exp': 2000})
+
+        self.assertIsNone(self.cache.obtener('b'))
+        self.assertIsNotNone(self.cache.obtener('a'))
+        estadisticas = self.cache.estadisticas()
+        self.assertEqual(estadisticas['expulsiones'], 1)
+        self.assertEqual(estadisticas['tasa_aciertos'], round(2 / 3, 4))
+
+    def test_token_expirado_no_se_sirve(self):
+        """Test: Un token expirado vuelve a pasar por jwt.decode"""
+        self.cache.guardar('a', {'exp': 1001})
+        self.ahora = 1001
+        self.assertIsNone(self.cache.obtener('a'))
+        self.assertEqual(self.cache.estadisticas()['entradas'], 0)
+
+    def test_revocacion_aplica_a_tokens_en_cache(self):
+        """Test: Un token en cache revocado después se rechaza"""
+        cache_revocacion = CacheRevocacion(intervalo_segundos=60)
+        db = mock.Mock(tokens_blacklist=ColeccionFalsa([]), tokens_epocas=ColeccionFalsa([]))
+        token = jwt.encode({
+            'user_id': 'u1', 'jti': 'abc', 'exp': datetime.utcnow() + timedelta(minutes=5)
+        }, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+        with mock.patch('mongoengine.connection.get_db', return_value=db), \
+                mock.patch('apps.autenticacion.revocation_cache.cache_revocacion', cache_revocacion), \
+                mock.patch('apps.autenticacion.utils.cache_tokens', CacheTokens(capacidad=10)) as cache:
+            verificar_token(token)
+            verificar_token(token)
+            self.assertEqual(cache.aciertos, 1)
+
+            cache_revocacion.registrar('abc', datetime.utcnow() + timedelta(minutes=5))
+            with self.assertRaisesMessage(jwt.InvalidTokenError, 'Token revocado'):
+                verificar_token(token)
+
+
+class MotorRateLimitTest(SimpleTestCase):
+    """Tests del motor de rate limiting con el backend en memoria"""
+
+    def setUp(self):
+        self.ahora = 600.0
+        self.backend = BackendMemoria()
+        self.motor = MotorRateLimit(backend=self.backend, reloj=lambda: self.ahora)
+        self.limite = Limite('login', cantidad=3, periodo=60, clave='ip', metodos=['POST'])
+
+    def test_rechaza_al_superar_el_limite(self):
+        """Test: La cuarta petición de la ventana se rechaza con Retry-After"""
+        resultados = [self.motor.consumir(self.limite, 'ip:1') for _ in range(4)]
+
+        self.assertTrue(all(r.permitido for r in resultados[:3]))
+        self.assertEqual(resultados[2].restantes, 0)
+        self.assertFalse(resultados[3].permitido)
+        self.assertEqual(resultados[3].headers()['Retry-After'], '60')
+        self.assertEqual(resultados[3].headers()['RateLimit-Policy'], '3;w=60')
+
+        # Otra clave no se ve afectada
+        self.assertTrue(self.motor.consumir(self.limite, 'ip:2').permitido)
+
+    def test_ventana_deslizante_pondera_la_anterior(self):
+        """Test: A mitad de la ventana siguiente cuenta la mitad de la anterior"""
+        for _ in range(3):
+            self.motor.consumir(self.limite, 'ip:1')
+
+        self.ahora = 690.0  # Mitad de la siguiente ventana: 3 * 0.5 = 1.5 estimadas
+        self.assertTrue(self.motor.consumir(self.limite, 'ip:1').permitido)
+        resultado = self.motor.consumir(self.limite, 'ip:1')
+        self.assertFalse(resultado.permitido)
+        # 2 + 3 * (1 - t/60) <= 3  =>  t >= 40 (es decir, en 700)
+        self.assertEqual(resultado.retry_after, 10)
+
+    def test_nivel_previo_no_consulta_el_backend(self):
+        """Test: Una clave bloqueada se rechaza sin tocar el almacén"""
+        for _ in range(4):
+            self.motor.consumir(self.limite, 'ip:1')
+        consultas = self.motor.consultas_backend
+
+        self.assertFalse(self.motor.consumir(self.limite, 'ip:1').permitido)
+        self.assertEqual(self.motor.consultas_backend, consultas)
+        self.assertEqual(self.motor.estadisticas()['rechazos_locales'], 1)
+
+    def test_contador_compartido_entre_workers(self):
+        """Test: Dos motores sobre el mismo almacén comparten el límite"""
+        otro_worker = MotorRateLimit(backend=self.backend, reloj=lambda: self.ahora)
+        self.motor.consumir(self.limite, 'ip:1')
+        self.motor.consumir(self.limite, 'ip:1')
+        otro_worker.consumir(self.limite, 'ip:1')
+
+        self.assertFalse(otro_worker.consumir(self.limite, 'ip:1').permitido)
+
+    def test_falla_abierto_si_el_almacen_falla(self):
+        """Test: Un error del almacén no bloquea la petición"""
+        backend = mock.Mock()
+        backend.incrementar.side_effect = ConnectionError('sin conexión')
+        motor = MotorRateLimit(backend=backend)
+
+        with self.assertLogs('security', level='WARNING'):
+            self.assertTrue(motor.consumir(self.limite, 'ip:1').permitido)
+        self.assertEqual(motor.errores_backend, 1)
+
+    def test_decorador_agrega_headers(self):
+        """Test: La vista decorada responde 429 al exceder y expone RateLimit-*"""
+        from rest_framework.response import Response
+
+        vista = limitar(self.limite)(lambda request: Response({'status': 'success'}))
+        factory = RequestFactory()
+
+        with mock.patch('apps.autenticacion.rate_limit_decorators.motor_rate_limit', self.motor):
+            self.assertNotIn('RateLimit-Limit', vista(factory.get('/')))  # GET no se limita
+            respuestas = [vista(factory.post('/')) for _ in range(4)]
+
+        self.assertEqual(respuestas[0]['RateLimit-Remaining'], '2')
+        self.assertEqual(respuestas[3].status_code, 429)
+        self.assertEqual(respuestas[3]['Retry-After'], '60')
+
+
+class BlacklistMantenimientoTest(SimpleTestCase):
+    """Tests del índice TTL y las estadísticas de la blacklist"""
+
+    def setUp(self):
+        self.coleccion = mock.Mock()
+        patcher = mock.patch.object(TokenBlacklist, '_get_collection', return_value=self.coleccion)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, TokenBlacklist, '_indice_ttl_verificado', False)
+
+    def test_reemplaza_indice_simple_por_ttl(self):
+        """Test: El índice simple anterior sobre expira_en se convierte en TTL"""
+        self.coleccion.index_information.return_value = {
+            '_id_': {'key': [('_id', 1)]},
+            'expira_en_1': {'key': [('expira_en', 1)]},
+        }
+
+        self.assertTrue(TokenBlacklist.asegurar_indice_ttl())
+        self.coleccion.drop_index.assert_called_once_with('expira_en_1')
+        self.coleccion.create_index.assert_called_once_with('expira_en', expireAfterSeconds=0)
+
+    def test_indice_ttl_existente_no_se_toca(self):
+        """Test: Si el índice TTL ya existe no se recrea"""
+        self.coleccion.index_information.return_value = {
+            'expira_en_1': {'key': [('expira_en', 1)], 'expireAfterSeconds': 0},
+        }
+
+        self.assertFalse(TokenBlacklist.asegurar_indice_ttl())
+        self.coleccion.drop_index.assert_not_called()
+        self.coleccion.create_index.assert_not_called()
+
+    def test_estadisticas_en_una_agregacion(self):
+        """Test: Total, activos y conteo por razón salen de un solo $facet"""
+        db = mock.Mock()
+        db.tokens_blacklist.aggregate.return_value = iter([{
+            'total': [{'n': 7}],
+            'activos': [{'n': 3}],
+            'por_razon': [{'_id': 'logout', 'n': 6}, {'_id': 'compromiso', 'n': 1}],
+        }])
+
+        with mock.patch('mongoengine.connection.get_db', return_value=db):
+            estadisticas = TokenBlacklist.estadisticas()
+
+        self.assertEqual(estadisticas, {
+            'total': 7, 'activos': 3, 'expirados': 4,
+            'por_razon': {'logout': 6, 'compromiso': 1}
+        })
+        db.tokens_blacklist.aggregate.assert_called_once()
+        db.tokens_blacklist.count_documents.assert_not_called()
+
+    def test_estadisticas_coleccion_vacia(self):
+        """Test: Sin documentos $count no devuelve nada y se reporta 0"""
+        db = mock.Mock()
+        db.tokens_blacklist.aggregate.return_value = iter([
+            {'total': [], 'activos': [], 'por_razon': []}
+        ])
+
+        with mock.patch('mongoengine.connection.get_db', return_value=db):
+            estadisticas = TokenBlacklist.estadisticas()
+
+        self.assertEqual(estadisticas['total'], 0)
+        self.assertEqual(estadisticas['por_razon'], {})
+
+
+class EtagsTest(SimpleTestCase):
+    """Tests de ETags y respuestas 304"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.etag = calcular_etag('lecciones', 3, None)
+
+    def test_etag_estable_y_sensible_a_cambios(self):
+        """Test: Mismas partes, mismo ETag; cualquier cambio lo modifica"""
+        self.assertEqual(self.etag, calcular_etag('lecciones', 3, None))
+        self.assertNotEqual(self.etag, calcular_etag('lecciones', 4, None))
+
+        progreso = mock.Mock(id='u1', progresoContiguo=2, leccionesCompletadas=[1, 2],
+                             nivelesCompletados=[], nivelActual=1)
+        antes = calcular_etag('lecciones', 3, huella_progreso(progreso))
+        progreso.leccionesCompletadas = [1, 2, 4]
+        self.assertNotEqual(antes, calcular_etag('lecciones', 3, huella_progreso(progreso)))
+
+    def test_304_sin_construir(self):
+        """Test: Con If-None-Match coincidente no se construye la respuesta"""
+        construir = mock.Mock()
+        for encabezado in (self.etag, f'"otro", W/{self.etag}', '*'):
+            request = self.factory.get('/api/lecciones/', HTTP_IF_NONE_MATCH=encabezado)
+
+            response = responder_con_etag(request, self.etag, construir)
+
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], self.etag)
+        construir.assert_not_called()
+
+    def test_200_con_etag(self):
+        """Test: Sin coincidencia se responde completo con ETag y Vary"""
+        from django.http import HttpResponse
+        request = self.factory.get('/api/lecciones/', HTTP_IF_NONE_MATCH='"anterior"')
+
+        response = responder_con_etag(request, self.etag, lambda: HttpResponse(b'[]'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertIn('Authorization', response['Vary'])
+        # El formato (JSON o MessagePack) también depende de Accept
+        self.assertIn('Accept', response['Vary'])
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_errores_sin_etag(self):
+        """Test: Las respuestas de error no se etiquetan"""
+        from django.http import HttpResponse
+        request = self.factory.get('/api/lecciones/')
+
+        response = responder_con_etag(request, self.etag, lambda: HttpResponse(status=404))
+
+        self.assertNotIn('ETag', response)
+
+
+class RenderizadorJSONTest(SimpleTestCase):
+    """Tests del renderer JSON con orjson"""
+
+    def test_mismo_json_que_drf(self):
+        """Test: Misma salida que el JSONRenderer de DRF (compacto, UTF-8)"""
+        from rest_framework.renderers import JSONRenderer
+        datos = [{'titulo': 'Niltze', 'español': 'Hola ñ', 'tomins': 5, 'bloqueada': False,
+                  'audio': None, 'palabras': [{'a': 1}]}]
+
+        self.assertEqual(RenderizadorJSON().render(datos), JSONRenderer().render(datos))
+        self.assertEqual(RenderizadorJSON().render(None), b'')
+
+    def test_mismo_json_que_drf_en_casos_especiales(self):
+        """Test: Claves no str, fechas con zona y tipos convertidos como en DRF"""
+        import decimal
+        from datetime import timezone
+        from rest_framework.renderers import JSONRenderer
+        datos = {
+            'por_razon': {None: 2, 'leccion': 5},
+            'por_dia': {1: 3, 2: 0},
+            'utc': datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+            'offset': datetime(2024, 5, 1, 12, 30, tzinfo=timezone(timedelta(hours=-6))),
+            'micro': datetime(2024, 5, 1, 12, 30, 0, 123456),
+            'dia': datetime(2024, 5, 1).date(),
+            'duracion': timedelta(minutes=90),
+            'decimal': decimal.Decimal('1.5'),
+        }
+
+        self.assertEqual(RenderizadorJSON().render(datos), JSONRenderer().render(datos))
+
+    def test_fechas_y_object_id(self):
+        """Test: datetime en ISO 8601 y ObjectId como texto"""
+        import json
+        oid = ObjectId()
+        fecha = datetime(2024, 5, 1, 12, 30)
+
+        datos = json.loads(codificar_json({'id': oid, 'fecha': fecha}))
+
+        self.assertEqual(datos, {'id': str(oid), 'fecha': '2024-05-01T12:30:00'})
+        with self.assertRaises(TypeError):
+            codificar_json({'x': object()})
+
+    def test_renderers_configurados(self):
+        """Test: orjson primero; la API navegable solo con DEBUG"""
+        renderers = settings.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']
+        # El runner de tests fuerza DEBUG=False; settings lo leyó del entorno
+        debug = os.getenv('DEBUG', 'True') == 'True'
+
+        self.assertEqual(renderers[0], 'apps.autenticacion.renderers.RenderizadorJSON')
+        self.assertNotIn('rest_framework.renderers.JSONRenderer', renderers)
+        self.assertEqual(
+            'rest_framework.renderers.BrowsableAPIRenderer' in renderers, debug
+        )
@@ -0,0 +1,148 @@
+"""
+Cache LRU (por worker) de tokens JWT ya verificados.
+
+RENDIMIENTO: Un cliente que consulta /api/vidas/estado/ cada pocos segundos
+envía el mismo access token decenas de veces por minuto, y cada petición
+repetía la verificación HMAC de jwt.decode. Esta cache asocia el digest
+SHA-256 del token con su payload ya verificado y su expiración, de modo que
+verificar un token conocido es una búsqueda en un diccionario.
+
+Revocación:
+    La cache solo evita la verificación criptográfica. La blacklist (jti) y
+    la época de tokens del usuario se siguen comprobando en cada petición
+    (en memoria, ver revocation_cache), así que un token revocado se rechaza
+    aunque esté en la cache. Logout además descarta la entrada.
+
+Uso:
+    from apps.autenticacion.token_cache import cache_tokens
+
+    payload = cache_tokens.obtener(token)
+    if payload is None:
+        payload = jwt.decode(...)
+        cache_tokens.guardar(token, payload)
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+
+
+class CacheTokens:
+    """
+    LRU acotada de digest(token) -> (payload, exp).
+
+    Solo se guardan claves derivadas del token (no el token en claro).
+
+    Atributos de métricas:
+        aciertos (int): Verificaciones resueltas desde la cache
+        fallos (int): Verificaciones que requirieron jwt.decode
+        expulsiones (int): Entradas descartadas por capacidad
+    """
+
+    def __init__(self, capacidad: int = None, reloj=time.time):
+        self._capacidad = capacidad
+        self._reloj = reloj
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    @property
+    def capacidad(self) -> int:
+        """Máximo de tokens en cache (0 desactiva la cache)."""
+        if self._capacidad is not None:
+            return self._capacidad
+        return getattr(settings, 'JWT_TOKEN_CACHE_TAMANO', 10000)
+
+    @staticmethod
+    def _clave(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def obtener(self, token: str):
+        """
+        Retorna el payload verificado del token si está en cache y no expiró.
+
+        Args:
+            token (str): Token JWT
+
+        Returns:
+            dict: Copia del payload verificado
+            None: Si no está en cache (o expiró)
+        """
+        if self.capacidad <= 0:
+            return None
+
+        clave = self._clave(token)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+
+            payload, exp = entrada
+            if exp is not None and exp <= self._reloj():
+                # Expiró: jwt.decode debe producir el error correspondiente
+                del self._entradas[clave]
+                self.fallos += 1
+                return None
+
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+
+        return dict(payload)
+
+    def guardar(self, token: str, payload: dict) -> None:
+        """
+        Guarda el payload de un token recién verificado.
+
+        Args:
+            token (str): Token JWT
+            payload (dict): Payload devuelto por jwt.decode
+        """
+        capacidad = self.capacidad
+        if capacidad <= 0:
+            return
+
+        clave = self._clave(token)
+        with self._lock:
+            self._entradas[clave] = (dict(payload), payload.get('exp'))
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > capacidad:
+                self._entradas.popitem(last=False)
+                self.expulsiones += 1
+
+    def descartar(self, token: str) -> None:
+        """Elimina un token de la cache (ej: al hacer logout)."""
+        with self._lock:
+            self._entradas.pop(self._clave(token), None)
+
+    def limpiar(self) -> None:
+        """Vacía la cache."""
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self) -> dict:
+        """
+        Métricas de la cache para operadores.
+
+        Returns:
+            dict: {habilitada, entradas, capacidad, aciertos, fallos,
+                   expulsiones, tasa_aciertos}
+        """
+        total = self.aciertos + self.fallos
+        return {
+            'habilitada': self.capacidad > 0,
+            'entradas': len(self._entradas),
+            'capacidad': self.capacidad,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'expulsiones': self.expulsiones,
+            'tasa_aciertos': round(self.aciertos / total, 4) if total else None,
+        }
+
+
+# Instancia única por proceso (cada worker de gunicorn tiene la suya)
+cache_tokens = CacheTokens()
@@ -20,4 +20,13 @@ urlpatterns = [
     # Endpoints de usuario
     path('me/', views.me, name='me'),
     path('me/update/', views.update_profile, name='update_profile'),
+
+    # Endpoints de operación (solo admin)
+    path('admin/caches/', views.estado_caches, name='estado_caches'),
+    path('admin/blacklist/', views.estadisticas_blacklist, name='estadisticas_blacklist'),
+    path(
+        'admin/usuarios/<str:usuario_id>/revocar-sesiones/',
+        views.revocar_sesiones_usuario,
+        name='revocar_sesiones_usuario'
+    ),
 ]
@@ -8,9 +8,12 @@ from django.conf import settings
 from functools import wraps
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Usuario
+from .models import IndiceProgreso, obtener_indice_progreso
+from .read_models import UsuarioLigero
 from .security_utils import sanitizar_user_id
-from .blacklist_models import TokenBlacklist
+from .blacklist_models import TokenBlacklist, EpocaTokens
+from .request_context import obtener_contexto, obtener_documento
+from .token_cache import cache_tokens
 
 
 def generar_token(usuario_id: str) -> dict:
@@ -21,6 +24,7 @@ def generar_token(usuario_id: str) -> dict:
     - Access Token: 15 minutos (antes 24 horas) - para operaciones diarias
     - Refresh Token: 7 días - para renovar access tokens sin volver a autenticar
     - Cada token tiene su propio jti para blacklist individual
+    - Claim 'tev': época de tokens del usuario (revocación de todas sus sesiones)
 
     Args:
         usuario_id (str): ID del usuario en MongoDB
@@ -34,6 +38,9 @@ def generar_token(usuario_id: str) -> dict:
             'token_type': 'Bearer'
         }
     """
+    # SEGURIDAD: Época vigente; revocar_todos_usuario la incrementa
+    epoca = EpocaTokens.epoca_actual(str(usuario_id))
+
     # Generar Access Token (corto plazo - 15 minutos)
     access_jti = str(uuid.uuid4())
     access_exp = datetime.utcnow() + timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRATION_MINUTES)
@@ -42,6 +49,7 @@ def generar_token(usuario_id: str) -> dict:
         'user_id': str(usuario_id),
         'jti': access_jti,
         'token_type': 'access',  # NUEVO: Identificar tipo de token
+        'tev': epoca,
         'exp': access_exp,
         'iat': datetime.utcnow()
     }
@@ -60,6 +68,7 @@ def generar_token(usuario_id: str) -> dict:
         'user_id': str(usuario_id),
         'jti': refresh_jti,
         'token_type': 'refresh',  # NUEVO: Identificar tipo de token
+        'tev': epoca,
         'exp': refresh_exp,
         'iat': datetime.utcnow()
     }
@@ -86,7 +95,8 @@ def verificar_token(token: str) -> dict:
     Verifica y decodifica un token JWT, validando contra blacklist.
 
     SEGURIDAD: Valida que el token no haya sido revocado mediante el sistema
-    de blacklist, previniendo el uso de tokens después de logout.
+    de blacklist, previniendo el uso de tokens después de logout, ni por una
+    revocación de todas las sesiones del usuario (época de tokens).
 
     Args:
         token (str): Token JWT a verificar
@@ -99,18 +109,29 @@ def verificar_token(token: str) -> dict:
         jwt.InvalidTokenError: Si el token es inválido o está revocado
     """
     try:
-        # Decodificar token
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
+        # RENDIMIENTO: Un token ya verificado se toma de la cache LRU;
+        # las comprobaciones de revocación de abajo se aplican siempre
+        payload = cache_tokens.obtener(token)
+        if payload is None:
+            # Decodificar token
+            payload = jwt.decode(
+                token,
+                settings.JWT_SECRET,
+                algorithms=[settings.JWT_ALGORITHM]
+            )
+            cache_tokens.guardar(token, payload)
 
         # SEGURIDAD: Verificar si el token está en la blacklist
         jti = payload.get('jti')
         if jti and TokenBlacklist.esta_revocado(jti):
             raise jwt.InvalidTokenError('Token revocado')
 
+        # SEGURIDAD: Rechazar tokens emitidos antes de revocar todas las
+        # sesiones del usuario (tokens sin 'tev' pertenecen a la época 0)
+        user_id = payload.get('user_id')
+        if user_id and not EpocaTokens.token_vigente(user_id, payload.get('tev', 0)):
+            raise jwt.InvalidTokenError('Token revocado')
+
         return payload
 
     except jwt.ExpiredSignatureError:
@@ -134,7 +155,7 @@ def obtener_usuario_desde_token(token: str):
         token (str): Token JWT
 
     Returns:
-        Usuario: Instancia del usuario si existe
+        UsuarioLigero: Usuario decodificado del documento si existe
         None: Si no se encuentra el usuario
 
     Raises:
@@ -154,24 +175,129 @@ def obtener_usuario_desde_token(token: str):
         return None
 
     # Usar PyMongo directamente para evitar threading issues
-    from mongoengine.connection import get_db
+    # RENDIMIENTO: A través del mapa de identidad (una lectura por petición)
     from bson import ObjectId
 
-    db = get_db()
     try:
-        usuario_data = db.usuarios.find_one({'_id': ObjectId(user_id)})
+        usuario_data = obtener_documento('usuarios', ObjectId(user_id))
     except Exception:
         return None
 
     if not usuario_data:
         return None
 
-    # Reconstruir objeto Usuario
-    usuario_dict = {k: v for k, v in usuario_data.items() if k != '_id'}
-    usuario = Usuario(**usuario_dict)
-    usuario.id = usuario_data['_id']
+    # RENDIMIENTO: Vista ligera en lugar de reconstruir el Document
+    return UsuarioLigero(usuario_data)
+
+
+def resolver_usuario(token: str):
+    """
+    Resuelve el usuario autenticado una sola vez por petición.
+
+    RENDIMIENTO: Cuando una vista tiene @require_auth y @require_role, ambos
+    decoradores comparten el mismo resultado (decodificación JWT, blacklist
+    y lectura del usuario) gracias al contexto de la petición.
+
+    Args:
+        token (str): Token JWT extraído del request
+
+    Returns:
+        UsuarioLigero: Usuario autenticado o None si no existe
+
+    Raises:
+        jwt.ExpiredSignatureError: Si el token expiró
+        jwt.InvalidTokenError: Si el token es inválido
+    """
+    contexto = obtener_contexto()
+    if contexto is None:
+        return obtener_usuario_desde_token(token)
+
+    return contexto.resolver_una_vez(
+        ('usuario', token),
+        lambda: obtener_usuario_desde_token(token)
+    )
+
+
+# Campos de progreso que necesitan los endpoints públicos del catálogo
+CAMPOS_PROGRESO = {
+    'leccionesCompletadas': 1, 'progresoContiguo': 1, 'nivelesCompletados': 1, 'nivelActual': 1
+}
+
+
+class ProgresoUsuario:
+    """
+    Vista de solo lectura del progreso del usuario para los serializadores
+    del catálogo (no es un Document de mongoengine).
+
+    Atributos:
+        id (ObjectId): ID del usuario
+        leccionesCompletadas (list): IDs de lecciones completadas
+        progresoContiguo (int): Mayor lección N con 1..N completadas
+        nivelesCompletados (list): IDs de niveles completados
+        nivelActual (int): Nivel actual del usuario
+    """
+
+    __slots__ = (
+        'id', 'leccionesCompletadas', 'progresoContiguo', 'nivelesCompletados', 'nivelActual',
+        '_indice_progreso'
+    )
+
+    def __init__(self, usuario_data: dict):
+        self.id = usuario_data['_id']
+        self.leccionesCompletadas = usuario_data.get('leccionesCompletadas', [])
+        self.progresoContiguo = usuario_data.get('progresoContiguo', 0)
+        self.nivelesCompletados = usuario_data.get('nivelesCompletados', [])
+        self.nivelActual = usuario_data.get('nivelActual', 1)
+        self._indice_progreso = None
+
+    @property
+    def indice_progreso(self) -> IndiceProgreso:
+        """Índice O(1) de lecciones completadas/bloqueadas."""
+        return obtener_indice_progreso(self)
+
+
+def obtener_progreso_opcional(request):
+    """
+    Autenticación opcional para endpoints públicos del catálogo.
+
+    Lee el token de la cookie httpOnly o del header Authorization y trae de
+    MongoDB solo los campos de progreso (proyección), sin reconstruir un
+    Usuario. Un token ausente, inválido, expirado o revocado se trata como
+    petición anónima.
+
+    RENDIMIENTO: El resultado se resuelve una sola vez por petición y un
+    retorno None indica que la respuesta no depende del usuario.
+
+    Args:
+        request: Request de Django
+
+    Returns:
+        ProgresoUsuario: Progreso del usuario autenticado
+        None: Si la petición es anónima
+    """
+    from bson import ObjectId
+    from bson.errors import InvalidId
+
+    token = extraer_token_de_request(request)
+    if not token:
+        return None
+
+    def resolver():
+        try:
+            payload = verificar_token(token)
+            user_id = sanitizar_user_id(payload.get('user_id'))
+            usuario_data = obtener_documento(
+                'usuarios', ObjectId(user_id), proyeccion=CAMPOS_PROGRESO
+            )
+        except (jwt.InvalidTokenError, ValueError, InvalidId):
+            return None
+
+        return ProgresoUsuario(usuario_data) if usuario_data else None
 
-    return usuario
+    contexto = obtener_contexto()
+    if contexto is None:
+        return resolver()
+    return contexto.resolver_una_vez(('progreso', token), resolver)
 
 
 def extraer_token_de_header(request) -> str:
@@ -241,7 +367,7 @@ def require_auth(view_func):
             }, status=status.HTTP_401_UNAUTHORIZED)
 
         try:
-            usuario = obtener_usuario_desde_token(token)
+            usuario = resolver_usuario(token)
 
             if not usuario:
                 return Response({
@@ -313,7 +439,7 @@ def require_role(allowed_roles: list):
                 }, status=status.HTTP_401_UNAUTHORIZED)
 
             try:
-                usuario = obtener_usuario_desde_token(token)
+                usuario = resolver_usuario(token)
 
                 if not usuario:
                     return Response({
@@ -7,11 +7,15 @@ from rest_framework import status
 from mongoengine import connect
 from mongoengine.connection import get_db
 from .models import Usuario
-from .utils import generar_token, require_auth, serializar_usuario, validar_password_segura
-from .security_utils import sanitizar_email, validar_password_input
-from .error_handler import manejar_error_seguro, log_security_event, obtener_ip_cliente
+from .read_models import UsuarioLigero
+from .utils import generar_token, require_auth, require_role, serializar_usuario, validar_password_segura
+from .security_utils import sanitizar_email, validar_password_input, sanitizar_user_id, sanitizar_input_mongo
+from .error_handler import manejar_error_seguro, log_security_event, obtener_ip_cliente, crear_respuesta_servicio_saturado
+from .password_pool import pool_contrasenas, PoolContrasenasSaturado
 from .rate_limit_decorators import rate_limit_login, rate_limit_api
+from .etags import calcular_etag, responder_con_etag
 import re
+import jwt
 
 
 @api_view(['POST', 'GET'])
@@ -102,6 +106,9 @@ def create_test_user(request):
             }
         }, status=status.HTTP_201_CREATED)
 
+    except PoolContrasenasSaturado as e:
+        # RENDIMIENTO: Pool de bcrypt saturado - rechazo rápido
+        return crear_respuesta_servicio_saturado(request, e.retry_after)
     except Exception as e:
         return Response({
             'status': 'error',
@@ -228,6 +235,9 @@ def register(request):
 
         return response
 
+    except PoolContrasenasSaturado as e:
+        # RENDIMIENTO: Pool de bcrypt saturado - rechazo rápido
+        return crear_respuesta_servicio_saturado(request, e.retry_after)
     except ValueError as e:
         # Errores de validación - seguros de mostrar
         return Response({
@@ -307,11 +317,8 @@ def login(request):
                 'message': 'Credenciales inválidas'
             }, status=status.HTTP_401_UNAUTHORIZED)
 
-        # Reconstruir objeto Usuario desde los datos de MongoDB
-        # Remover _id para evitar conflicto con el campo id de Mongoengine
-        usuario_dict = {k: v for k, v in usuario_data.items() if k != '_id'}
-        usuario = Usuario(**usuario_dict)
-        usuario.id = usuario_data['_id']
+        # Vista ligera del usuario (sin reconstruir el Document)
+        usuario = UsuarioLigero(usuario_data)
 
         # Verificar contraseña
         if not usuario.check_password(password):
@@ -329,6 +336,9 @@ def login(request):
                 'message': 'Credenciales inválidas'
             }, status=status.HTTP_401_UNAUTHORIZED)
 
+        # Recalcular el hash en segundo plano si BCRYPT_ROUNDS cambió
+        pool_contrasenas.rehashear_si_necesario(usuario.id, password, usuario.password)
+
         # Generar token JWT
         token_data = generar_token(usuario.id)
 
@@ -375,6 +385,9 @@ def login(request):
 
         return response
 
+    except PoolContrasenasSaturado as e:
+        # RENDIMIENTO: Pool de bcrypt saturado - rechazo rápido
+        return crear_respuesta_servicio_saturado(request, e.retry_after)
     except ValueError as e:
         # Errores de validación - seguros de mostrar
         return Response({
@@ -417,6 +430,7 @@ def logout(request):
         # Obtener el token del header
         from .utils import extraer_token_de_header, decodificar_token
         from .blacklist_models import TokenBlacklist
+        from .token_cache import cache_tokens
         from datetime import datetime
 
         token = extraer_token_de_header(request)
@@ -440,6 +454,9 @@ def logout(request):
                         expira_en=expira_en,
                         razon='logout'
                     )
+
+                # Descartar el payload verificado de la cache de tokens
+                cache_tokens.descartar(token)
             except Exception:
                 # Si hay error al procesar el token, continuar con logout
                 # (no queremos bloquear logout por error en blacklist)
@@ -577,10 +594,20 @@ def me(request):
         # El usuario ya está en request.user gracias al decorador @require_auth
         usuario = request.user
 
-        return Response({
+        # Las vidas regeneradas forman parte de la respuesta (y del ETag)
+        usuario.regenerar_vidas()
+
+        # RENDIMIENTO: 304 si el cliente ya tiene estos datos
+        etag = calcular_etag(
+            'me', str(usuario.id), usuario.email, usuario.nombre, usuario.rol, usuario.tomin,
+            usuario.vidas, usuario.leccionActual, tuple(usuario.leccionesCompletadas),
+            usuario.createdAt, request.accepted_media_type
+        )
+
+        return responder_con_etag(request, etag, lambda: Response({
             'status': 'success',
             'user': serializar_usuario(usuario)
-        }, status=status.HTTP_200_OK)
+        }, status=status.HTTP_200_OK))
 
     except Exception as e:
         return Response({
@@ -611,7 +638,23 @@ def update_profile(request):
         nombre = request.data.get('nombre')
 
         # Actualizar nombre si se proporciona
-        if nombre:
+        if nombre is not None:
+            # SEGURIDAD: UsuarioLigero.save() escribe un $set sin la validación
+            # de mongoengine; se aplican aquí las reglas de Usuario.nombre
+            try:
+                nombre = sanitizar_input_mongo(nombre, tipo_esperado=str, max_length=100,
+                                               campo_nombre='nombre')
+            except ValueError as e:
+                return Response({
+                    'status': 'error',
+                    'message': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if not nombre:
+                return Response({
+                    'status': 'error',
+                    'message': 'El nombre no puede estar vacío'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
             usuario.nombre = nombre
             usuario.save()
 
@@ -626,3 +669,122 @@ def update_profile(request):
             'status': 'error',
             'message': f'Error al actualizar perfil: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@require_auth
+@require_role(['admin'])  # SEGURIDAD: Solo admin puede revocar sesiones de otros usuarios
+def revocar_sesiones_usuario(request, usuario_id):
+    """
+    Revoca todas las sesiones (access y refresh tokens) de un usuario.
+
+    Incrementa la época de tokens del usuario con una sola escritura; los
+    tokens emitidos antes dejan de aceptarse (en otros workers, tras como
+    máximo JWT_BLACKLIST_CACHE_SEGUNDOS).
+
+    Body:
+        {
+            "razon": "admin_revoke" | "compromiso" | "password_change" (opcional)
+        }
+
+    Returns:
+        JSON con la nueva época de tokens del usuario
+    """
+    from .blacklist_models import TokenBlacklist
+
+    try:
+        usuario_id = sanitizar_user_id(usuario_id)
+    except ValueError as e:
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    razon = request.data.get('razon', 'admin_revoke')
+    if razon not in ['admin_revoke', 'compromiso', 'password_change']:
+        return Response({
+            'status': 'error',
+            'message': 'Razón debe ser: admin_revoke, compromiso o password_change'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        epoca = TokenBlacklist.revocar_todos_usuario(usuario_id, razon=razon)
+    except Exception as e:
+        return manejar_error_seguro(
+            e,
+            'Error al revocar sesiones. Por favor intenta nuevamente.',
+            contexto=f'Error en revocar_sesiones_usuario() - Usuario: {usuario_id}'
+        )
+
+    log_security_event(
+        'USER_SESSIONS_REVOKED',
+        user_id=usuario_id,
+        ip_address=obtener_ip_cliente(request),
+        details=f'Sesiones revocadas por {request.user.email} ({razon}), época {epoca}',
+        severity='WARNING'
+    )
+
+    return Response({
+        'status': 'success',
+        'message': 'Sesiones del usuario revocadas',
+        'epoca': epoca
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@require_auth
+@require_role(['admin'])  # SEGURIDAD: Solo admin puede ver métricas internas
+def estado_caches(request):
+    """
+    Retorna métricas de las caches en memoria de este worker.
+
+    Útil para operadores: aciertos/fallos, tamaño y antigüedad de cada cache
+    (ventana máxima de datos desactualizados).
+
+    Returns:
+        JSON con las estadísticas de cada cache
+    """
+    from .revocation_cache import cache_revocacion
+    from .token_cache import cache_tokens
+    from .rate_limit_engine import motor_rate_limit
+    from apps.lecciones.catalogo import catalogo
+
+    return Response({
+        'status': 'success',
+        'caches': {
+            'revocacion': cache_revocacion.estadisticas(),
+            'tokens': cache_tokens.estadisticas(),
+            'rate_limit': motor_rate_limit.estadisticas(),
+            'catalogo': catalogo.estadisticas(),
+        }
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@require_auth
+@require_role(['admin'])  # SEGURIDAD: Solo admin puede ver métricas internas
+def estadisticas_blacklist(request):
+    """
+    GET /api/auth/admin/blacklist/
+
+    Retorna el total de tokens en la blacklist, cuántos siguen activos y el
+    conteo por razón de revocación (una sola agregación en MongoDB).
+
+    Returns:
+        JSON con las estadísticas de la blacklist
+    """
+    from .blacklist_models import TokenBlacklist
+
+    try:
+        estadisticas = TokenBlacklist.estadisticas()
+    except Exception as e:
+        return manejar_error_seguro(
+            e,
+            'Error al obtener estadísticas. Por favor intenta nuevamente.',
+            contexto='Error en estadisticas_blacklist()'
+        )
+
+    return Response({
+        'status': 'success',
+        'blacklist': estadisticas
+    }, status=status.HTTP_200_OK)
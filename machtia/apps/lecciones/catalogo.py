@@ -0,0 +1,292 @@
+"""
+Cache en memoria (por worker) del catálogo de lecciones y niveles.
+
+RENDIMIENTO: Las lecciones y niveles solo cambian cuando un admin usa los
+endpoints de creación/actualización/eliminación o se ejecuta un seed, pero
+cada listado, detalle o completado de lección los leía de MongoDB. Este
+módulo mantiene el catálogo completo en memoria y lo sirve sin ir a la base
+de datos.
+
+Invalidación entre workers:
+    La colección `catalogo_version` guarda un único documento
+    {_id: 'catalogo', version: N}. Cada escritura del catálogo incrementa N
+    (ver invalidar). Cada worker compara su versión con la de MongoDB como
+    máximo una vez cada CATALOGO_VERIFICACION_SEGUNDOS y, si cambió, recarga
+    el catálogo completo. Ese intervalo es la ventana máxima en la que otro
+    worker puede servir una lección desactualizada; el worker que hizo la
+    escritura la ve de inmediato.
+
+Los documentos devueltos son compartidos entre peticiones: se deben tratar
+como de solo lectura.
+
+Uso:
+    from apps.lecciones.catalogo import catalogo
+
+    leccion_data = catalogo.leccion(3)
+    lecciones = catalogo.lecciones(nivel_id=1)
+
+    # Tras modificar lecciones o niveles
+    catalogo.invalidar()
+"""
+import threading
+import time
+from django.conf import settings
+
+ID_VERSION = 'catalogo'
+
+
+class _Contenido:
+    """Snapshot inmutable del catálogo (se reemplaza completo al recargar)."""
+
+    __slots__ = (
+        'version', 'lecciones', 'por_id', 'por_nivel', 'niveles', 'niveles_por_id',
+        'palabras_por_leccion', 'derivados'
+    )
+
+    def __init__(self, version: int, lecciones: list, niveles: list):
+        self.version = version
+        self.lecciones = lecciones
+        self.por_id = {leccion['_id']: leccion for leccion in lecciones}
+        self.por_nivel = {}
+        for leccion in lecciones:
+            self.por_nivel.setdefault(leccion.get('nivel_id', 1), []).append(leccion)
+        self.niveles = niveles
+        self.niveles_por_id = {nivel['_id']: nivel for nivel in niveles}
+        self.palabras_por_leccion = {
+            leccion['_id']: len(leccion.get('palabras') or []) for leccion in lecciones
+        }
+        # Valores calculados a partir de esta versión (ver CatalogoLecciones.derivado)
+        self.derivados = {}
+
+    def filtrar(self, dificultad: str = None, tema: str = None, nivel_id: int = None) -> list:
+        """Lecciones de este snapshot con los filtros de igualdad indicados."""
+        lecciones = self.lecciones if nivel_id is None else self.por_nivel.get(nivel_id, [])
+        if dificultad is not None:
+            lecciones = [l for l in lecciones if l.get('dificultad') == dificultad]
+        if tema is not None:
+            lecciones = [l for l in lecciones if l.get('tema') == tema]
+        return list(lecciones)
+
+
+class CatalogoLecciones:
+    """
+    Catálogo de lecciones y niveles versionado.
+
+    Atributos de métricas:
+        recargas (int): Veces que se leyó el catálogo completo de MongoDB
+        verificaciones (int): Lecturas del documento de versión
+    """
+
+    def __init__(self, intervalo_segundos: float = None, reloj=time.monotonic):
+        self._intervalo = intervalo_segundos
+        self._reloj = reloj
+        self._contenido = None
+        self._verificado_en = None
+        self._lock = threading.Lock()
+
+        self.recargas = 0
+        self.verificaciones = 0
+
+    @property
+    def intervalo(self) -> float:
+        """Segundos entre verificaciones de la versión en MongoDB."""
+        if self._intervalo is not None:
+            return self._intervalo
+        return getattr(settings, 'CATALOGO_VERIFICACION_SEGUNDOS', 5)
+
+    @staticmethod
+    def _db():
+        from mongoengine.connection import get_db
+        return get_db()
+
+    def _version_actual(self, db) -> int:
+        self.verificaciones += 1
+        documento = db.catalogo_version.find_one({'_id': ID_VERSION}, {'version': 1})
+        return documento['version'] if documento else 0
+
+    def _vigente(self) -> _Contenido:
+        """Retorna el catálogo, recargándolo si otro worker lo modificó."""
+        contenido = self._contenido
+        ahora = self._reloj()
+        if (contenido is not None and self._verificado_en is not None
+                and ahora - self._verificado_en < self.intervalo):
+            return contenido
+
+        with self._lock:
+            # Otro hilo pudo verificar mientras se esperaba el lock
+            if (self._contenido is not None and self._verificado_en is not None
+                    and ahora - self._verificado_en < self.intervalo):
+                return self._contenido
+
+            db = self._db()
+            # La versión se lee antes que los datos: si una escritura ocurre
+            # entre ambas lecturas, la siguiente verificación volverá a recargar
+            version = self._version_actual(db)
+            if self._contenido is None or self._contenido.version != version:
+                self._contenido = _Contenido(
+                    version,
+                    list(db.lecciones.find({}).sort('_id', 1)),
+                    list(db.niveles.find({}).sort('_id', 1))
+                )
+                self.recargas += 1
+            self._verificado_en = ahora
+            return self._contenido
+
+    # ------------------------------------------------------------------
+    # Lecturas
+    # ------------------------------------------------------------------
+
+    def lecciones(self, dificultad: str = None, tema: str = None, nivel_id: int = None) -> list:
+        """
+        Lecciones ordenadas por ID (mismos filtros de igualdad que la consulta).
+
+        Args:
+            dificultad (str, optional): Filtrar por dificultad
+            tema (str, optional): Filtrar por tema
+            nivel_id (int, optional): Filtrar por nivel
+
+        Returns:
+            list: Documentos de lección
+        """
+        return self._vigente().filtrar(dificultad, tema, nivel_id)
+
+    def leccion(self, leccion_id: int):
+        """
+        Args:
+            leccion_id (int): ID de la lección
+
+        Returns:
+            dict: Documento de la lección o None si no existe
+        """
+        return self._vigente().por_id.get(leccion_id)
+
+    def version(self) -> int:
+        """Versión vigente del catálogo (cambia con cada invalidar)."""
+        return self._vigente().version
+
+    def total_lecciones(self) -> int:
+        """Cantidad de lecciones del catálogo."""
+        return len(self._vigente().lecciones)
+
+    def cantidad_palabras(self, leccion_id: int) -> int:
+        """Palabras de la lección (0 si no existe)."""
+        return self._vigente().palabras_por_leccion.get(leccion_id, 0)
+
+    def ids_de_nivel(self, nivel_id: int) -> list:
+        """IDs de las lecciones de un nivel, en orden."""
+        return [leccion['_id'] for leccion in self._vigente().por_nivel.get(nivel_id, [])]
+
+    def derivado(self, clave, construir):
+        """
+        Valor calculado una sola vez por versión del catálogo.
+
+        RENDIMIENTO: Permite guardar junto al snapshot datos derivados de él
+        (p. ej. lecciones ya serializadas). Se descartan solos al recargar,
+        así que nunca sobreviven a una modificación del catálogo.
+
+        Args:
+            clave: Clave hashable del valor
+            construir (callable): construir(contenido) -> valor. Recibe el
+                snapshot vigente (lecciones, por_id, por_nivel, filtrar...) y
+                debe tratarlo como de solo lectura. Si retorna None no se
+                memoriza (claves sin datos, p. ej. un ID inexistente, no
+                ocupan memoria).
+
+        Returns:
+            Valor construido para la versión vigente
+        """
+        contenido = self._vigente()
+        valor = contenido.derivados.get(clave)
+        if valor is None:
+            # Dos hilos pueden construirlo a la vez: ambos obtienen el mismo valor
+            valor = construir(contenido)
+            if valor is not None:
+                contenido.derivados[clave] = valor
+        return valor
+
+    def niveles(self, dificultad: str = None, tema: str = None) -> list:
+        """
+        Niveles ordenados por ID.
+
+        Args:
+            dificultad (str, optional): Filtrar por dificultad
+            tema (str, optional): Filtrar por tema
+
+        Returns:
+            list: Documentos de nivel
+        """
+        niveles = self._vigente().niveles
+        if dificultad is not None:
+            niveles = [n for n in niveles if n.get('dificultad') == dificultad]
+        if tema is not None:
+            niveles = [n for n in niveles if n.get('tema') == tema]
+        return list(niveles)
+
+    def nivel(self, nivel_id: int):
+        """
+        Args:
+            nivel_id (int): ID del nivel
+
+        Returns:
+            dict: Documento del nivel o None si no existe
+        """
+        return self._vigente().niveles_por_id.get(nivel_id)
+
+    # ------------------------------------------------------------------
+    # Invalidación
+    # ------------------------------------------------------------------
+
+    def invalidar(self) -> int:
+        """
+        Publica una nueva versión del catálogo tras una escritura.
+
+        Los demás workers recargan en su siguiente verificación; este worker
+        recarga en la siguiente lectura.
+
+        Returns:
+            int: Nueva versión del catálogo
+        """
+        from pymongo import ReturnDocument
+
+        documento = self._db().catalogo_version.find_one_and_update(
+            {'_id': ID_VERSION},
+            {'$inc': {'version': 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        with self._lock:
+            self._verificado_en = None
+        return documento['version']
+
+    def limpiar(self) -> None:
+        """Descarta el catálogo en memoria de este worker."""
+        with self._lock:
+            self._contenido = None
+            self._verificado_en = None
+
+    def estadisticas(self) -> dict:
+        """
+        Métricas del catálogo para operadores.
+
+        Returns:
+            dict: {cargado, version, lecciones, niveles, recargas,
+                   verificaciones, intervalo_segundos, antiguedad_segundos}
+        """
+        contenido = self._contenido
+        verificado_en = self._verificado_en
+        return {
+            'cargado': contenido is not None,
+            'version': contenido.version if contenido else None,
+            'lecciones': len(contenido.lecciones) if contenido else 0,
+            'niveles': len(contenido.niveles) if contenido else 0,
+            'recargas': self.recargas,
+            'verificaciones': self.verificaciones,
+            'intervalo_segundos': self.intervalo,
+            'antiguedad_segundos': (
+                round(self._reloj() - verificado_en, 3) if verificado_en is not None else None
+            ),
+        }
+
+
+# Instancia única por proceso (cada worker de gunicorn tiene la suya)
+catalogo = CatalogoLecciones()
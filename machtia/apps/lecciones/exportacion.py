@@ -0,0 +1,149 @@
+"""
+Exportación del catálogo (lecciones, niveles y diccionario) en JSONL o CSV.
+
+RENDIMIENTO: GET /api/lecciones/ arma la lista completa en memoria y la
+devuelve en un único Response. Aquí cada exportación es un generador sobre
+un cursor de MongoDB con batch_size(EXPORTACION_LOTE) que emite un bloque de
+bytes por lote: la memoria usada depende del tamaño del lote, no del
+catálogo, y la vista lo entrega con StreamingHttpResponse.
+
+Tipos:
+    lecciones: un documento por lección con sus palabras embebidas
+    niveles: un documento por nivel
+    palabras: una fila por palabra (diccionario) con el ID de su lección
+
+El JSONL de lecciones y de niveles usa los mismos campos que la
+importación (apps.lecciones.importacion), así que se puede volver a
+importar tal cual: las lecciones con importar_lecciones y los niveles con
+importar_niveles (tipo=niveles en POST /importar/). En CSV las palabras de cada lección van en una columna
+con su JSON.
+
+Uso:
+    from apps.lecciones.exportacion import exportar
+
+    for bloque in exportar('lecciones', 'jsonl'):
+        archivo.write(bloque)
+"""
+import csv
+import io
+import json
+from django.conf import settings
+
+FORMATOS = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Columnas en orden de exportación (mismos nombres que en la importación)
+COLUMNAS = {
+    'lecciones': ('_id', 'nombre', 'tema', 'dificultad', 'contenido', 'nivel_id',
+                  'tominsAlCompletar', 'palabras'),
+    'niveles': ('_id', 'nombre', 'tema', 'dificultad', 'contenido'),
+    'palabras': ('leccion_id', 'palabra_nahuatl', 'español', 'audio'),
+}
+
+
+def _cursor(db, tipo: str, tamano_lote: int):
+    """Cursor ordenado por _id que solo trae las columnas exportadas."""
+    if tipo == 'palabras':
+        # $unwind en el servidor: cada palabra llega como un documento plano
+        return db.lecciones.aggregate([
+            {'$sort': {'_id': 1}},
+            {'$unwind': '$palabras'},
+            {'$project': {
+                '_id': 0,
+                'leccion_id': '$_id',
+                'palabra_nahuatl': '$palabras.palabra_nahuatl',
+                'español': '$palabras.español',
+                'audio': '$palabras.audio',
+            }},
+        ], batchSize=tamano_lote)
+
+    proyeccion = {campo: 1 for campo in COLUMNAS[tipo]}
+    return db[tipo].find({}, proyeccion).sort('_id', 1).batch_size(tamano_lote)
+
+
+def _fila(tipo: str, documento: dict) -> dict:
+    """Documento con las columnas del tipo, en orden y sin campos extra."""
+    fila = {campo: documento.get(campo) for campo in COLUMNAS[tipo]}
+    if tipo == 'lecciones':
+        fila['palabras'] = [
+            {
+                'palabra_nahuatl': palabra.get('palabra_nahuatl'),
+                'español': palabra.get('español'),
+                'audio': palabra.get('audio'),
+            }
+            for palabra in fila['palabras'] or []
+        ]
+    return fila
+
+
+def _codificar_jsonl(tipo: str, documentos: list) -> bytes:
+    return ''.join(
+        json.dumps(_fila(tipo, documento), ensure_ascii=False, separators=(',', ':')) + '\n'
+        for documento in documentos
+    ).encode('utf-8')
+
+
+def _codificar_csv(tipo: str, documentos: list, encabezado: bool) -> bytes:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    if encabezado:
+        escritor.writerow(COLUMNAS[tipo])
+    for documento in documentos:
+        fila = _fila(tipo, documento)
+        if tipo == 'lecciones':
+            fila['palabras'] = json.dumps(fila['palabras'], ensure_ascii=False, separators=(',', ':'))
+        escritor.writerow(['' if valor is None else valor for valor in fila.values()])
+    return buffer.getvalue().encode('utf-8')
+
+
+def exportar(tipo: str, formato: str = 'jsonl', tamano_lote: int = None):
+    """
+    Genera la exportación en bloques de bytes (uno por lote del cursor).
+
+    Args:
+        tipo (str): 'lecciones', 'niveles' o 'palabras'
+        formato (str): 'jsonl' o 'csv'
+        tamano_lote (int, optional): Documentos por lote (EXPORTACION_LOTE)
+
+    Yields:
+        bytes: Bloque codificado en UTF-8
+
+    Raises:
+        ValueError: Si el tipo o el formato no existen (al crear el generador)
+    """
+    if tipo not in COLUMNAS:
+        raise ValueError(f'Tipo debe ser: {", ".join(COLUMNAS)}')
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato debe ser: {", ".join(FORMATOS)}')
+
+    return _generar(tipo, formato, tamano_lote or settings.EXPORTACION_LOTE)
+
+
+def _generar(tipo: str, formato: str, tamano_lote: int):
+    from mongoengine.connection import get_db
+
+    cursor = _cursor(get_db(), tipo, tamano_lote)
+    encabezado = formato == 'csv'
+    lote = []
+
+    try:
+        for documento in cursor:
+            lote.append(documento)
+            if len(lote) >= tamano_lote:
+                yield _codificar(tipo, formato, lote, encabezado)
+                encabezado = False
+                lote = []
+
+        if lote or encabezado:
+            yield _codificar(tipo, formato, lote, encabezado)
+    finally:
+        # El cliente puede cortar la descarga: liberar el cursor del servidor
+        cursor.close()
+
+
+def _codificar(tipo: str, formato: str, documentos: list, encabezado: bool) -> bytes:
+    if formato == 'csv':
+        return _codificar_csv(tipo, documentos, encabezado)
+    return _codificar_jsonl(tipo, documentos)
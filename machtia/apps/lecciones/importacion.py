@@ -0,0 +1,388 @@
+"""
+Importación masiva de lecciones y niveles desde JSONL.
+
+RENDIMIENTO: crear_leccion crea una lección por petición (limitada por
+rate_limit_admin) y los seeds hacían un find_one y un save() por fila. Aquí
+las filas se leen una a una del cuerpo (sin cargarlo completo en memoria),
+se validan en Python y se escriben en lotes de IMPORTACION_LOTE con un
+bulk_write desordenado: un curso de miles de lecciones son unas pocas
+decenas de round trips. Los IDs de las filas sin `_id` se reservan por lote
+con un único $inc (apps.lecciones.secuencias.reservar_ids); los de las
+filas que no se llegan a escribir se devuelven si quedan al final.
+
+Formato: una lección por línea, con los mismos campos que crear_leccion:
+
+    {"nombre": "Saludos", "tema": "saludos", "dificultad": "principiante",
+     "contenido": "...", "nivel_id": 1, "tominsAlCompletar": 5,
+     "palabras": [{"palabra_nahuatl": "Niltze", "español": "Hola"}]}
+
+`_id` es opcional. Sin `sobrescribir`, una fila con un `_id` existente se
+reporta como 'existente' y no se modifica; con `sobrescribir` se reemplaza.
+
+Uso:
+    from apps.lecciones.importacion import importar_lecciones
+
+    resultado = importar_lecciones(lineas_jsonl)
+    resultado.reporte()
+"""
+import json
+from django.conf import settings
+from apps.autenticacion.security_utils import sanitizar_input_mongo
+
+DIFICULTADES = ('principiante', 'intermedio', 'avanzado')
+
+# Código de MongoDB para _id duplicado
+CODIGO_DUPLICADO = 11000
+
+
+def _texto(registro: dict, campo: str, max_length: int = None, requerido: bool = True,
+           sanitizar: bool = True):
+    valor = registro.get(campo)
+    if valor is None or valor == '':
+        if requerido:
+            raise ValueError(f'El campo {campo} es requerido')
+        return None
+    if not sanitizar:
+        if not isinstance(valor, str):
+            raise ValueError(f'{campo} debe ser de tipo str, recibido: {type(valor).__name__}')
+        if max_length and len(valor) > max_length:
+            raise ValueError(f'{campo} excede longitud máxima de {max_length} caracteres')
+        return valor
+    return sanitizar_input_mongo(valor, tipo_esperado=str, max_length=max_length, campo_nombre=campo)
+
+
+def _entero(registro: dict, campo: str, predeterminado: int = None):
+    valor = registro.get(campo, predeterminado)
+    if isinstance(valor, bool) or not isinstance(valor, int):
+        raise ValueError(f'{campo} debe ser un entero')
+    return sanitizar_input_mongo(valor, tipo_esperado=int, campo_nombre=campo)
+
+
+def _comunes(registro: dict) -> dict:
+    """Campos compartidos por lecciones y niveles."""
+    documento = {
+        'nombre': _texto(registro, 'nombre', max_length=200),
+        'tema': _texto(registro, 'tema', max_length=100),
+        'dificultad': registro.get('dificultad'),
+        'contenido': _texto(registro, 'contenido', sanitizar=False),
+    }
+    if documento['dificultad'] not in DIFICULTADES:
+        raise ValueError('Dificultad debe ser: principiante, intermedio o avanzado')
+    if '_id' in registro:
+        documento['_id'] = _entero(registro, '_id')
+        if documento['_id'] < 1:
+            raise ValueError('_id debe ser mayor que 0')
+    return documento
+
+
+def validar_leccion(registro) -> dict:
+    """
+    Valida una fila y construye el documento de `lecciones`.
+
+    Solo se copian los campos del modelo Leccion: cualquier otra clave del
+    registro se ignora. La fila debe incluir nivel_id o palabras.
+
+    Args:
+        registro (dict): Fila decodificada
+
+    Returns:
+        dict: Documento listo para insertar (con `_id` solo si venía en la fila)
+
+    Raises:
+        ValueError: Si la fila no es válida
+    """
+    if not isinstance(registro, dict):
+        raise ValueError('Cada línea debe ser un objeto JSON')
+    # Una fila sin ninguno de los campos propios de lección es un nivel (el
+    # JSONL de niveles tiene los mismos campos comunes): no crear lecciones
+    if 'nivel_id' not in registro and 'palabras' not in registro:
+        raise ValueError('La fila no tiene nivel_id ni palabras: parece un nivel '
+                         '(los niveles se importan con tipo=niveles)')
+
+    documento = _comunes(registro)
+    documento['nivel_id'] = _entero(registro, 'nivel_id', 1)
+    documento['tominsAlCompletar'] = _entero(registro, 'tominsAlCompletar', 5)
+
+    palabras = registro.get('palabras', [])
+    if not isinstance(palabras, list):
+        raise ValueError('palabras debe ser una lista')
+
+    documento['palabras'] = []
+    for indice, palabra in enumerate(palabras):
+        if not isinstance(palabra, dict):
+            raise ValueError(f'palabras[{indice}] debe ser un objeto')
+        try:
+            documento['palabras'].append({
+                'palabra_nahuatl': _texto(palabra, 'palabra_nahuatl', 100, sanitizar=False),
+                'español': _texto(palabra, 'español', 100, sanitizar=False),
+                'audio': _texto(palabra, 'audio', 500, requerido=False, sanitizar=False),
+            })
+        except ValueError as e:
+            raise ValueError(f'palabras[{indice}]: {e}')
+
+    return documento
+
+
+def validar_nivel(registro) -> dict:
+    """
+    Valida una fila y construye el documento de `niveles`.
+
+    Args:
+        registro (dict): Fila decodificada
+
+    Returns:
+        dict: Documento listo para insertar
+
+    Raises:
+        ValueError: Si la fila no es válida
+    """
+    if not isinstance(registro, dict):
+        raise ValueError('Cada línea debe ser un objeto JSON')
+    return _comunes(registro)
+
+
+class ResultadoImportacion:
+    """
+    Reporte por fila de una importación.
+
+    Atributos:
+        filas (list): [{linea, status, id?, message?}] en orden de línea.
+            status: 'creada', 'actualizada', 'existente' o 'error'
+    """
+
+    def __init__(self):
+        self.filas = []
+
+    def agregar(self, linea: int, estado: str, id: int = None, mensaje: str = None) -> dict:
+        fila = {'linea': linea, 'status': estado}
+        if id is not None:
+            fila['id'] = id
+        if mensaje:
+            fila['message'] = mensaje
+        self.filas.append(fila)
+        return fila
+
+    def contar(self, estado: str) -> int:
+        return sum(1 for fila in self.filas if fila['status'] == estado)
+
+    @property
+    def escritas(self) -> int:
+        return self.contar('creada') + self.contar('actualizada')
+
+    def reporte(self) -> dict:
+        """
+        Returns:
+            dict: {resumen: {total, creadas, actualizadas, existentes, errores}, filas}
+        """
+        self.filas.sort(key=lambda fila: fila['linea'])
+        return {
+            'resumen': {
+                'total': len(self.filas),
+                'creadas': self.contar('creada'),
+                'actualizadas': self.contar('actualizada'),
+                'existentes': self.contar('existente'),
+                'errores': self.contar('error'),
+            },
+            'filas': self.filas,
+        }
+
+
+def leer_jsonl(lineas):
+    """
+    Decodifica un iterable de líneas JSONL (bytes o str).
+
+    Las líneas vacías se omiten pero cuentan para la numeración. Los dict se
+    pasan sin decodificar (seeds que ya tienen los registros en memoria).
+
+    Yields:
+        tuple: (número de línea, registro o None, mensaje de error o None)
+    """
+    for numero, linea in enumerate(lineas, start=1):
+        if isinstance(linea, dict):
+            yield numero, linea, None
+            continue
+        if isinstance(linea, bytes):
+            try:
+                linea = linea.decode('utf-8')
+            except UnicodeDecodeError:
+                yield numero, None, 'La línea no es UTF-8 válido'
+                continue
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            yield numero, json.loads(linea), None
+        except ValueError:
+            yield numero, None, 'JSON inválido'
+
+
+def _reservar_ids_libres(secuencia: str, cantidad: int, vistos: set) -> list:
+    """
+    Reserva `cantidad` IDs que no aparezcan como `_id` en el archivo.
+
+    Los IDs reservados se agregan a `vistos`: una fila posterior con ese
+    mismo `_id` se reporta como repetida en lugar de sobrescribir la creada.
+    """
+    from .secuencias import reservar_ids
+
+    ids = []
+    while len(ids) < cantidad:
+        ids.extend(
+            nuevo_id for nuevo_id in reservar_ids(secuencia, cantidad - len(ids))
+            if nuevo_id not in vistos
+        )
+    vistos.update(ids)
+    return ids
+
+
+def _devolver_no_escritos(secuencia: str, reservados: list, no_escritos: set) -> None:
+    """
+    Devuelve a la secuencia el tramo final de IDs reservados que no se
+    escribieron (ver secuencias.devolver_ids). Un ID sin escribir en medio
+    del lote no se puede devolver sin devolver también los siguientes.
+    """
+    from .secuencias import devolver_ids
+
+    inicio = len(reservados)
+    while inicio > 0 and reservados[inicio - 1] in no_escritos and (
+        inicio == len(reservados) or reservados[inicio - 1] == reservados[inicio] - 1
+    ):
+        inicio -= 1
+    if inicio < len(reservados):
+        devolver_ids(secuencia, range(reservados[inicio], reservados[-1] + 1))
+
+
+def _escribir_lote(db, coleccion: str, secuencia: str, lote: list,
+                   sobrescribir: bool, resultado: ResultadoImportacion, vistos: set) -> None:
+    """
+    Escribe un lote de (línea, documento) con un bulk_write desordenado.
+    """
+    from pymongo import InsertOne, ReplaceOne
+    from pymongo.errors import BulkWriteError
+    from .secuencias import ajustar
+
+    # La secuencia se adelanta a los _id explícitos ANTES de reservar: un ID
+    # reservado nunca coincide con otra fila del mismo lote
+    explicitos = [documento['_id'] for _, documento in lote if '_id' in documento]
+    if explicitos:
+        ajustar(secuencia, max(explicitos))
+
+    sin_id = [documento for _, documento in lote if '_id' not in documento]
+    reservados = _reservar_ids_libres(secuencia, len(sin_id), vistos) if sin_id else []
+    for documento, nuevo_id in zip(sin_id, reservados):
+        documento['_id'] = nuevo_id
+
+    if sobrescribir:
+        operaciones = [
+            ReplaceOne({'_id': documento['_id']}, documento, upsert=True) for _, documento in lote
+        ]
+    else:
+        operaciones = [InsertOne(documento) for _, documento in lote]
+
+    # Con sobrescribir, los índices con upsert son las filas creadas; el resto
+    # reemplazó un documento existente (sin consultar antes cuáles existían)
+    errores = {}
+    try:
+        upserts = db[coleccion].bulk_write(operaciones, ordered=False).upserted_ids or {}
+    except BulkWriteError as e:
+        upserts = {upsert['index']: upsert['_id'] for upsert in e.details.get('upserted', [])}
+        for error in e.details.get('writeErrors', []):
+            errores[error['index']] = error
+
+    for indice, (linea, documento) in enumerate(lote):
+        error = errores.get(indice)
+        if error is None:
+            estado = 'actualizada' if sobrescribir and indice not in upserts else 'creada'
+            resultado.agregar(linea, estado, documento['_id'])
+        elif error.get('code') == CODIGO_DUPLICADO:
+            resultado.agregar(linea, 'existente', documento['_id'], 'Ya existe un registro con ese _id')
+        else:
+            resultado.agregar(linea, 'error', documento['_id'], error.get('errmsg', 'Error al escribir'))
+
+    # Un _id duplicado ya existe en la colección; cualquier otro error deja
+    # el ID reservado sin lección
+    no_escritos = {
+        lote[indice][1]['_id'] for indice, error in errores.items()
+        if error.get('code') != CODIGO_DUPLICADO
+    }
+    if reservados and no_escritos:
+        _devolver_no_escritos(secuencia, reservados, no_escritos)
+
+
+def importar(lineas, coleccion: str, secuencia: str, validar, sobrescribir: bool = False,
+             tamano_lote: int = None, max_filas: int = None) -> ResultadoImportacion:
+    """
+    Importa registros JSONL a `coleccion` en lotes.
+
+    Args:
+        lineas: Iterable de líneas (bytes, str o dict); se consume una sola vez
+        coleccion (str): Colección destino
+        secuencia (str): Secuencia de IDs de la colección
+        validar (callable): registro -> documento; lanza ValueError si es inválido
+        sobrescribir (bool): Reemplazar los `_id` existentes en lugar de omitirlos
+        tamano_lote (int, optional): Filas por bulk_write (IMPORTACION_LOTE)
+        max_filas (int, optional): Máximo de filas con contenido (IMPORTACION_MAX_FILAS)
+
+    Returns:
+        ResultadoImportacion: Reporte por fila
+
+    Si el cuerpo excede max_filas, las filas siguientes no se leen y el
+    reporte termina con una fila de error.
+    """
+    from mongoengine.connection import get_db
+
+    tamano_lote = tamano_lote or settings.IMPORTACION_LOTE
+    max_filas = max_filas or settings.IMPORTACION_MAX_FILAS
+
+    db = get_db()
+    resultado = ResultadoImportacion()
+    lote = []
+    vistos = set()
+    filas = 0
+
+    for linea, registro, error in leer_jsonl(lineas):
+        filas += 1
+        if filas > max_filas:
+            resultado.agregar(linea, 'error', mensaje=f'Se excedió el máximo de {max_filas} filas; '
+                                                      'no se procesaron las siguientes')
+            break
+
+        if error is None:
+            try:
+                documento = validar(registro)
+            except ValueError as e:
+                error = str(e)
+        if error is None and '_id' in documento:
+            if documento['_id'] in vistos:
+                error = f'_id {documento["_id"]} repetido en el archivo'
+            vistos.add(documento['_id'])
+        if error is not None:
+            resultado.agregar(linea, 'error', mensaje=error)
+            continue
+
+        lote.append((linea, documento))
+        if len(lote) >= tamano_lote:
+            _escribir_lote(db, coleccion, secuencia, lote, sobrescribir, resultado, vistos)
+            lote = []
+
+    if lote:
+        _escribir_lote(db, coleccion, secuencia, lote, sobrescribir, resultado, vistos)
+
+    return resultado
+
+
+def importar_lecciones(lineas, sobrescribir: bool = False, **kwargs) -> ResultadoImportacion:
+    """Importa lecciones JSONL (ver importar)."""
+    return importar(lineas, 'lecciones', 'lecciones', validar_leccion, sobrescribir, **kwargs)
+
+
+def importar_niveles(lineas, sobrescribir: bool = False, **kwargs) -> ResultadoImportacion:
+    """Importa niveles JSONL (ver importar)."""
+    return importar(lineas, 'niveles', 'niveles', validar_nivel, sobrescribir, **kwargs)
+
+
+# Importador por tipo de registro (parámetro `tipo` de POST /importar/)
+IMPORTADORES = {
+    'lecciones': importar_lecciones,
+    'niveles': importar_niveles,
+}
@@ -104,12 +104,13 @@ class Leccion(Document):
     @classmethod
     def obtener_siguiente_id(cls) -> int:
         """
-        Obtiene el siguiente ID disponible para una nueva lección.
+        Reserva el siguiente ID disponible para una nueva lección.
+
+        SEGURIDAD: Usa la secuencia atómica de apps.lecciones.secuencias, así
+        que dos creaciones concurrentes nunca obtienen el mismo ID.
 
         Returns:
             int: Siguiente ID secuencial
         """
-        ultima_leccion = cls.objects.order_by('-_id').first()
-        if ultima_leccion:
-            return ultima_leccion._id + 1
-        return 1
+        from apps.lecciones.secuencias import siguiente_id
+        return siguiente_id('lecciones')
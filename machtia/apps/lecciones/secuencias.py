@@ -0,0 +1,166 @@
+"""
+Secuencias atómicas para los IDs enteros de lecciones y niveles.
+
+RENDIMIENTO/SEGURIDAD: obtener_siguiente_id leía el _id más alto con
+order_by('-_id').first() y le sumaba uno, así que dos crear_leccion
+concurrentes obtenían el mismo ID (el segundo insert fallaba o sobrescribía)
+y una importación masiva necesitaba una consulta por fila. La colección
+`contadores` guarda un documento por secuencia {_id: 'lecciones', valor: N}
+y cada reserva es un único find_one_and_update con $inc: MongoDB serializa
+los incrementos sobre el mismo documento, de modo que dos reservas nunca
+se solapan, y reservar N IDs cuesta un round trip.
+
+Huecos:
+    IndiceProgreso asume que las lecciones son 1..N: un ID que se reserva y
+    nunca se inserta deja bloqueadas todas las lecciones posteriores. Quien
+    reserva un ID y no llega a escribirlo (validación fallida, error de
+    escritura) o elimina la última lección debe llamar a devolver_ids().
+
+Inicialización:
+    Si el contador no existe (base de datos anterior a este módulo o recién
+    restaurada) se crea con el _id más alto de la colección y se reintenta la
+    reserva. Los scripts que insertan IDs explícitos (seeds) deben llamar a
+    ajustar() para que el contador nunca quede por detrás.
+
+Uso:
+    from apps.lecciones.secuencias import siguiente_id, reservar_ids
+
+    leccion_id = siguiente_id('lecciones')
+    ids = reservar_ids('lecciones', 500)   # range de 500 IDs consecutivos
+"""
+COLECCION = 'contadores'
+
+# Secuencias conocidas -> colección cuyo _id numeran
+SECUENCIAS = {
+    'lecciones': 'lecciones',
+    'niveles': 'niveles',
+}
+
+
+def _coleccion_de(secuencia: str) -> str:
+    try:
+        return SECUENCIAS[secuencia]
+    except KeyError:
+        raise ValueError(f'Secuencia desconocida: {secuencia}')
+
+
+def _inicializar(db, secuencia: str) -> None:
+    """
+    Crea el contador con el _id más alto de su colección.
+
+    $max hace que la operación sea segura aunque otro worker la ejecute a la
+    vez o el contador ya exista: nunca lo hace retroceder.
+    """
+    from pymongo.errors import DuplicateKeyError
+
+    ultimo = db[_coleccion_de(secuencia)].find_one({}, {'_id': 1}, sort=[('_id', -1)])
+    try:
+        db[COLECCION].update_one(
+            {'_id': secuencia},
+            {'$max': {'valor': ultimo['_id'] if ultimo else 0}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Otro worker creó el contador entre el filtro y el insert
+        pass
+
+
+def reservar_ids(secuencia: str, cantidad: int = 1) -> range:
+    """
+    Reserva `cantidad` IDs consecutivos de la secuencia en un round trip.
+
+    Los IDs que no lleguen a insertarse se deben devolver con devolver_ids;
+    si alguien reservó después, quedan como hueco (nunca duplicados).
+
+    Args:
+        secuencia (str): Nombre de la secuencia ('lecciones' o 'niveles')
+        cantidad (int): Número de IDs a reservar
+
+    Returns:
+        range: IDs reservados, en orden ascendente
+
+    Raises:
+        ValueError: Si la secuencia no existe o cantidad < 1
+    """
+    from pymongo import ReturnDocument
+    from mongoengine.connection import get_db
+
+    _coleccion_de(secuencia)
+    if cantidad < 1:
+        raise ValueError('cantidad debe ser al menos 1')
+
+    db = get_db()
+    for _ in range(2):
+        documento = db[COLECCION].find_one_and_update(
+            {'_id': secuencia},
+            {'$inc': {'valor': cantidad}},
+            return_document=ReturnDocument.AFTER
+        )
+        if documento is not None:
+            fin = documento['valor']
+            return range(fin - cantidad + 1, fin + 1)
+        _inicializar(db, secuencia)
+
+    raise RuntimeError(f'No se pudo inicializar la secuencia {secuencia}')
+
+
+def siguiente_id(secuencia: str) -> int:
+    """
+    Reserva un ID de la secuencia.
+
+    Args:
+        secuencia (str): Nombre de la secuencia ('lecciones' o 'niveles')
+
+    Returns:
+        int: ID reservado
+    """
+    return reservar_ids(secuencia, 1)[0]
+
+
+def devolver_ids(secuencia: str, ids) -> bool:
+    """
+    Devuelve a la secuencia IDs reservados que no se usaron.
+
+    Solo retrocede si `ids` siguen siendo los últimos entregados (nadie
+    reservó después): la comparación y el retroceso son un único update,
+    así que nunca se vuelve a entregar un ID que otro proceso ya tiene.
+
+    Args:
+        secuencia (str): Nombre de la secuencia
+        ids (range): IDs consecutivos sin usar, al final de una reserva
+
+    Returns:
+        bool: True si se devolvieron; False si quedan como hueco
+    """
+    from mongoengine.connection import get_db
+
+    _coleccion_de(secuencia)
+    if not ids:
+        return False
+    resultado = get_db()[COLECCION].update_one(
+        {'_id': secuencia, 'valor': ids[-1]},
+        {'$set': {'valor': ids[0] - 1}}
+    )
+    return resultado.modified_count == 1
+
+
+def ajustar(secuencia: str, valor: int) -> None:
+    """
+    Garantiza que la secuencia no entregue IDs <= valor.
+
+    Se usa antes de insertar IDs explícitos (importaciones) o después
+    (seeds, restauraciones). Si el contador aún no existe se inicializa con
+    el _id más alto de la colección y luego se adelanta a `valor`.
+
+    Args:
+        secuencia (str): Nombre de la secuencia
+        valor (int): ID más alto insertado (o por insertar)
+    """
+    from mongoengine.connection import get_db
+
+    _coleccion_de(secuencia)
+    db = get_db()
+    resultado = db[COLECCION].update_one({'_id': secuencia}, {'$max': {'valor': valor}})
+    if resultado.matched_count == 0:
+        _inicializar(db, secuencia)
+        db[COLECCION].update_one({'_id': secuencia}, {'$max': {'valor': valor}})
@@ -2,6 +2,27 @@
 Serializadores para el módulo de lecciones.
 Mapean los datos del backend a formato esperado por el frontend TypeScript.
 """
+import json
+from apps.autenticacion.renderers import codificar_json
+
+# Mismo formato que el JSONRenderer de DRF (UNICODE_JSON y COMPACT_JSON)
+_SEPARADORES = (',', ':')
+
+# Campos que se pueden pedir con ?fields= (en el orden de la respuesta)
+CAMPOS_LECCION = (
+    'id', 'numero', 'titulo', 'descripcion', 'dificultad', 'tema', 'palabras',
+    'cantidadPalabras', 'tomins', 'completada', 'bloqueada', 'estrellas'
+)
+
+# Cierre de cada lección según (completada, bloqueada): lo único que depende
+# del usuario se agrega a los bytes ya serializados
+_SUFIJOS_USUARIO = {
+    (completada, bloqueada): json.dumps(
+        {'completada': completada, 'bloqueada': bloqueada}, separators=_SEPARADORES
+    ).replace('{', ',', 1).encode('utf-8')
+    for completada in (False, True)
+    for bloqueada in (False, True)
+}
 
 
 def serializar_palabra_frontend(palabra_dict: dict) -> dict:
@@ -54,7 +75,7 @@ def serializar_leccion_frontend(leccion_data: dict, usuario=None) -> dict:
 
     Args:
         leccion_data: Documento de lección desde MongoDB
-        usuario: Instancia de Usuario para determinar estado (completada/bloqueada)
+        usuario: Usuario o ProgresoUsuario para determinar estado (completada/bloqueada)
 
     Returns:
         dict: Lección serializada para frontend
@@ -66,32 +87,25 @@ def serializar_leccion_frontend(leccion_data: dict, usuario=None) -> dict:
     bloqueada = False
 
     if usuario:
-        completada = leccion_id in usuario.leccionesCompletadas
-
-        # PROGRESIÓN SECUENCIAL: Una lección está bloqueada si:
-        # 1. Cualquier lección anterior (ID menor) NO está completada
-        # 2. Es la primera lección no completada (leccionActual), entonces NO está bloqueada
+        # RENDIMIENTO: Índice memorizado por usuario (prefijo contiguo + set), O(1)
+        indice = usuario.indice_progreso
+        completada = indice.completada(leccion_id)
 
-        if not completada:  # Solo calcular bloqueo si no está completada
-            # Verificar que todas las lecciones anteriores estén completadas
-            lecciones_anteriores_ids = range(1, leccion_id)  # IDs de 1 hasta leccion_id-1
-            todas_anteriores_completadas = all(
-                lid in usuario.leccionesCompletadas
-                for lid in lecciones_anteriores_ids
-            )
-
-            # Bloqueada si hay lecciones anteriores sin completar
-            bloqueada = not todas_anteriores_completadas
+        # PROGRESIÓN SECUENCIAL: Una lección está bloqueada si no está
+        # completada y cualquier lección anterior (ID menor) tampoco lo está
+        bloqueada = indice.bloqueada(leccion_id)
 
     # Serializar palabras
     palabras_serializadas = []
     palabras_raw = leccion_data.get('palabras', [])
 
     for idx, palabra_dict in enumerate(palabras_raw):
-        # Agregar _id temporal si no existe
+        palabra = serializar_palabra_frontend(palabra_dict)
+        # ID temporal si no existe (sin modificar el documento: puede venir
+        # del catálogo en memoria, compartido entre peticiones)
         if '_id' not in palabra_dict:
-            palabra_dict['_id'] = f"{leccion_id}-{idx}"
-        palabras_serializadas.append(serializar_palabra_frontend(palabra_dict))
+            palabra['id'] = f"{leccion_id}-{idx}"
+        palabras_serializadas.append(palabra)
 
     return {
         'id': str(leccion_id),  # Frontend espera string
@@ -108,6 +122,193 @@ def serializar_leccion_frontend(leccion_data: dict, usuario=None) -> dict:
     }
 
 
+def serializar_leccion_resumen(leccion_data: dict, usuario=None) -> dict:
+    """
+    Lección para listados: mismos campos que serializar_leccion_frontend
+    sin el arreglo de palabras y con su cantidad (cantidadPalabras).
+
+    Args:
+        leccion_data: Documento de lección (no se modifica)
+        usuario: Usuario o ProgresoUsuario (opcional)
+
+    Returns:
+        dict: Lección serializada sin palabras
+    """
+    sin_palabras = {campo: valor for campo, valor in leccion_data.items() if campo != 'palabras'}
+    serializada = serializar_leccion_frontend(sin_palabras, usuario)
+    del serializada['palabras']
+    serializada['cantidadPalabras'] = len(leccion_data.get('palabras') or [])
+    return serializada
+
+
+def _leccion_sin_usuario(leccion_data: dict, resumen: bool = False) -> bytes:
+    """
+    JSON de la lección sin completada/bloqueada ni la llave de cierre.
+
+    En la variante resumen las palabras se reemplazan por cantidadPalabras.
+    """
+    if resumen:
+        serializada = serializar_leccion_resumen(leccion_data)
+    else:
+        serializada = serializar_leccion_frontend(leccion_data)
+    del serializada['completada'], serializada['bloqueada']
+    return codificar_json(serializada)[:-1]
+
+
+def _prefijo(contenido, leccion_data: dict, resumen: bool = False) -> bytes:
+    """Prefijo serializado de la lección, memorizado en el snapshot del catálogo."""
+    clave = ('leccion_json_resumen' if resumen else 'leccion_json', leccion_data['_id'])
+    prefijo = contenido.derivados.get(clave)
+    if prefijo is None:
+        prefijo = contenido.derivados[clave] = _leccion_sin_usuario(leccion_data, resumen)
+    return prefijo
+
+
+def _sufijo(leccion_id: int, indice) -> bytes:
+    if indice is None:
+        return _SUFIJOS_USUARIO[(False, False)]
+    return _SUFIJOS_USUARIO[(indice.completada(leccion_id), indice.bloqueada(leccion_id))]
+
+
+def leccion_precodificada(leccion_id: int, usuario=None):
+    """
+    JSON (bytes) de una lección del catálogo, con el estado del usuario.
+
+    RENDIMIENTO: La parte que no depende del usuario (textos y palabras) se
+    serializa una sola vez por versión del catálogo; por petición solo se
+    concatenan los bytes de completada/bloqueada. El resultado es el mismo
+    que serializar_leccion_frontend codificado por DRF.
+
+    Args:
+        leccion_id (int): ID de la lección
+        usuario: Usuario o ProgresoUsuario (opcional)
+
+    Returns:
+        bytes: Objeto JSON, o None si la lección no existe
+    """
+    from .catalogo import catalogo
+
+    def construir(contenido):
+        leccion_data = contenido.por_id.get(leccion_id)
+        return None if leccion_data is None else _prefijo(contenido, leccion_data)
+
+    prefijo = catalogo.derivado(('leccion_json', leccion_id), construir)
+    if prefijo is None:
+        return None
+    indice = usuario.indice_progreso if usuario else None
+    return prefijo + _sufijo(leccion_id, indice)
+
+
+def lecciones_precodificadas(usuario=None, **filtro) -> bytes:
+    """
+    JSON (bytes) del listado de lecciones del catálogo con el estado del usuario.
+
+    RENDIMIENTO: Los prefijos de las lecciones filtradas se memorizan por
+    versión del catálogo (y, sin usuario, el arreglo completo), así que
+    listar N lecciones no construye ni codifica N diccionarios por petición.
+
+    Args:
+        usuario: Usuario o ProgresoUsuario (opcional)
+        **filtro: dificultad, tema y/o nivel_id (ver CatalogoLecciones.lecciones)
+
+    Returns:
+        bytes: Arreglo JSON
+    """
+    from .catalogo import catalogo
+
+    def construir(contenido):
+        prefijos = [
+            (leccion_data['_id'], _prefijo(contenido, leccion_data))
+            for leccion_data in contenido.filtrar(**filtro)
+        ]
+        # SEGURIDAD: Un filtro sin resultados (tema arbitrario) no se memoriza
+        return prefijos or None
+
+    def construir_anonimo(contenido):
+        prefijos = construir(contenido)
+        if prefijos is None:
+            return None
+        return b'[' + b','.join(
+            prefijo + _SUFIJOS_USUARIO[(False, False)] for _, prefijo in prefijos
+        ) + b']'
+
+    clave = tuple(sorted(filtro.items()))
+    if not usuario:
+        return catalogo.derivado(('lista_json_anonima',) + clave, construir_anonimo) or b'[]'
+
+    prefijos = catalogo.derivado(('lista_json',) + clave, construir) or []
+    indice = usuario.indice_progreso
+    return b'[' + b','.join(
+        prefijo + _sufijo(leccion_id, indice) for leccion_id, prefijo in prefijos
+    ) + b']'
+
+
+def pagina_lecciones(usuario=None, after: int = None, limit: int = None, campos=None,
+                     incluir_palabras: bool = False, **filtro) -> tuple:
+    """
+    Página de lecciones del catálogo por cursor (_id), como JSON (bytes).
+
+    RENDIMIENTO: Paginación keyset: la página empieza en la primera lección
+    con _id > after (búsqueda binaria en los IDs memorizados), así que el
+    costo y la memoria por petición dependen de `limit`, no del tamaño del
+    curso. Sin `campos`, cada lección sale de sus bytes precodificados
+    (variante resumen o completa); con `campos` solo se serializan las
+    lecciones de la página y los campos pedidos.
+
+    Args:
+        usuario: Usuario o ProgresoUsuario (opcional)
+        after (int, optional): Último _id de la página anterior
+        limit (int, optional): Lecciones por página (todas si no se indica)
+        campos (set, optional): Campos de cada lección (ver CAMPOS_LECCION)
+        incluir_palabras (bool): Variante completa en lugar de resumen
+        **filtro: dificultad, tema y/o nivel_id
+
+    Returns:
+        tuple: (bytes del arreglo JSON, _id para la siguiente página o None)
+    """
+    from bisect import bisect_right
+    from .catalogo import catalogo
+
+    resumen = not incluir_palabras
+
+    def construir(contenido):
+        lecciones = contenido.filtrar(**filtro)
+        if not lecciones:
+            return None
+        ids = [leccion_data['_id'] for leccion_data in lecciones]
+        # El snapshot viaja con la página: los prefijos se memorizan en la
+        # misma versión de la que salieron las lecciones
+        return ids, lecciones, contenido
+
+    clave = ('pagina',) + tuple(sorted(filtro.items()))
+    datos = catalogo.derivado(clave, construir)
+    if datos is None:
+        return b'[]', None
+    ids, lecciones, contenido = datos
+
+    inicio = bisect_right(ids, after) if after is not None else 0
+    fin = len(ids) if limit is None else inicio + limit
+    pagina = lecciones[inicio:fin]
+    siguiente = ids[fin - 1] if fin < len(ids) and pagina else None
+    indice = usuario.indice_progreso if usuario else None
+
+    if campos is not None:
+        serializar = serializar_leccion_frontend if 'palabras' in campos else serializar_leccion_resumen
+        elementos = []
+        for leccion_data in pagina:
+            serializada = serializar(leccion_data, usuario)
+            if 'cantidadPalabras' in campos and 'cantidadPalabras' not in serializada:
+                serializada['cantidadPalabras'] = len(leccion_data.get('palabras') or [])
+            elementos.append({campo: serializada[campo] for campo in CAMPOS_LECCION if campo in campos})
+        cuerpo = codificar_json(elementos)
+        return cuerpo, siguiente
+
+    return b'[' + b','.join(
+        _prefijo(contenido, leccion_data, resumen) + _sufijo(leccion_data['_id'], indice)
+        for leccion_data in pagina
+    ) + b']', siguiente
+
+
 def serializar_resultado_completar(usuario, racha_actual, racha_maxima, logros_nuevos, tomins_ganados) -> dict:
     """
     Serializa el resultado de completar una lección.
@@ -1,3 +1,574 @@
-from django.test import TestCase
+"""
+Tests para el módulo de lecciones
+"""
+import json
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from apps.lecciones.catalogo import CatalogoLecciones
+from apps.lecciones import secuencias
+from apps.lecciones.importacion import importar_lecciones, validar_leccion
+from apps.lecciones.exportacion import exportar
+from apps.lecciones.serializers import (
+    serializar_leccion_frontend, leccion_precodificada, lecciones_precodificadas, pagina_lecciones
+)
+from apps.autenticacion.models import IndiceProgreso
 
-# Create your tests here.
+
+class CursorFalso(list):
+    """Resultado de find() con sort() encadenable"""
+
+    def sort(self, campo, direccion):
+        return CursorFalso(sorted(self, key=lambda d: d[campo], reverse=direccion < 0))
+
+
+class CatalogoLeccionesTest(SimpleTestCase):
+    """Tests del catálogo en memoria de lecciones y niveles"""
+
+    def setUp(self):
+        self.ahora = 0.0
+        self.version = {'_id': 'catalogo', 'version': 1}
+        self.lecciones = [
+            {'_id': 2, 'nombre': 'Números', 'tema': 'numeros', 'dificultad': 'principiante', 'nivel_id': 1,
+             'palabras': [{'palabra_nahuatl': 'Ce'}, {'palabra_nahuatl': 'Ome'}]},
+            {'_id': 1, 'nombre': 'Saludos', 'tema': 'saludos', 'dificultad': 'principiante', 'nivel_id': 1},
+            {'_id': 3, 'nombre': 'Familia', 'tema': 'familia', 'dificultad': 'intermedio', 'nivel_id': 2},
+        ]
+
+        self.db = mock.Mock()
+        self.db.lecciones.find.side_effect = lambda filtro: CursorFalso(self.lecciones)
+        self.db.niveles.find.side_effect = lambda filtro: CursorFalso([{'_id': 1, 'nombre': 'Básico'}])
+        self.db.catalogo_version.find_one.side_effect = lambda *args: dict(self.version)
+        patcher = mock.patch('mongoengine.connection.get_db', return_value=self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.catalogo = CatalogoLecciones(intervalo_segundos=5, reloj=lambda: self.ahora)
+
+    def test_lecturas_desde_memoria(self):
+        """Test: Tras la primera carga no se vuelve a consultar MongoDB"""
+        self.assertEqual([l['_id'] for l in self.catalogo.lecciones()], [1, 2, 3])
+        self.assertEqual(self.catalogo.leccion(3)['nombre'], 'Familia')
+        self.assertEqual(self.catalogo.ids_de_nivel(1), [1, 2])
+        self.assertEqual(self.catalogo.nivel(1)['nombre'], 'Básico')
+        self.assertIsNone(self.catalogo.leccion(99))
+        self.assertEqual(self.catalogo.total_lecciones(), 3)
+        self.assertEqual(self.catalogo.cantidad_palabras(2), 2)
+        self.assertEqual(self.catalogo.cantidad_palabras(1), 0)
+
+        self.assertEqual(self.db.lecciones.find.call_count, 1)
+        self.assertEqual(self.db.catalogo_version.find_one.call_count, 1)
+
+    def test_filtros_equivalentes_a_la_consulta(self):
+        """Test: Los filtros de igualdad se aplican en memoria"""
+        self.assertEqual(
+            [l['_id'] for l in self.catalogo.lecciones(dificultad='principiante', nivel_id=1)], [1, 2]
+        )
+        self.assertEqual([l['_id'] for l in self.catalogo.lecciones(tema='familia')], [3])
+        self.assertEqual(self.catalogo.lecciones(nivel_id=9), [])
+
+    def test_recarga_cuando_otro_worker_cambia_la_version(self):
+        """Test: Se recarga solo si la versión en MongoDB cambió"""
+        self.catalogo.lecciones()
+
+        self.ahora = 6.0  # Vence el intervalo, misma versión: no recarga
+        self.catalogo.lecciones()
+        self.assertEqual(self.db.lecciones.find.call_count, 1)
+
+        self.lecciones.append({'_id': 4, 'nombre': 'Colores', 'nivel_id': 2})
+        self.version['version'] = 2
+        self.assertIsNone(self.catalogo.leccion(4))  # Aún dentro del intervalo
+
+        self.ahora = 12.0
+        self.assertEqual(self.catalogo.leccion(4)['nombre'], 'Colores')
+        self.assertEqual(self.catalogo.estadisticas()['recargas'], 2)
+
+    def test_invalidar_recarga_de_inmediato_en_este_worker(self):
+        """Test: Una escritura del admin se ve en la siguiente lectura"""
+        self.catalogo.lecciones()
+        self.db.catalogo_version.find_one_and_update.side_effect = (
+            lambda *args, **kwargs: self.version.update(version=2) or dict(self.version)
+        )
+
+        self.assertEqual(self.catalogo.invalidar(), 2)
+        self.catalogo.lecciones()
+        self.assertEqual(self.db.lecciones.find.call_count, 2)
+
+
+class SecuenciasTest(SimpleTestCase):
+    """Tests de la secuencia atómica de IDs"""
+
+    def setUp(self):
+        self.contadores = {}
+        self.db = mock.MagicMock()
+        self.db.__getitem__.side_effect = lambda nombre: getattr(self.db, nombre)
+        self.db.contadores.find_one_and_update.side_effect = self._incrementar
+        self.db.contadores.update_one.side_effect = self._maximo
+        self.db.lecciones.find_one.return_value = {'_id': 15}
+
+        parche = mock.patch('mongoengine.connection.get_db', return_value=self.db)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def _incrementar(self, filtro, update, **kwargs):
+        if filtro['_id'] not in self.contadores:
+            return None
+        self.contadores[filtro['_id']] += update['$inc']['valor']
+        return {'_id': filtro['_id'], 'valor': self.contadores[filtro['_id']]}
+
+    def _maximo(self, filtro, update, upsert=False):
+        existe = filtro['_id'] in self.contadores
+        if '$set' in update:
+            # devolver_ids: solo si el contador sigue en el valor esperado
+            coincide = existe and self.contadores[filtro['_id']] == filtro['valor']
+            if coincide:
+                self.contadores[filtro['_id']] = update['$set']['valor']
+            return mock.Mock(matched_count=int(coincide), modified_count=int(coincide))
+        if existe or upsert:
+            actual = self.contadores.get(filtro['_id'], 0)
+            self.contadores[filtro['_id']] = max(actual, update['$max']['valor'])
+        return mock.Mock(matched_count=int(existe))
+
+    def test_inicializa_con_el_id_mas_alto(self):
+        """Test: Sin contador, la secuencia continúa después del último _id"""
+        self.assertEqual(secuencias.siguiente_id('lecciones'), 16)
+        self.assertEqual(secuencias.siguiente_id('lecciones'), 17)
+        self.db.lecciones.find_one.assert_called_once()
+
+    def test_reservar_bloque_en_un_round_trip(self):
+        """Test: Reservar N IDs es un único $inc"""
+        self.contadores['lecciones'] = 20
+
+        ids = secuencias.reservar_ids('lecciones', 100)
+
+        self.assertEqual(ids, range(21, 121))
+        self.assertEqual(self.db.contadores.find_one_and_update.call_count, 1)
+        self.assertEqual(secuencias.siguiente_id('lecciones'), 121)
+
+    def test_ajustar_no_retrocede(self):
+        """Test: ajustar solo avanza el contador"""
+        self.contadores['niveles'] = 10
+
+        secuencias.ajustar('niveles', 4)
+        self.assertEqual(self.contadores['niveles'], 10)
+        secuencias.ajustar('niveles', 30)
+        self.assertEqual(secuencias.siguiente_id('niveles'), 31)
+
+    def test_ajustar_inicializa_el_contador(self):
+        """Test: ajustar sin contador parte del _id más alto de la colección"""
+        secuencias.ajustar('lecciones', 12)
+        self.assertEqual(secuencias.siguiente_id('lecciones'), 16)
+
+        secuencias.ajustar('lecciones', 40)
+        self.assertEqual(secuencias.siguiente_id('lecciones'), 41)
+
+    def test_devolver_ids_sin_usar(self):
+        """Test: Los IDs sin usar vuelven a la secuencia si nadie reservó después"""
+        self.contadores['lecciones'] = 20
+
+        sin_usar = secuencias.reservar_ids('lecciones', 3)
+        self.assertTrue(secuencias.devolver_ids('lecciones', sin_usar))
+        self.assertEqual(secuencias.siguiente_id('lecciones'), 21)
+
+        # Otra reserva posterior: devolver dejaría IDs duplicados, queda el hueco
+        propio = secuencias.siguiente_id('lecciones')
+        secuencias.siguiente_id('lecciones')
+        self.assertFalse(secuencias.devolver_ids('lecciones', range(propio, propio + 1)))
+        self.assertEqual(secuencias.siguiente_id('lecciones'), 24)
+
+    def test_secuencia_desconocida(self):
+        """Test: Solo se aceptan secuencias registradas"""
+        with self.assertRaises(ValueError):
+            secuencias.siguiente_id('usuarios')
+        with self.assertRaises(ValueError):
+            secuencias.reservar_ids('lecciones', 0)
+
+
+class ImportacionLeccionesTest(SimpleTestCase):
+    """Tests de la importación masiva JSONL"""
+
+    def setUp(self):
+        self.db = mock.MagicMock()
+        self.db.__getitem__.side_effect = lambda nombre: getattr(self.db, nombre)
+        self.contador = 20
+        self.db.contadores.find_one_and_update.side_effect = self._incrementar
+        self.db.lecciones.bulk_write.return_value.upserted_ids = {}
+
+        parche = mock.patch('mongoengine.connection.get_db', return_value=self.db)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def _incrementar(self, filtro, update, **kwargs):
+        self.contador += update['$inc']['valor']
+        return {'valor': self.contador}
+
+    def linea(self, **campos):
+        registro = {
+            'nombre': 'Saludos', 'tema': 'saludos', 'dificultad': 'principiante',
+            'contenido': 'Saludos básicos',
+            'palabras': [{'palabra_nahuatl': 'Niltze', 'español': 'Hola'}],
+        }
+        registro.update(campos)
+        return json.dumps(registro).encode('utf-8') + b'\n'
+
+    def test_reserva_ids_y_escribe_por_lote(self):
+        """Test: Un $inc y un bulk_write por lote, no por fila"""
+        lineas = [self.linea(nombre=f'Lección {i}') for i in range(5)]
+
+        reporte = importar_lecciones(lineas, tamano_lote=3).reporte()
+
+        self.assertEqual(reporte['resumen']['creadas'], 5)
+        self.assertEqual([fila['id'] for fila in reporte['filas']], [21, 22, 23, 24, 25])
+        self.assertEqual(self.db.contadores.find_one_and_update.call_count, 2)
+        self.assertEqual(self.db.lecciones.bulk_write.call_count, 2)
+        self.assertFalse(self.db.lecciones.bulk_write.call_args[1]['ordered'])
+
+    def test_reporte_por_fila(self):
+        """Test: Las filas inválidas se reportan y no detienen la importación"""
+        lineas = [
+            self.linea(),
+            b'{no es json\n',
+            b'\n',
+            self.linea(dificultad='experto'),
+            self.linea(palabras=[{'palabra_nahuatl': 'Niltze'}]),
+            self.linea(nombre={'$ne': ''}),
+        ]
+
+        reporte = importar_lecciones(lineas).reporte()
+
+        self.assertEqual(reporte['resumen'], {
+            'total': 5, 'creadas': 1, 'actualizadas': 0, 'existentes': 0, 'errores': 4
+        })
+        self.assertEqual([fila['linea'] for fila in reporte['filas']], [1, 2, 4, 5, 6])
+        self.assertIn('palabras[0]', reporte['filas'][3]['message'])
+        operaciones = self.db.lecciones.bulk_write.call_args[0][0]
+        self.assertEqual(len(operaciones), 1)
+
+    def test_ids_existentes(self):
+        """Test: Un _id duplicado se reporta como existente y ajusta la secuencia"""
+        from pymongo.errors import BulkWriteError
+        self.db.lecciones.bulk_write.side_effect = BulkWriteError({
+            'writeErrors': [{'index': 0, 'code': 11000, 'errmsg': 'duplicate key'}]
+        })
+
+        reporte = importar_lecciones([self.linea(_id=3), self.linea(_id=40)]).reporte()
+
+        self.assertEqual([fila['status'] for fila in reporte['filas']], ['existente', 'creada'])
+        self.db.contadores.find_one_and_update.assert_not_called()
+        self.db.contadores.update_one.assert_called_once_with(
+            {'_id': 'lecciones'}, {'$max': {'valor': 40}}
+        )
+
+    def test_devuelve_ids_de_filas_no_escritas(self):
+        """Test: Los IDs reservados al final del lote que no se escribieron se devuelven"""
+        from pymongo.errors import BulkWriteError
+        self.db.lecciones.bulk_write.side_effect = BulkWriteError({'writeErrors': [
+            {'index': 1, 'code': 121, 'errmsg': 'Document failed validation'},
+            {'index': 2, 'code': 121, 'errmsg': 'Document failed validation'},
+        ]})
+
+        reporte = importar_lecciones([self.linea() for _ in range(3)]).reporte()
+
+        self.assertEqual(reporte['resumen']['errores'], 2)
+        self.db.contadores.update_one.assert_called_once_with(
+            {'_id': 'lecciones', 'valor': 23}, {'$set': {'valor': 21}}
+        )
+
+    def test_sobrescribir_distingue_creadas_de_actualizadas(self):
+        """Test: Con sobrescribir, los upserts son las filas creadas"""
+        self.db.lecciones.bulk_write.return_value.upserted_ids = {1: 8}
+
+        reporte = importar_lecciones(
+            [self.linea(_id=7), self.linea(_id=8)], sobrescribir=True
+        ).reporte()
+
+        self.assertEqual([fila['status'] for fila in reporte['filas']], ['actualizada', 'creada'])
+        self.db.lecciones.find.assert_not_called()
+
+    def test_lote_mixto_no_repite_ids(self):
+        """Test: Los IDs reservados no coinciden con los _id explícitos del archivo"""
+        contadores = {'lecciones': 10}
+
+        def incrementar(filtro, update, **kwargs):
+            contadores['lecciones'] += update['$inc']['valor']
+            return {'valor': contadores['lecciones']}
+
+        def maximo(filtro, update, **kwargs):
+            contadores['lecciones'] = max(contadores['lecciones'], update['$max']['valor'])
+            return mock.Mock(matched_count=1)
+
+        self.db.contadores.find_one_and_update.side_effect = incrementar
+        self.db.contadores.update_one.side_effect = maximo
+        self.db.lecciones.bulk_write.return_value.upserted_ids = {0: 12, 1: 11}
+
+        reporte = importar_lecciones(
+            [self.linea(), self.linea(_id=11), self.linea(_id=12)], sobrescribir=True, tamano_lote=2
+        ).reporte()
+
+        self.assertEqual([fila['id'] for fila in reporte['filas'][:2]], [12, 11])
+        self.assertEqual(reporte['resumen']['creadas'], 2)
+        self.assertEqual(reporte['resumen']['actualizadas'], 0)
+        # La fila 3 usa el _id que ya recibió la fila 1: no la sobrescribe
+        self.assertEqual(reporte['filas'][2]['status'], 'error')
+        self.assertIn('repetido', reporte['filas'][2]['message'])
+        self.assertEqual(self.db.lecciones.bulk_write.call_count, 1)
+
+    def test_reserva_omite_ids_del_archivo(self):
+        """Test: Un ID reservado que ya usa una fila del archivo se vuelve a reservar"""
+        valores = iter([11, 12])
+        self.db.contadores.find_one_and_update.side_effect = (
+            lambda filtro, update, **kwargs: {'valor': next(valores)}
+        )
+
+        reporte = importar_lecciones([self.linea(_id=11), self.linea()]).reporte()
+
+        self.assertEqual([fila['id'] for fila in reporte['filas']], [11, 12])
+        self.assertEqual(self.db.contadores.find_one_and_update.call_count, 2)
+
+    def test_maximo_de_filas(self):
+        """Test: Las filas que exceden el máximo no se procesan"""
+        reporte = importar_lecciones([self.linea() for _ in range(4)], max_filas=2).reporte()
+
+        self.assertEqual(reporte['resumen']['creadas'], 2)
+        self.assertEqual(reporte['filas'][-1]['status'], 'error')
+        self.assertEqual(reporte['filas'][-1]['linea'], 3)
+
+    def test_niveles_no_se_importan_como_lecciones(self):
+        """Test: Una fila de nivel exportada no crea lecciones; tipo=niveles la importa"""
+        from apps.lecciones.importacion import IMPORTADORES
+        nivel = json.dumps({
+            '_id': 1, 'nombre': 'Nivel 1', 'tema': 'básico', 'dificultad': 'principiante',
+            'contenido': 'Introducción'
+        }).encode('utf-8')
+
+        reporte = IMPORTADORES['lecciones']([nivel]).reporte()
+        self.assertEqual(reporte['resumen']['errores'], 1)
+        self.assertIn('nivel', reporte['filas'][0]['message'])
+        self.db.lecciones.bulk_write.assert_not_called()
+
+        self.db.niveles.bulk_write.return_value.upserted_ids = {}
+        reporte = IMPORTADORES['niveles']([nivel]).reporte()
+        self.assertEqual(reporte['resumen']['creadas'], 1)
+        self.db.niveles.bulk_write.assert_called_once()
+
+    def test_validar_ignora_campos_extra(self):
+        """Test: Solo se copian los campos del modelo"""
+        documento = validar_leccion(json.loads(self.linea(rol='admin', nivel_id=2)))
+
+        self.assertNotIn('rol', documento)
+        self.assertEqual(documento['nivel_id'], 2)
+        self.assertEqual(documento['tominsAlCompletar'], 5)
+
+
+class ExportacionCatalogoTest(SimpleTestCase):
+    """Tests de la exportación en streaming"""
+
+    def setUp(self):
+        self.lecciones = [
+            {'_id': i, 'nombre': f'Lección {i}', 'tema': 'saludos', 'dificultad': 'principiante',
+             'contenido': 'Texto, con "comillas"', 'nivel_id': 1, 'tominsAlCompletar': 5,
+             'palabras': [{'palabra_nahuatl': 'Niltze', 'español': 'Hola', 'audio': None}]}
+            for i in range(1, 6)
+        ]
+        self.cursor = mock.MagicMock()
+        self.cursor.__iter__.side_effect = lambda: iter(self.lecciones)
+        self.db = mock.MagicMock()
+        self.db.__getitem__.side_effect = lambda nombre: getattr(self.db, nombre)
+        self.db.lecciones.find.return_value.sort.return_value.batch_size.return_value = self.cursor
+
+        parche = mock.patch('mongoengine.connection.get_db', return_value=self.db)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_jsonl_por_lotes_y_reimportable(self):
+        """Test: Un bloque por lote y cada línea pasa la validación de importación"""
+        bloques = list(exportar('lecciones', 'jsonl', tamano_lote=2))
+
+        self.assertEqual(len(bloques), 3)
+        lineas = b''.join(bloques).decode('utf-8').splitlines()
+        self.assertEqual(len(lineas), 5)
+        documento = validar_leccion(json.loads(lineas[0]))
+        self.assertEqual(documento['_id'], 1)
+        self.assertEqual(documento['palabras'][0]['español'], 'Hola')
+        self.cursor.close.assert_called_once()
+
+    def test_csv_con_encabezado_una_vez(self):
+        """Test: El CSV lleva encabezado solo en el primer bloque"""
+        import csv
+        import io
+
+        texto = b''.join(exportar('lecciones', 'csv', tamano_lote=2)).decode('utf-8')
+        filas = list(csv.reader(io.StringIO(texto)))
+
+        self.assertEqual(filas[0][:3], ['_id', 'nombre', 'tema'])
+        self.assertEqual(len(filas), 6)
+        self.assertEqual(filas[1][4], 'Texto, con "comillas"')
+        self.assertEqual(json.loads(filas[1][7])[0]['palabra_nahuatl'], 'Niltze')
+
+    def test_diccionario_desde_aggregate(self):
+        """Test: Las palabras se aplanan en el servidor con $unwind"""
+        self.db.lecciones.aggregate.return_value = mock.MagicMock(
+            __iter__=lambda _: iter([{'leccion_id': 1, 'palabra_nahuatl': 'Niltze', 'español': 'Hola'}])
+        )
+
+        texto = b''.join(exportar('palabras')).decode('utf-8')
+
+        self.assertEqual(json.loads(texto), {
+            'leccion_id': 1, 'palabra_nahuatl': 'Niltze', 'español': 'Hola', 'audio': None
+        })
+        pipeline = self.db.lecciones.aggregate.call_args[0][0]
+        self.assertIn({'$unwind': '$palabras'}, pipeline)
+
+    def test_parametros_invalidos(self):
+        """Test: Tipo o formato desconocido falla antes de consultar"""
+        with self.assertRaises(ValueError):
+            exportar('usuarios')
+        with self.assertRaises(ValueError):
+            exportar('lecciones', 'xml')
+        self.db.lecciones.find.assert_not_called()
+
+
+class SerializarLeccionTest(SimpleTestCase):
+    """Tests del serializador de lecciones"""
+
+    def test_no_modifica_el_documento(self):
+        """Test: Los documentos del catálogo compartido no se alteran"""
+        leccion_data = {
+            '_id': 7, 'nombre': 'Saludos',
+            'palabras': [{'palabra_nahuatl': 'Niltze', 'español': 'Hola'}]
+        }
+
+        serializada = serializar_leccion_frontend(leccion_data)
+
+        self.assertEqual(serializada['palabras'][0]['id'], '7-0')
+        self.assertNotIn('_id', leccion_data['palabras'][0])
+
+
+class LeccionesPrecodificadasTest(SimpleTestCase):
+    """Tests de las lecciones serializadas por versión del catálogo"""
+
+    def setUp(self):
+        self.version = {'_id': 'catalogo', 'version': 1}
+        self.lecciones = [
+            {'_id': i, 'nombre': f'Lección {i}', 'tema': 'saludos' if i < 3 else 'familia',
+             'dificultad': 'principiante', 'contenido': 'Niltze, ¿quen tinemi?', 'nivel_id': 1,
+             'palabras': [{'palabra_nahuatl': 'Niltze', 'español': 'Hola', 'audio': None}]}
+            for i in range(1, 5)
+        ]
+        self.db = mock.Mock()
+        self.db.lecciones.find.side_effect = lambda filtro: CursorFalso(self.lecciones)
+        self.db.niveles.find.side_effect = lambda filtro: CursorFalso([])
+        self.db.catalogo_version.find_one.side_effect = lambda *args: dict(self.version)
+
+        self.catalogo = CatalogoLecciones(intervalo_segundos=0)
+        for parche in (
+            mock.patch('mongoengine.connection.get_db', return_value=self.db),
+            mock.patch('apps.lecciones.catalogo.catalogo', self.catalogo),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+        self.usuario = mock.Mock(indice_progreso=IndiceProgreso([1, 2], prefijo=2))
+
+    def test_equivalente_al_serializador(self):
+        """Test: Mismo JSON que serializar_leccion_frontend"""
+        for usuario in (None, self.usuario):
+            esperado = [serializar_leccion_frontend(l, usuario) for l in self.lecciones]
+            self.assertEqual(json.loads(lecciones_precodificadas(usuario)), esperado)
+            self.assertEqual(json.loads(leccion_precodificada(3, usuario)), esperado[2])
+
+        self.assertEqual(
+            [(l['completada'], l['bloqueada']) for l in json.loads(lecciones_precodificadas(self.usuario))],
+            [(True, False), (True, False), (False, False), (False, True)]
+        )
+
+    def test_serializa_una_vez_por_version(self):
+        """Test: Las palabras se codifican una vez; una nueva versión las recodifica"""
+        with mock.patch(
+            'apps.lecciones.serializers.serializar_leccion_frontend', wraps=serializar_leccion_frontend
+        ) as serializar:
+            lecciones_precodificadas(self.usuario)
+            lecciones_precodificadas(self.usuario, tema='saludos')
+            lecciones_precodificadas()
+            leccion_precodificada(2, self.usuario)
+            self.assertEqual(serializar.call_count, 4)
+
+            self.version['version'] = 2
+            self.lecciones[0]['nombre'] = 'Saludos'
+            self.assertEqual(json.loads(lecciones_precodificadas())[0]['titulo'], 'Saludos')
+            self.assertEqual(serializar.call_count, 8)
+
+    def test_claves_inexistentes_no_se_memorizan(self):
+        """Test: Filtros o IDs sin datos no ocupan memoria"""
+        self.assertEqual(lecciones_precodificadas(tema='no-existe'), b'[]')
+        self.assertEqual(lecciones_precodificadas(self.usuario, tema='no-existe'), b'[]')
+        self.assertIsNone(leccion_precodificada(99))
+
+        self.assertEqual(self.catalogo._vigente().derivados, {})
+
+    @override_settings(RATE_LIMIT_HABILITADO=False)
+    def test_listado_anonimo_304_sin_mongodb(self):
+        """Test: Revalidar el listado anónimo no consulta MongoDB ni serializa"""
+        from rest_framework.test import APIRequestFactory
+        from apps.lecciones.views import listar_lecciones
+
+        self.catalogo._intervalo = 60
+        primera = listar_lecciones(APIRequestFactory().get('/api/lecciones/'))
+        consultas = len(self.db.mock_calls)
+
+        with mock.patch('apps.lecciones.views.lecciones_precodificadas') as precodificadas:
+            segunda = listar_lecciones(
+                APIRequestFactory().get('/api/lecciones/', HTTP_IF_NONE_MATCH=primera['ETag'])
+            )
+
+        self.assertEqual(primera.status_code, 200)
+        self.assertEqual(segunda.status_code, 304)
+        self.assertEqual(len(self.db.mock_calls), consultas)
+        precodificadas.assert_not_called()
+
+    def test_paginacion_por_cursor(self):
+        """Test: limit/after recorren el catálogo sin repetir ni saltar lecciones"""
+        vistos = []
+        after = None
+        while True:
+            cuerpo, after = pagina_lecciones(self.usuario, after=after, limit=3)
+            vistos.extend(json.loads(cuerpo))
+            if after is None:
+                break
+
+        self.assertEqual([l['numero'] for l in vistos], [1, 2, 3, 4])
+        self.assertNotIn('palabras', vistos[0])
+        self.assertEqual(vistos[0]['cantidadPalabras'], 1)
+        self.assertTrue(vistos[0]['completada'])
+        self.assertTrue(vistos[3]['bloqueada'])
+
+        cuerpo, siguiente = pagina_lecciones(after=2, limit=10, tema='familia')
+        self.assertEqual([l['numero'] for l in json.loads(cuerpo)], [3, 4])
+        self.assertIsNone(siguiente)
+
+    def test_campos_e_include(self):
+        """Test: fields selecciona campos e include=palabras trae la variante completa"""
+        cuerpo, _ = pagina_lecciones(self.usuario, limit=2, campos={'id', 'titulo', 'completada'})
+        self.assertEqual(json.loads(cuerpo), [
+            {'id': '1', 'titulo': 'Lección 1', 'completada': True},
+            {'id': '2', 'titulo': 'Lección 2', 'completada': True},
+        ])
+
+        cuerpo, _ = pagina_lecciones(limit=1, incluir_palabras=True)
+        self.assertEqual(json.loads(cuerpo), [serializar_leccion_frontend(self.lecciones[0])])
+
+    @override_settings(RATE_LIMIT_HABILITADO=False, LECCIONES_PAGINA_MAXIMA=3)
+    def test_vista_paginada_con_link(self):
+        """Test: La vista valida parámetros y agrega el header Link"""
+        from rest_framework.test import APIRequestFactory
+        from apps.lecciones.views import listar_lecciones
+
+        response = listar_lecciones(APIRequestFactory().get('/api/lecciones/', {'limit': 2, 'fields': 'titulo'}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)[0], {'id': '1', 'titulo': 'Lección 1'})
+        self.assertIn('after=2', response['Link'])
+        self.assertIn('rel="next"', response['Link'])
+
+        for params in ({'limit': 4}, {'limit': 'x'}, {'fields': 'password'}, {'include': 'usuario'}):
+            response = listar_lecciones(APIRequestFactory().get('/api/lecciones/', params))
+            self.assertEqual(response.status_code, 400)
@@ -16,6 +16,8 @@ urlpatterns = [
 
     # Endpoints de administración (requieren autenticación)
     path('crear/', views.crear_leccion, name='crear_leccion'),
+    path('importar/', views.importar_lecciones, name='importar_lecciones'),
+    path('exportar/', views.exportar_catalogo, name='exportar_catalogo'),
     path('<int:leccion_id>/actualizar/', views.actualizar_leccion, name='actualizar_leccion'),
     path('<int:leccion_id>/eliminar/', views.eliminar_leccion, name='eliminar_leccion'),
 ]
@@ -1,18 +1,77 @@
 """
 Vistas (endpoints) para el módulo de lecciones
 """
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from mongoengine.connection import get_db
-from bson import ObjectId
-from apps.autenticacion.utils import require_auth, require_role
+from mongoengine.errors import ValidationError
+from apps.autenticacion.utils import require_auth, require_role, obtener_progreso_opcional
 from apps.autenticacion.security_utils import sanitizar_input_mongo
 from apps.autenticacion.error_handler import manejar_error_seguro, log_security_event, obtener_ip_cliente
 from apps.autenticacion.rate_limit_decorators import rate_limit_api, rate_limit_leccion, rate_limit_admin
-from apps.progreso.models import Racha
+from apps.autenticacion.etags import calcular_etag, huella_progreso, responder_con_etag
+from apps.progreso.completion_engine import completar_leccion as completar_leccion_usuario
+from .catalogo import catalogo
+from .secuencias import devolver_ids
+from .importacion import IMPORTADORES
+from .exportacion import exportar, FORMATOS
 from .models import Leccion, Palabra
-from .serializers import serializar_leccion_frontend, serializar_resultado_completar, serializar_resultado_fallar
+from .serializers import (
+    serializar_leccion_frontend, serializar_resultado_completar, serializar_resultado_fallar,
+    leccion_precodificada, lecciones_precodificadas, pagina_lecciones, CAMPOS_LECCION
+)
+
+
+def _parametros_pagina(request):
+    """
+    Lee limit, after, fields e include del listado de lecciones.
+
+    Returns:
+        dict: Parámetros para pagina_lecciones, o None si no se pidió
+            paginación ni campos (respuesta completa de siempre)
+
+    Raises:
+        ValueError: Si algún parámetro es inválido
+    """
+    params = request.GET
+    if not any(nombre in params for nombre in ('limit', 'after', 'fields', 'include')):
+        return None
+
+    maximo = settings.LECCIONES_PAGINA_MAXIMA
+    try:
+        limit = int(params.get('limit', maximo))
+        after = int(params['after']) if params.get('after') else None
+    except (TypeError, ValueError):
+        raise ValueError('limit y after deben ser números enteros')
+    if not 1 <= limit <= maximo:
+        raise ValueError(f'limit debe estar entre 1 y {maximo}')
+
+    incluir = {valor for valor in params.get('include', '').split(',') if valor}
+    if incluir - {'palabras'}:
+        raise ValueError('include solo admite: palabras')
+
+    campos = None
+    if params.get('fields'):
+        campos = {valor.strip() for valor in params['fields'].split(',') if valor.strip()}
+        desconocidos = campos - set(CAMPOS_LECCION)
+        if desconocidos:
+            raise ValueError(f'Campos desconocidos: {", ".join(sorted(desconocidos))}')
+        campos = campos | {'id'} | incluir
+
+    return {
+        'after': after, 'limit': limit, 'campos': campos, 'incluir_palabras': 'palabras' in incluir
+    }
+
+
+def _enlace_siguiente(request, siguiente: int, limit: int) -> str:
+    """Header Link (RFC 8288) con la siguiente página."""
+    params = request.GET.copy()
+    params['after'] = siguiente
+    params['limit'] = limit
+    return f'<{request.build_absolute_uri(request.path)}?{params.urlencode()}>; rel="next"'
 
 
 @api_view(['GET'])
@@ -27,12 +86,24 @@ def listar_lecciones(request):
         - dificultad: filtrar por dificultad (principiante, intermedio, avanzado)
         - tema: filtrar por tema
         - nivel_id: filtrar por nivel
+        - limit: lecciones por página (máximo LECCIONES_PAGINA_MAXIMA)
+        - after: último ID de la página anterior (cursor)
+        - fields: campos de cada lección separados por coma (p. ej. id,titulo,completada)
+        - include=palabras: incluir el arreglo de palabras en la respuesta paginada
+
+    Con limit, after, fields o include la respuesta se pagina y, salvo
+    include=palabras o fields=palabras, cada lección trae cantidadPalabras
+    en lugar de palabras. El header Link (rel="next") apunta a la siguiente
+    página. Sin ellos se retorna la lista completa, como siempre.
 
     Returns:
         Leccion[]: Lista de lecciones con estado de completada/bloqueada si hay usuario autenticado
     """
     try:
-        db = get_db()
+        try:
+            pagina = _parametros_pagina(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         # Construir filtro con validación de seguridad
         filtro = {}
@@ -76,44 +147,32 @@ def listar_lecciones(request):
                     'error': 'nivel_id debe ser un número entero válido'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Buscar lecciones con filtros sanitizados
-        lecciones_cursor = db.lecciones.find(filtro).sort('_id', 1)
+        # Obtener progreso si está autenticado (sin requerir auth)
+        usuario = obtener_progreso_opcional(request)
 
-        # Obtener usuario si está autenticado (sin requerir auth)
-        # Intenta desde cookies httpOnly primero, luego desde Authorization header (legacy)
-        usuario = None
-        token = None
+        # RENDIMIENTO: 304 sin serializar si el catálogo y el progreso no cambiaron
+        clave_pagina = None if pagina is None else (
+            pagina['after'], pagina['limit'], sorted(pagina['campos'] or ()), pagina['incluir_palabras']
+        )
+        etag = calcular_etag(
+            'lecciones', catalogo.version(), sorted(filtro.items()), huella_progreso(usuario), clave_pagina
+        )
 
-        # PRIORIDAD 1: Cookies httpOnly (moderno y seguro)
-        token = request.COOKIES.get('access_token')
+        if pagina is None:
+            # RENDIMIENTO: Lecciones del catálogo en memoria, ya serializadas por
+            # versión; por petición solo se agregan completada/bloqueada
+            return responder_con_etag(request, etag, lambda: HttpResponse(
+                lecciones_precodificadas(usuario, **filtro), content_type='application/json'
+            ))
 
-        # FALLBACK: Authorization header (legacy, para compatibilidad)
-        if not token:
-            auth_header = request.headers.get('Authorization')
-            if auth_header and auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
+        def construir():
+            cuerpo, siguiente = pagina_lecciones(usuario, **pagina, **filtro)
+            response = HttpResponse(cuerpo, content_type='application/json')
+            if siguiente is not None:
+                response['Link'] = _enlace_siguiente(request, siguiente, pagina['limit'])
+            return response
 
-        # Decodificar token y obtener usuario si se encontró
-        if token:
-            try:
-                from apps.autenticacion.utils import decodificar_token
-                payload = decodificar_token(token)
-                if payload:
-                    from apps.autenticacion.models import Usuario
-                    usuario_data = db.usuarios.find_one({'_id': ObjectId(payload['user_id'])})
-                    if usuario_data:
-                        usuario_dict = {k: v for k, v in usuario_data.items() if k != '_id'}
-                        usuario = Usuario(**usuario_dict)
-                        usuario.id = usuario_data['_id']
-            except:
-                pass  # Si falla, simplemente no hay usuario
-
-        # Serializar lecciones
-        lecciones = []
-        for leccion_data in lecciones_cursor:
-            lecciones.append(serializar_leccion_frontend(leccion_data, usuario))
-
-        return Response(lecciones)
+        return responder_con_etag(request, etag, construir)
 
     except Exception as e:
         return Response({
@@ -132,8 +191,6 @@ def obtener_leccion(request, leccion_id):
         Leccion: Objeto de lección con estado si hay usuario autenticado
     """
     try:
-        db = get_db()
-
         # SEGURIDAD: Convertir y validar leccion_id
         try:
             leccion_id = int(leccion_id)
@@ -146,43 +203,22 @@ def obtener_leccion(request, leccion_id):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Buscar lección con ID sanitizado
-        leccion_data = db.lecciones.find_one({'_id': leccion_id})
-
-        if not leccion_data:
+        if catalogo.leccion(leccion_id) is None:
             return Response({
                 'error': 'Lección no encontrada'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        # Obtener usuario si está autenticado (sin requerir auth)
-        # Intenta desde cookies httpOnly primero, luego desde Authorization header (legacy)
-        usuario = None
-        token = None
+        # Obtener progreso si está autenticado (sin requerir auth)
+        usuario = obtener_progreso_opcional(request)
 
-        # PRIORIDAD 1: Cookies httpOnly (moderno y seguro)
-        token = request.COOKIES.get('access_token')
-
-        # FALLBACK: Authorization header (legacy, para compatibilidad)
-        if not token:
-            auth_header = request.headers.get('Authorization')
-            if auth_header and auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
+        cuerpo = leccion_precodificada(leccion_id, usuario)
+        if cuerpo is None:
+            # Eliminada entre ambas lecturas del catálogo
+            return Response({
+                'error': 'Lección no encontrada'
+            }, status=status.HTTP_404_NOT_FOUND)
 
-        # Decodificar token y obtener usuario si se encontró
-        if token:
-            try:
-                from apps.autenticacion.utils import decodificar_token
-                payload = decodificar_token(token)
-                if payload:
-                    from apps.autenticacion.models import Usuario
-                    usuario_data = db.usuarios.find_one({'_id': ObjectId(payload['user_id'])})
-                    if usuario_data:
-                        usuario_dict = {k: v for k, v in usuario_data.items() if k != '_id'}
-                        usuario = Usuario(**usuario_dict)
-                        usuario.id = usuario_data['_id']
-            except:
-                pass
-
-        return Response(serializar_leccion_frontend(leccion_data, usuario))
+        return HttpResponse(cuerpo, content_type='application/json')
 
     except Exception as e:
         return Response({
@@ -206,17 +242,16 @@ def obtener_siguiente_leccion(request):
     """
     try:
         usuario = request.user
-        db = get_db()
 
         # Buscar la lección actual del usuario
-        leccion_data = db.lecciones.find_one({'_id': usuario.leccionActual})
+        cuerpo = leccion_precodificada(usuario.leccionActual, usuario)
 
-        if not leccion_data:
+        if cuerpo is None:
             return Response({
                 'error': 'No hay más lecciones disponibles'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        return Response(serializar_leccion_frontend(leccion_data, usuario))
+        return HttpResponse(cuerpo, content_type='application/json')
 
     except Exception as e:
         return Response({
@@ -241,7 +276,6 @@ def completar_leccion(request, leccion_id):
     """
     try:
         usuario = request.user
-        db = get_db()
 
         # Convertir leccion_id a int
         try:
@@ -252,7 +286,7 @@ def completar_leccion(request, leccion_id):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Verificar que la lección existe
-        leccion_data = db.lecciones.find_one({'_id': leccion_id})
+        leccion_data = catalogo.leccion(leccion_id)
 
         if not leccion_data:
             return Response({
@@ -262,12 +296,9 @@ def completar_leccion(request, leccion_id):
         # PROGRESIÓN SECUENCIAL: Verificar que todas las lecciones anteriores estén completadas
         # Esta validación asegura que el usuario no pueda saltar lecciones
         if leccion_id > 1:
-            # Verificar TODAS las lecciones anteriores (1, 2, 3, ..., leccion_id-1)
-            lecciones_anteriores = range(1, leccion_id)
-            lecciones_faltantes = [
-                lid for lid in lecciones_anteriores
-                if lid not in usuario.leccionesCompletadas
-            ]
+            # Lecciones anteriores sin completar (solo se recorre el tramo
+            # posterior al prefijo contiguo de lecciones completadas)
+            lecciones_faltantes = usuario.indice_progreso.faltantes(leccion_id)
 
             if lecciones_faltantes:
                 # Calcular cuál es la primera lección sin completar
@@ -280,95 +311,22 @@ def completar_leccion(request, leccion_id):
                 }, status=status.HTTP_403_FORBIDDEN)
 
         # Verificar si ya completó esta lección
-        if leccion_id in usuario.leccionesCompletadas:
+        if usuario.indice_progreso.completada(leccion_id):
             return Response({
                 'error': 'Ya completaste esta lección'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Obtener recompensa
-        tomins_recompensa = leccion_data.get('tominsAlCompletar', 5)
-
-        # Actualizar usuario (el método ya maneja tomins y avance de lección)
-        usuario.completar_leccion(leccion_id, tomins_recompensa)
-
-        # === SISTEMA DE PROGRESO ===
-        # Buscar o crear racha del usuario
-        from apps.progreso.models import ActividadDiaria, Logro
-
-        racha_data = db.rachas.find_one({'usuario_id': str(usuario.id)})
-
-        if not racha_data:
-            # Crear nueva racha
-            racha = Racha(usuario_id=str(usuario.id))
-            racha.save()
-            racha_data = db.rachas.find_one({'usuario_id': str(usuario.id)})
-
-        # Reconstruir objeto Racha con embedded documents
-        racha_dict = {}
-
-        # Copiar campos simples
-        for k, v in racha_data.items():
-            if k not in ['_id', 'diasActivos', 'logrosDesbloqueados']:
-                racha_dict[k] = v
-
-        # Reconstruir embedded documents
-        dias_activos = []
-        for dia_data in racha_data.get('diasActivos', []):
-            dias_activos.append(ActividadDiaria(**dia_data))
-        racha_dict['diasActivos'] = dias_activos
-
-        logros = []
-        for logro_data in racha_data.get('logrosDesbloqueados', []):
-            logros.append(Logro(**logro_data))
-        racha_dict['logrosDesbloqueados'] = logros
-
-        # Crear objeto Racha
-        racha = Racha(**racha_dict)
-        racha.id = racha_data['_id']
-
-        # Actualizar racha
-        racha.actualizar_racha()
-
-        # Registrar actividad del día
-        racha.registrar_actividad(
-            lecciones_completadas=1,
-            tomins_ganados=tomins_recompensa,
-            tiempo_estudio=10  # Estimado: 10 minutos por lección
-        )
-
-        # Verificar logros automáticos
-        logros_nuevos = racha.verificar_logros_automaticos()
-
-        # === COMPLETAR NIVEL AUTOMÁTICAMENTE ===
-        # Verificar si el usuario completó todas las lecciones del nivel actual
-        nivel_id = leccion_data.get('nivel_id', 1)
-
-        # Obtener todas las lecciones del nivel actual
-        lecciones_del_nivel = list(db.lecciones.find(
-            {'nivel_id': nivel_id},
-            {'_id': 1}
-        ))
-        ids_lecciones_nivel = [l['_id'] for l in lecciones_del_nivel]
-
-        # Verificar si todas las lecciones del nivel están completadas
-        todas_completadas = all(
-            lid in usuario.leccionesCompletadas
-            for lid in ids_lecciones_nivel
-        )
-
-        nivel_completado = False
-        if todas_completadas and nivel_id not in usuario.nivelesCompletados:
-            # Completar el nivel automáticamente
-            usuario.completar_nivel(nivel_id)
-            nivel_completado = True
+        # RENDIMIENTO: Usuario, racha, actividad, logros y nivel se calculan
+        # en memoria y se guardan con un update en usuarios y otro en rachas
+        resultado = completar_leccion_usuario(usuario, leccion_data)
 
         # Serializar resultado
         return Response(serializar_resultado_completar(
             usuario=usuario,
-            racha_actual=racha.rachaActual,
-            racha_maxima=racha.rachaMaxima,
-            logros_nuevos=logros_nuevos,
-            tomins_ganados=tomins_recompensa
+            racha_actual=resultado.racha.rachaActual,
+            racha_maxima=resultado.racha.rachaMaxima,
+            logros_nuevos=resultado.logros_nuevos,
+            tomins_ganados=resultado.tomins_ganados
         ))
 
     except ValueError as e:
@@ -425,12 +383,8 @@ def crear_leccion(request):
                 'message': 'Dificultad debe ser: principiante, intermedio o avanzado'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Obtener siguiente ID
-        siguiente_id = Leccion.obtener_siguiente_id()
-
         # Crear lección
         leccion = Leccion(
-            _id=siguiente_id,
             nombre=data['nombre'],
             tema=data['tema'],
             dificultad=data['dificultad'],
@@ -450,8 +404,16 @@ def crear_leccion(request):
                 )
                 leccion.palabras.append(palabra)
 
-        # Guardar
-        leccion.save()
+        # Reservar el ID con el documento ya armado; si no se guarda se
+        # devuelve (un hueco bloquearía las lecciones posteriores)
+        siguiente_id = Leccion.obtener_siguiente_id()
+        leccion._id = siguiente_id
+        try:
+            leccion.save()
+        except Exception:
+            devolver_ids('lecciones', range(siguiente_id, siguiente_id + 1))
+            raise
+        catalogo.invalidar()
 
         # Serializar para respuesta
         db = get_db()
@@ -460,9 +422,14 @@ def crear_leccion(request):
         return Response({
             'status': 'success',
             'message': 'Lección creada exitosamente',
-            'leccion': serializar_leccion(leccion_data, incluir_palabras=True)
+            'leccion': serializar_leccion_frontend(leccion_data)
         }, status=status.HTTP_201_CREATED)
 
+    except ValidationError as e:
+        return Response({
+            'status': 'error',
+            'message': f'Datos de lección inválidos: {str(e)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'status': 'error',
@@ -470,6 +437,93 @@ def crear_leccion(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@require_auth
+@require_role(['admin', 'profesor'])  # SEGURIDAD: Solo admin y profesor pueden importar lecciones
+@rate_limit_admin  # SEGURIDAD: 30 operaciones por minuto (una importación cuenta como una)
+def importar_lecciones(request):
+    """
+    POST /api/lecciones/importar/
+
+    Importa lecciones (o niveles) en lote desde un cuerpo JSONL (un registro
+    por línea, mismos campos que crear_leccion/crear_nivel; `_id` opcional).
+
+    RENDIMIENTO: El cuerpo se lee línea por línea, los IDs se reservan por
+    lote y cada lote es un único bulk_write (ver apps.lecciones.importacion).
+
+    Query params:
+        - tipo: lecciones (default) o niveles
+        - sobrescribir=1: reemplazar los registros cuyo `_id` ya existe
+
+    Returns:
+        {status, resumen: {total, creadas, actualizadas, existentes, errores}, filas}
+    """
+    tipo = request.GET.get('tipo', 'lecciones')
+    if tipo not in IMPORTADORES:
+        return Response({
+            'status': 'error',
+            'message': f'Tipo debe ser: {", ".join(IMPORTADORES)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        sobrescribir = request.GET.get('sobrescribir') == '1'
+
+        # El HttpRequest de Django itera el cuerpo línea por línea
+        resultado = IMPORTADORES[tipo](request._request, sobrescribir=sobrescribir)
+        reporte = resultado.reporte()
+
+        if not reporte['filas']:
+            return Response({
+                'status': 'error',
+                'message': f'El cuerpo no contiene {tipo}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if resultado.escritas:
+            catalogo.invalidar()
+
+        return Response({'status': 'success', **reporte})
+
+    except Exception as e:
+        return Response({
+            'status': 'error',
+            'message': f'Error al importar {tipo}: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@require_auth
+@require_role(['admin', 'profesor'])  # SEGURIDAD: Solo admin y profesor pueden exportar el catálogo
+def exportar_catalogo(request):
+    """
+    GET /api/lecciones/exportar/
+
+    Descarga el catálogo completo en streaming (ver apps.lecciones.exportacion).
+
+    Query params:
+        - tipo: lecciones (default), niveles o palabras
+        - formato: jsonl (default) o csv
+
+    RENDIMIENTO: Se recorre un cursor por lotes y cada lote se envía en
+    cuanto se codifica; la memoria no crece con el tamaño del catálogo. El
+    JSONL de lecciones se puede reimportar con /importar/ y el de niveles
+    con /importar/?tipo=niveles.
+    """
+    tipo = request.GET.get('tipo', 'lecciones')
+    formato = request.GET.get('formato', 'jsonl')
+
+    try:
+        bloques = exportar(tipo, formato)
+    except ValueError as e:
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(bloques, content_type=FORMATOS[formato])
+    response['Content-Disposition'] = f'attachment; filename="{tipo}.{formato}"'
+    return response
+
+
 @api_view(['PUT', 'PATCH'])
 @require_role(['admin', 'profesor'])  # SEGURIDAD: Solo admin y profesor pueden actualizar lecciones
 def actualizar_leccion(request, leccion_id):
@@ -553,6 +607,7 @@ def actualizar_leccion(request, leccion_id):
                 {'_id': leccion_id},
                 {'$set': actualizacion}
             )
+            catalogo.invalidar()
 
         # Obtener lección actualizada
         leccion_actualizada = db.lecciones.find_one({'_id': leccion_id})
@@ -560,7 +615,7 @@ def actualizar_leccion(request, leccion_id):
         return Response({
             'status': 'success',
             'message': 'Lección actualizada exitosamente',
-            'leccion': serializar_leccion(leccion_actualizada, incluir_palabras=True)
+            'leccion': serializar_leccion_frontend(leccion_actualizada)
         })
 
     except Exception as e:
@@ -591,7 +646,6 @@ def fallar_leccion(request, leccion_id):
     """
     try:
         usuario = request.user
-        db = get_db()
 
         # Convertir leccion_id a int
         try:
@@ -602,7 +656,7 @@ def fallar_leccion(request, leccion_id):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Verificar que la lección existe
-        leccion_data = db.lecciones.find_one({'_id': leccion_id})
+        leccion_data = catalogo.leccion(leccion_id)
 
         if not leccion_data:
             return Response({
@@ -612,12 +666,9 @@ def fallar_leccion(request, leccion_id):
         # PROGRESIÓN SECUENCIAL: Verificar que todas las lecciones anteriores estén completadas
         # Esta validación asegura que el usuario no pueda intentar lecciones bloqueadas
         if leccion_id > 1:
-            # Verificar TODAS las lecciones anteriores (1, 2, 3, ..., leccion_id-1)
-            lecciones_anteriores = range(1, leccion_id)
-            lecciones_faltantes = [
-                lid for lid in lecciones_anteriores
-                if lid not in usuario.leccionesCompletadas
-            ]
+            # Lecciones anteriores sin completar (solo se recorre el tramo
+            # posterior al prefijo contiguo de lecciones completadas)
+            lecciones_faltantes = usuario.indice_progreso.faltantes(leccion_id)
 
             if lecciones_faltantes:
                 # Calcular cuál es la primera lección sin completar
@@ -696,6 +747,9 @@ def eliminar_leccion(request, leccion_id):
         resultado = db.lecciones.delete_one({'_id': leccion_id})
 
         if resultado.deleted_count > 0:
+            # Si era la última lección creada, su ID vuelve a estar disponible
+            devolver_ids('lecciones', range(leccion_id, leccion_id + 1))
+            catalogo.invalidar()
             return Response({
                 'status': 'success',
                 'message': 'Lección eliminada exitosamente'
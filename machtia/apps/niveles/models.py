@@ -42,12 +42,13 @@ class Nivel(Document):
     @classmethod
     def obtener_siguiente_id(cls) -> int:
         """
-        Obtiene el ID del siguiente nivel.
+        Reserva el ID del siguiente nivel.
+
+        SEGURIDAD: Usa la secuencia atómica de apps.lecciones.secuencias, así
+        que dos creaciones concurrentes nunca obtienen el mismo ID.
 
         Returns:
             int: Siguiente ID secuencial
         """
-        ultimo_nivel = cls.objects.order_by('-_id').first()
-        if ultimo_nivel:
-            return ultimo_nivel._id + 1
-        return 1
+        from apps.lecciones.secuencias import siguiente_id
+        return siguiente_id('niveles')
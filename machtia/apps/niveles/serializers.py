@@ -23,7 +23,7 @@ def serializar_nivel_frontend(nivel_data: dict, usuario=None) -> dict:
 
     Args:
         nivel_data: Documento de nivel desde MongoDB
-        usuario: Instancia de Usuario para determinar estado (completado/bloqueado)
+        usuario: Usuario o ProgresoUsuario para determinar estado (completado/bloqueado)
 
     Returns:
         dict: Nivel serializado para frontend
@@ -50,25 +50,21 @@ class NivelModelTest(TestCase):
 
     def test_obtener_siguiente_id(self):
         """Test: Obtener el siguiente ID disponible"""
+        self.db.contadores.delete_many({'_id': 'niveles'})
+
         # Sin niveles, debe retornar 1
         siguiente_id = Nivel.obtener_siguiente_id()
         self.assertEqual(siguiente_id, 1)
 
-        # Crear un nivel
-        nivel1 = Nivel(_id=1, nombre='Nivel 1', tema='test', dificultad='principiante', contenido='Test')
-        nivel1.save()
-
-        # Ahora debe retornar 2
+        # Cada llamada reserva un ID distinto
         siguiente_id = Nivel.obtener_siguiente_id()
         self.assertEqual(siguiente_id, 2)
 
-        # Crear más niveles
-        nivel2 = Nivel(_id=2, nombre='Nivel 2', tema='test', dificultad='intermedio', contenido='Test')
-        nivel2.save()
+        # Sin contador, continúa después del último nivel existente
+        self.db.contadores.delete_many({'_id': 'niveles'})
         nivel5 = Nivel(_id=5, nombre='Nivel 5', tema='test', dificultad='avanzado', contenido='Test')
         nivel5.save()
 
-        # Debe retornar 6 (el último + 1)
         siguiente_id = Nivel.obtener_siguiente_id()
         self.assertEqual(siguiente_id, 6)
 
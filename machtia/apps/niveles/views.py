@@ -5,8 +5,10 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from mongoengine.connection import get_db
-from bson import ObjectId
-from apps.autenticacion.utils import require_auth, require_role
+from apps.autenticacion.utils import require_auth, require_role, obtener_progreso_opcional
+from apps.autenticacion.etags import calcular_etag, huella_progreso, responder_con_etag
+from apps.lecciones.catalogo import catalogo
+from apps.lecciones.secuencias import devolver_ids
 from .models import Nivel
 from .serializers import serializar_nivel_frontend
 
@@ -26,8 +28,6 @@ def listar_niveles(request):
         Nivel[]: Lista de niveles con estado de completado/bloqueado si hay usuario autenticado
     """
     try:
-        db = get_db()
-
         # Construir filtro
         filtro = {}
 
@@ -39,33 +39,24 @@ def listar_niveles(request):
         if tema:
             filtro['tema'] = tema
 
-        # Buscar niveles
-        niveles_cursor = db.niveles.find(filtro).sort('_id', 1)
-
-        # Obtener usuario si está autenticado (sin requerir auth)
-        usuario = None
-        auth_header = request.headers.get('Authorization')
-        if auth_header and auth_header.startswith('Bearer '):
-            token = auth_header.split(' ')[1]
-            try:
-                from apps.autenticacion.utils import decodificar_token
-                payload = decodificar_token(token)
-                if payload:
-                    from apps.autenticacion.models import Usuario
-                    usuario_data = db.usuarios.find_one({'_id': ObjectId(payload['user_id'])})
-                    if usuario_data:
-                        usuario_dict = {k: v for k, v in usuario_data.items() if k != '_id'}
-                        usuario = Usuario(**usuario_dict)
-                        usuario.id = usuario_data['_id']
-            except:
-                pass  # Si falla, simplemente no hay usuario
-
-        # Serializar niveles
-        niveles = []
-        for nivel_data in niveles_cursor:
-            niveles.append(serializar_nivel_frontend(nivel_data, usuario))
-
-        return Response(niveles)
+        # Obtener progreso si está autenticado (sin requerir auth)
+        usuario = obtener_progreso_opcional(request)
+
+        # RENDIMIENTO: 304 sin serializar si el catálogo y el progreso no cambiaron
+        etag = calcular_etag(
+            'niveles', catalogo.version(), sorted(filtro.items()), huella_progreso(usuario),
+            request.accepted_media_type
+        )
+
+        def construir():
+            # Buscar niveles
+            # RENDIMIENTO: Servidos desde el catálogo en memoria (sin consultar MongoDB)
+            niveles = []
+            for nivel_data in catalogo.niveles(**filtro):
+                niveles.append(serializar_nivel_frontend(nivel_data, usuario))
+            return Response(niveles)
+
+        return responder_con_etag(request, etag, construir)
 
     except Exception as e:
         return Response({
@@ -84,8 +75,6 @@ def obtener_nivel(request, nivel_id):
         Nivel: Objeto de nivel con estado si hay usuario autenticado
     """
     try:
-        db = get_db()
-
         # Convertir nivel_id a int
         try:
             nivel_id = int(nivel_id)
@@ -95,30 +84,15 @@ def obtener_nivel(request, nivel_id):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Buscar nivel
-        nivel_data = db.niveles.find_one({'_id': nivel_id})
+        nivel_data = catalogo.nivel(nivel_id)
 
         if not nivel_data:
             return Response({
                 'error': 'Nivel no encontrado'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        # Obtener usuario si está autenticado
-        usuario = None
-        auth_header = request.headers.get('Authorization')
-        if auth_header and auth_header.startswith('Bearer '):
-            token = auth_header.split(' ')[1]
-            try:
-                from apps.autenticacion.utils import decodificar_token
-                payload = decodificar_token(token)
-                if payload:
-                    from apps.autenticacion.models import Usuario
-                    usuario_data = db.usuarios.find_one({'_id': ObjectId(payload['user_id'])})
-                    if usuario_data:
-                        usuario_dict = {k: v for k, v in usuario_data.items() if k != '_id'}
-                        usuario = Usuario(**usuario_dict)
-                        usuario.id = usuario_data['_id']
-            except:
-                pass
+        # Obtener progreso si está autenticado (sin requerir auth)
+        usuario = obtener_progreso_opcional(request)
 
         return Response(serializar_nivel_frontend(nivel_data, usuario))
 
@@ -163,20 +137,23 @@ def crear_nivel(request):
                 'message': 'Dificultad debe ser: principiante, intermedio o avanzado'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Obtener siguiente ID
-        siguiente_id = Nivel.obtener_siguiente_id()
-
         # Crear nivel
         nivel = Nivel(
-            _id=siguiente_id,
             nombre=data['nombre'],
             tema=data['tema'],
             dificultad=data['dificultad'],
             contenido=data['contenido']
         )
 
-        # Guardar
-        nivel.save()
+        # Reservar el ID con el documento ya armado; si no se guarda se devuelve
+        siguiente_id = Nivel.obtener_siguiente_id()
+        nivel._id = siguiente_id
+        try:
+            nivel.save()
+        except Exception:
+            devolver_ids('niveles', range(siguiente_id, siguiente_id + 1))
+            raise
+        catalogo.invalidar()
 
         # Serializar para respuesta
         db = get_db()
@@ -258,6 +235,7 @@ def actualizar_nivel(request, nivel_id):
                 {'_id': nivel_id},
                 {'$set': actualizacion}
             )
+            catalogo.invalidar()
 
         # Obtener nivel actualizado
         nivel_actualizado = db.niveles.find_one({'_id': nivel_id})
@@ -312,6 +290,9 @@ def eliminar_nivel(request, nivel_id):
         resultado = db.niveles.delete_one({'_id': nivel_id})
 
         if resultado.deleted_count > 0:
+            # Si era el último nivel creado, su ID vuelve a estar disponible
+            devolver_ids('niveles', range(nivel_id, nivel_id + 1))
+            catalogo.invalidar()
             return Response({
                 'status': 'success',
                 'message': 'Nivel eliminado exitosamente'
@@ -340,8 +321,6 @@ def obtener_lecciones_de_nivel(request, nivel_id):
         Leccion[]: Lista de lecciones del nivel con estado si hay usuario autenticado
     """
     try:
-        db = get_db()
-
         # Convertir nivel_id a int
         try:
             nivel_id = int(nivel_id)
@@ -351,44 +330,38 @@ def obtener_lecciones_de_nivel(request, nivel_id):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Verificar que el nivel existe
-        nivel_data = db.niveles.find_one({'_id': nivel_id})
+        nivel_data = catalogo.nivel(nivel_id)
         if not nivel_data:
             return Response({
                 'error': 'Nivel no encontrado'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        # Buscar lecciones de este nivel
-        lecciones_cursor = db.lecciones.find({'nivel_id': nivel_id}).sort('_id', 1)
-
-        # Obtener usuario si está autenticado
-        usuario = None
-        auth_header = request.headers.get('Authorization')
-        if auth_header and auth_header.startswith('Bearer '):
-            token = auth_header.split(' ')[1]
-            try:
-                from apps.autenticacion.utils import decodificar_token
-                payload = decodificar_token(token)
-                if payload:
-                    from apps.autenticacion.models import Usuario
-                    usuario_data = db.usuarios.find_one({'_id': ObjectId(payload['user_id'])})
-                    if usuario_data:
-                        usuario_dict = {k: v for k, v in usuario_data.items() if k != '_id'}
-                        usuario = Usuario(**usuario_dict)
-                        usuario.id = usuario_data['_id']
-            except:
-                pass
-
-        # Serializar lecciones
-        from apps.lecciones.serializers import serializar_leccion_frontend
-        lecciones = []
-        for leccion_data in lecciones_cursor:
-            lecciones.append(serializar_leccion_frontend(leccion_data, usuario))
+        # Obtener progreso si está autenticado (sin requerir auth)
+        usuario = obtener_progreso_opcional(request)
 
-        return Response({
-            'nivel': serializar_nivel_frontend(nivel_data, usuario),
-            'lecciones': lecciones,
-            'total_lecciones': len(lecciones)
-        })
+        # RENDIMIENTO: 304 sin serializar si el catálogo y el progreso no cambiaron
+        etag = calcular_etag(
+            'niveles_lecciones', catalogo.version(), nivel_id, huella_progreso(usuario),
+            request.accepted_media_type
+        )
+
+        def construir():
+            # Buscar lecciones de este nivel
+            lecciones_catalogo = catalogo.lecciones(nivel_id=nivel_id)
+
+            # Serializar lecciones
+            from apps.lecciones.serializers import serializar_leccion_frontend
+            lecciones = []
+            for leccion_data in lecciones_catalogo:
+                lecciones.append(serializar_leccion_frontend(leccion_data, usuario))
+
+            return Response({
+                'nivel': serializar_nivel_frontend(nivel_data, usuario),
+                'lecciones': lecciones,
+                'total_lecciones': len(lecciones)
+            })
+
+        return responder_con_etag(request, etag, construir)
 
     except Exception as e:
         return Response({
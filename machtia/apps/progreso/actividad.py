@@ -0,0 +1,410 @@
+"""
+Actividad diaria agrupada por mes (colección `actividad_mensual`).
+
+RENDIMIENTO: La actividad de cada día de estudio vivía en Racha.diasActivos,
+una lista embebida que crecía para siempre y se cargaba (y reescribía con
+el Document) en cada completado. Ahora cada usuario tiene un documento por
+mes y registrar la actividad del día es un upsert con $inc sobre los
+contadores de ese día: el documento de racha queda de tamaño constante y el
+costo de escribir no depende del historial.
+
+Documento:
+    {
+        _id: '<usuario_id>:<AAAA-MM>',
+        usuario_id: '<usuario_id>',
+        mes: datetime(AAAA, MM, 1),
+        dias: {
+            '<día del mes>': {leccionesCompletadas, tominsGanados, tiempoEstudio}
+        }
+    }
+
+El _id ordena los meses de un usuario de forma contigua, así que un rango
+de fechas se lee con una consulta por rango sobre el índice de _id (sin
+índices adicionales). Un usuario activo todos los días genera 12 documentos
+al año de menos de 3 KB cada uno.
+
+Mapa anual (colección `actividad_anual`, para el heatmap del frontend):
+    {
+        _id: '<usuario_id>:<AAAA>',
+        usuario_id: '<usuario_id>',
+        anio: AAAA,
+        bits: {'0'..'5': Int64},        # bit d = día d del año (0 = 1 de enero)
+        lecciones: {'<d>': cantidad}    # intensidad por día
+    }
+
+Los 6 enteros de 64 bits (366 días en 46 bytes) se actualizan con $bit or
+en el mismo registro de actividad, así que el heatmap de un año es la
+lectura de un solo documento pequeño.
+
+Uso:
+    from apps.progreso.actividad import registrar_actividad, obtener_actividades
+
+    registrar_actividad(usuario_id, datetime.utcnow(), lecciones=1, tomins=5, tiempo=10)
+    actividades = obtener_actividades(usuario_id, desde=date(2025, 1, 1))
+
+    # Historial y resumen calculados en el servidor (una agregación)
+    historial, resumen = resumen_actividad(usuario_id, desde=date(2025, 1, 1))
+"""
+from datetime import datetime, date
+from bson.int64 import Int64
+
+COLECCION = 'actividad_mensual'
+COLECCION_ANUAL = 'actividad_anual'
+
+# 366 días caben en 6 palabras de 64 bits; se envían los primeros 46 bytes
+PALABRAS_MAPA = 6
+BYTES_MAPA = 46
+
+CAMPOS_ACTIVIDAD = ('leccionesCompletadas', 'tominsGanados', 'tiempoEstudio')
+
+
+class ActividadLigera:
+    """Actividad de un día decodificada del bucket mensual."""
+
+    __slots__ = ('fecha', 'leccionesCompletadas', 'tominsGanados', 'tiempoEstudio')
+
+    def __init__(self, actividad_data: dict):
+        self.fecha = actividad_data['fecha']
+        self.leccionesCompletadas = actividad_data.get('leccionesCompletadas', 0)
+        self.tominsGanados = actividad_data.get('tominsGanados', 0)
+        self.tiempoEstudio = actividad_data.get('tiempoEstudio', 0)
+
+
+def id_bucket(usuario_id: str, fecha) -> str:
+    """
+    Args:
+        usuario_id (str): ID del usuario
+        fecha (date|datetime): Cualquier día del mes
+
+    Returns:
+        str: _id del documento del mes ('<usuario_id>:AAAA-MM')
+    """
+    return f'{usuario_id}:{fecha.year:04d}-{fecha.month:02d}'
+
+
+def operacion_actividad(usuario_id: str, fecha, lecciones: int = 0, tomins: int = 0,
+                        tiempo: int = 0) -> tuple:
+    """
+    Construye el upsert que suma la actividad de un día a su bucket.
+
+    Args:
+        usuario_id (str): ID del usuario
+        fecha (datetime): Día de la actividad (UTC)
+        lecciones (int): Lecciones completadas
+        tomins (int): Tomins ganados
+        tiempo (int): Minutos de estudio
+
+    Returns:
+        tuple: (filtro, update) para update_one(..., upsert=True)
+    """
+    prefijo = f'dias.{fecha.day}.'
+    incrementos = {}
+    for campo, cantidad in zip(CAMPOS_ACTIVIDAD, (lecciones, tomins, tiempo)):
+        if cantidad:
+            incrementos[prefijo + campo] = cantidad
+
+    return (
+        {'_id': id_bucket(usuario_id, fecha)},
+        {
+            '$inc': incrementos,
+            '$setOnInsert': {
+                'usuario_id': usuario_id,
+                'mes': datetime(fecha.year, fecha.month, 1),
+            },
+        }
+    )
+
+
+def dia_del_anio(fecha) -> int:
+    """Día del año empezando en 0 (1 de enero = 0)."""
+    return fecha.timetuple().tm_yday - 1
+
+
+def id_anual(usuario_id: str, anio: int) -> str:
+    """_id del mapa anual ('<usuario_id>:AAAA')."""
+    return f'{usuario_id}:{anio:04d}'
+
+
+def operacion_anual(usuario_id: str, fecha, lecciones: int = 0) -> tuple:
+    """
+    Construye el upsert que marca el día en el mapa anual.
+
+    Args:
+        usuario_id (str): ID del usuario
+        fecha (datetime): Día de la actividad (UTC)
+        lecciones (int): Lecciones completadas (intensidad)
+
+    Returns:
+        tuple: (filtro, update) para update_one(..., upsert=True)
+    """
+    dia = dia_del_anio(fecha)
+    palabra, bit = divmod(dia, 64)
+    mascara = 1 << bit
+    if mascara >= 1 << 63:
+        mascara -= 1 << 64  # Int64 con signo
+
+    update = {
+        '$bit': {f'bits.{palabra}': {'or': Int64(mascara)}},
+        '$setOnInsert': {'usuario_id': usuario_id, 'anio': fecha.year},
+    }
+    if lecciones:
+        update['$inc'] = {f'lecciones.{dia}': lecciones}
+
+    return {'_id': id_anual(usuario_id, fecha.year)}, update
+
+
+def operaciones_actividad(usuario_id: str, fecha, lecciones: int = 0, tomins: int = 0,
+                          tiempo: int = 0) -> list:
+    """
+    Upserts que registran la actividad de un día (bucket mensual y mapa anual).
+
+    Returns:
+        list: Tuplas (coleccion, filtro, update)
+    """
+    filtro, update = operacion_actividad(usuario_id, fecha, lecciones, tomins, tiempo)
+    if not update['$inc']:
+        return []
+    return [
+        (COLECCION, filtro, update),
+        (COLECCION_ANUAL,) + operacion_anual(usuario_id, fecha, lecciones),
+    ]
+
+
+def registrar_actividad(usuario_id: str, fecha, lecciones: int = 0, tomins: int = 0,
+                        tiempo: int = 0, session=None) -> None:
+    """
+    Suma la actividad de un día (un upsert por colección).
+
+    Args:
+        usuario_id (str): ID del usuario
+        fecha (datetime): Día de la actividad (UTC)
+        lecciones (int): Lecciones completadas
+        tomins (int): Tomins ganados
+        tiempo (int): Minutos de estudio
+        session: Sesión de PyMongo (transacción) o None
+    """
+    from mongoengine.connection import get_db
+
+    db = get_db()
+    for coleccion, filtro, update in operaciones_actividad(usuario_id, fecha, lecciones, tomins, tiempo):
+        db[coleccion].update_one(filtro, update, upsert=True, session=session)
+
+
+def decodificar_bucket(bucket: dict) -> list:
+    """
+    Convierte un documento mensual en actividades diarias.
+
+    Args:
+        bucket (dict): Documento de `actividad_mensual`
+
+    Returns:
+        list: ActividadLigera ordenadas por fecha
+    """
+    mes = bucket['mes']
+    actividades = []
+    for dia, contadores in bucket.get('dias', {}).items():
+        actividades.append(ActividadLigera({
+            'fecha': datetime(mes.year, mes.month, int(dia)),
+            **contadores
+        }))
+    actividades.sort(key=lambda actividad: actividad.fecha)
+    return actividades
+
+
+def obtener_actividades(usuario_id: str, desde: date, hasta: date = None) -> list:
+    """
+    Actividades diarias del usuario en un rango de fechas.
+
+    Args:
+        usuario_id (str): ID del usuario
+        desde (date): Primer día (inclusive)
+        hasta (date, optional): Último día (inclusive, default: hoy)
+
+    Returns:
+        list: ActividadLigera ordenadas por fecha ascendente
+    """
+    from mongoengine.connection import get_db
+
+    hasta = hasta or datetime.utcnow().date()
+    buckets = get_db()[COLECCION].find({
+        '_id': {'$gte': id_bucket(usuario_id, desde), '$lte': id_bucket(usuario_id, hasta)}
+    }).sort('_id', 1)
+
+    actividades = []
+    for bucket in buckets:
+        for actividad in decodificar_bucket(bucket):
+            if desde <= actividad.fecha.date() <= hasta:
+                actividades.append(actividad)
+    return actividades
+
+
+def pipeline_actividad(usuario_id: str, desde: date, hasta: date) -> list:
+    """
+    Pipeline de agregación con el historial y el resumen de un rango.
+
+    Solo lee los documentos mensuales del rango (consulta por rango sobre
+    _id) y calcula totales y promedios en el servidor.
+
+    Args:
+        usuario_id (str): ID del usuario
+        desde (date): Primer día (inclusive)
+        hasta (date): Último día (inclusive)
+
+    Returns:
+        list: Etapas para aggregate()
+    """
+    inicio = datetime(desde.year, desde.month, desde.day)
+    fin = datetime(hasta.year, hasta.month, hasta.day)
+
+    return [
+        {'$match': {'_id': {'$gte': id_bucket(usuario_id, desde), '$lte': id_bucket(usuario_id, hasta)}}},
+        {'$project': {'mes': 1, 'dia': {'$objectToArray': {'$ifNull': ['$dias', {}]}}}},
+        {'$unwind': '$dia'},
+        {'$project': {
+            'fecha': {'$dateFromParts': {
+                'year': {'$year': '$mes'},
+                'month': {'$month': '$mes'},
+                'day': {'$toInt': '$dia.k'},
+            }},
+            'leccionesCompletadas': {'$ifNull': ['$dia.v.leccionesCompletadas', 0]},
+            'tominsGanados': {'$ifNull': ['$dia.v.tominsGanados', 0]},
+            'tiempoEstudio': {'$ifNull': ['$dia.v.tiempoEstudio', 0]},
+        }},
+        {'$match': {'fecha': {'$gte': inicio, '$lte': fin}}},
+        {'$facet': {
+            'historial': [
+                {'$sort': {'fecha': -1}},
+                {'$project': {
+                    '_id': 0,
+                    'fecha': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$fecha'}},
+                    'leccionesCompletadas': 1,
+                    'tominsGanados': 1,
+                    'tiempoEstudio': 1,
+                }},
+            ],
+            'resumen': [
+                {'$group': {
+                    '_id': None,
+                    'dias': {'$sum': 1},
+                    'totalLecciones': {'$sum': '$leccionesCompletadas'},
+                    'totalTomins': {'$sum': '$tominsGanados'},
+                    'totalTiempoMinutos': {'$sum': '$tiempoEstudio'},
+                }},
+                {'$project': {
+                    '_id': 0,
+                    'dias': 1,
+                    'totalLecciones': 1,
+                    'totalTomins': 1,
+                    'totalTiempoMinutos': 1,
+                    'totalTiempoHoras': {'$round': [{'$divide': ['$totalTiempoMinutos', 60]}, 2]},
+                    'promedioLeccionesPorDia': {'$round': [{'$divide': ['$totalLecciones', '$dias']}, 2]},
+                    'promedioTominsPorDia': {'$round': [{'$divide': ['$totalTomins', '$dias']}, 2]},
+                    'promedioTiempoPorDia': {'$round': [{'$divide': ['$totalTiempoMinutos', '$dias']}, 2]},
+                }},
+            ],
+        }},
+    ]
+
+
+# Resumen de un rango sin actividad
+RESUMEN_VACIO = {
+    'dias': 0,
+    'totalLecciones': 0,
+    'totalTomins': 0,
+    'totalTiempoMinutos': 0,
+    'totalTiempoHoras': 0,
+    'promedioLeccionesPorDia': 0,
+    'promedioTominsPorDia': 0,
+    'promedioTiempoPorDia': 0,
+}
+
+
+def resumen_actividad(usuario_id: str, desde: date, hasta: date = None) -> tuple:
+    """
+    Historial y resumen de la actividad en un rango (una agregación).
+
+    Args:
+        usuario_id (str): ID del usuario
+        desde (date): Primer día (inclusive)
+        hasta (date, optional): Último día (inclusive, default: hoy)
+
+    Returns:
+        tuple: (historial, resumen). historial es una lista de dicts
+            {fecha 'AAAA-MM-DD', leccionesCompletadas, tominsGanados,
+            tiempoEstudio} del más reciente al más antiguo; resumen incluye
+            'dias' (días con actividad), totales y promedios por día.
+    """
+    from mongoengine.connection import get_db
+
+    hasta = hasta or datetime.utcnow().date()
+    resultado = next(
+        get_db()[COLECCION].aggregate(pipeline_actividad(usuario_id, desde, hasta)), {}
+    )
+
+    resumen = resultado.get('resumen') or [RESUMEN_VACIO]
+    return resultado.get('historial', []), dict(resumen[0])
+
+
+def codificar_mapa(palabras: dict) -> bytes:
+    """
+    Convierte las palabras de 64 bits del mapa anual en 46 bytes.
+
+    El bit d (día d del año) queda en el byte d // 8, bit d % 8.
+
+    Args:
+        palabras (dict): Campo `bits` del documento ({'0': Int64, ...})
+
+    Returns:
+        bytes: Mapa de días con actividad
+    """
+    datos = b''.join(
+        (int(palabras.get(str(i), 0)) & 0xFFFFFFFFFFFFFFFF).to_bytes(8, 'little')
+        for i in range(PALABRAS_MAPA)
+    )
+    return datos[:BYTES_MAPA]
+
+
+def codificar_intensidad(lecciones: dict, dias: int) -> bytes:
+    """
+    Lecciones por día como un byte por día (saturado en 255).
+
+    Args:
+        lecciones (dict): Campo `lecciones` del documento ({'<d>': cantidad})
+        dias (int): Días del año (365 o 366)
+
+    Returns:
+        bytes: Intensidad de cada día
+    """
+    intensidad = bytearray(dias)
+    for dia, cantidad in lecciones.items():
+        indice = int(dia)
+        if 0 <= indice < dias:
+            intensidad[indice] = max(0, min(int(cantidad), 255))
+    return bytes(intensidad)
+
+
+def obtener_mapa_anual(usuario_id: str, anio: int, con_intensidad: bool = False) -> dict:
+    """
+    Lee el mapa anual de actividad (un documento).
+
+    Args:
+        usuario_id (str): ID del usuario
+        anio (int): Año
+        con_intensidad (bool): Incluir las lecciones por día
+
+    Returns:
+        dict: {'mapa': bytes, 'intensidad': bytes o None, 'dias': int}
+    """
+    from mongoengine.connection import get_db
+
+    proyeccion = {'bits': 1, 'lecciones': 1} if con_intensidad else {'bits': 1}
+    documento = get_db()[COLECCION_ANUAL].find_one({'_id': id_anual(usuario_id, anio)}, proyeccion) or {}
+
+    dias = dia_del_anio(date(anio, 12, 31)) + 1
+    return {
+        'mapa': codificar_mapa(documento.get('bits', {})),
+        'intensidad': (
+            codificar_intensidad(documento.get('lecciones', {}), dias) if con_intensidad else None
+        ),
+        'dias': dias,
+    }
@@ -0,0 +1,225 @@
+"""
+Motor de completado de lecciones: un update por colección.
+
+RENDIMIENTO: Completar una lección hacía un $inc de tomins, un save() del
+usuario, la lectura (o inserción y relectura) de la racha, un save() de la
+racha por actualizar_racha, otro por registrar_actividad y uno por cada logro
+desbloqueado, más otro save() del usuario si se completaba el nivel. Este
+módulo ejecuta la misma lógica de dominio (UsuarioMixin / RachaMixin) con el
+guardado diferido y aplica el resultado con:
+
+    1. un find_one_and_update sobre `usuarios` (lección, tomins, prefijo
+       contiguo, contadores de tema y palabras, nivel), condicionado a que la lección no esté completada
+    2. un update_one con upsert sobre `rachas` (racha, totales y logros)
+    3. un update_one con upsert sobre `actividad_mensual` ($inc de los
+       contadores del día) y otro sobre `actividad_anual` ($bit del día en
+       el mapa del heatmap), ver apps.progreso.actividad
+
+La única lectura es la de la racha; la lección y las lecciones del nivel
+salen del catálogo en memoria y los temas para logros de temasCompletados
+(o, si el usuario aún no está migrado, del catálogo en memoria).
+
+Consistencia:
+    El filtro {'leccionesCompletadas': {'$ne': leccion_id}} evita otorgar
+    dos veces la recompensa si llegan dos peticiones simultáneas. Con
+    COMPLETADO_USAR_TRANSACCION=True (requiere replica set) los updates
+    se aplican en una transacción; sin ella, un fallo entre ellos deja la
+    lección completada sin actualizar la racha o la actividad.
+
+Uso:
+    from apps.progreso.completion_engine import completar_leccion
+
+    resultado = completar_leccion(request.user, leccion_data)
+"""
+from datetime import datetime
+from django.conf import settings
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from apps.autenticacion.request_context import obtener_documento
+from . import logros
+from .read_models import RachaLigera
+
+# Minutos de estudio estimados por lección completada
+TIEMPO_ESTUDIO_POR_LECCION = 10
+
+
+class LeccionYaCompletada(ValueError):
+    """Otra petición completó la lección antes de aplicar los cambios."""
+
+    def __init__(self):
+        super().__init__('Ya completaste esta lección')
+
+
+class ResultadoCompletado:
+    """
+    Resultado de completar una lección.
+
+    Atributos:
+        tomins_ganados (int): Recompensa otorgada
+        logros_nuevos (list): IDs de logros desbloqueados
+        nivel_completado (bool): Si se completó el nivel de la lección
+        racha (RachaLigera): Racha ya actualizada
+    """
+
+    __slots__ = ('tomins_ganados', 'logros_nuevos', 'nivel_completado', 'racha')
+
+    def __init__(self, tomins_ganados: int, logros_nuevos: list, nivel_completado: bool, racha):
+        self.tomins_ganados = tomins_ganados
+        self.logros_nuevos = logros_nuevos
+        self.nivel_completado = nivel_completado
+        self.racha = racha
+
+
+def _cargar_racha_diferida(usuario_id: str) -> RachaLigera:
+    """Racha del usuario sin crearla (el update final usa upsert)."""
+    racha_data = obtener_documento('rachas', usuario_id, campo='usuario_id')
+    if not racha_data:
+        racha_data = {
+            '_id': None,
+            'usuario_id': usuario_id,  # createdAt se asigna con $setOnInsert
+        }
+
+    racha = RachaLigera(racha_data)
+    racha.diferir_guardado()
+    return racha
+
+
+def calcular_cambios(usuario, leccion_data: dict):
+    """
+    Aplica en memoria todos los cambios de completar la lección.
+
+    Args:
+        usuario (UsuarioLigero): Usuario autenticado
+        leccion_data (dict): Documento de la lección (catálogo)
+
+    Returns:
+        ResultadoCompletado: Resultado (los objetos quedan con cambios pendientes)
+    """
+    from apps.lecciones.catalogo import catalogo
+
+    leccion_id = leccion_data['_id']
+    tomins_recompensa = leccion_data.get('tominsAlCompletar', 5)
+
+    usuario.diferir_guardado()
+    usuario.completar_leccion(
+        leccion_id, tomins_recompensa,
+        tema=leccion_data.get('tema'),
+        palabras=catalogo.cantidad_palabras(leccion_id)
+    )
+
+    racha = _cargar_racha_diferida(str(usuario.id))
+    info_racha = racha.actualizar_racha()
+    racha.registrar_actividad(
+        lecciones_completadas=1,
+        tomins_ganados=tomins_recompensa,
+        tiempo_estudio=TIEMPO_ESTUDIO_POR_LECCION
+    )
+
+    # Solo se evalúan los logros de las estadísticas que cambiaron
+    # TEMAS se evalúa siempre: con el contador es O(1), y así un usuario que
+    # cruzó el umbral antes de migrar temasCompletados recibe el logro en su
+    # siguiente lección. Si el contador no cuadra (usuario sin migrar) se
+    # cuentan los temas de las lecciones completadas.
+    cambiadas = {logros.LECCIONES, logros.TOMINS, logros.TEMAS}
+    if info_racha.get('incremento'):
+        cambiadas.add(logros.RACHA)
+
+    logros_nuevos = racha.verificar_logros_automaticos(
+        lecciones_completadas=usuario.leccionesCompletadas,
+        temas_completados=usuario.temas_completados_confiables(),
+        cambiadas=cambiadas
+    )
+
+    # Completar el nivel si ya están todas sus lecciones
+    nivel_id = leccion_data.get('nivel_id', 1)
+    indice = usuario.indice_progreso
+    nivel_completado = False
+    if (nivel_id not in usuario.nivelesCompletados
+            and all(indice.completada(lid) for lid in catalogo.ids_de_nivel(nivel_id))):
+        usuario.completar_nivel(nivel_id)
+        nivel_completado = True
+
+    return ResultadoCompletado(tomins_recompensa, logros_nuevos, nivel_completado, racha)
+
+
+def aplicar_cambios(usuario, leccion_id: int, racha: RachaLigera, session=None) -> None:
+    """
+    Persiste los cambios pendientes con un update por colección.
+
+    Args:
+        usuario (UsuarioLigero): Usuario con cambios diferidos
+        leccion_id (int): Lección completada (condición del update)
+        racha (RachaLigera): Racha con cambios diferidos
+        session: Sesión de PyMongo (transacción) o None
+
+    Raises:
+        LeccionYaCompletada: Si otra petición la completó primero
+    """
+    from mongoengine.connection import get_db
+
+    db = get_db()
+
+    usuario_data = db.usuarios.find_one_and_update(
+        {'_id': usuario.id, 'leccionesCompletadas': {'$ne': leccion_id}},
+        usuario.operaciones_actualizacion(),
+        projection={'tomin': 1},
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+    if usuario_data is None:
+        raise LeccionYaCompletada()
+
+    operaciones_racha = racha.operaciones_actualizacion()
+    if racha.id is None:
+        operaciones_racha['$setOnInsert'] = {'createdAt': datetime.utcnow()}
+
+    try:
+        db.rachas.update_one(
+            {'usuario_id': racha.usuario_id}, operaciones_racha, upsert=True, session=session
+        )
+    except DuplicateKeyError:
+        # Dos primeros completados simultáneos: la otra petición insertó la racha
+        operaciones_racha.pop('$setOnInsert', None)
+        db.rachas.update_one({'usuario_id': racha.usuario_id}, operaciones_racha, session=session)
+
+    # Actividad del día: $inc en el documento del mes y $bit en el mapa anual
+    for coleccion, filtro, operaciones in racha.operaciones_actividad_pendientes():
+        db[coleccion].update_one(filtro, operaciones, upsert=True, session=session)
+
+    # Valor atómico devuelto por MongoDB (incluye compras concurrentes)
+    usuario._sincronizar_campo('tomin', usuario_data['tomin'])
+
+
+def completar_leccion(usuario, leccion_data: dict) -> ResultadoCompletado:
+    """
+    Completa una lección para el usuario con un update por colección.
+
+    Las validaciones de acceso (lección bloqueada o ya completada) las hace
+    la vista antes de llamar a esta función.
+
+    Args:
+        usuario (UsuarioLigero): Usuario autenticado
+        leccion_data (dict): Documento de la lección
+
+    Returns:
+        ResultadoCompletado: Recompensa, logros nuevos y racha actualizada
+
+    Raises:
+        LeccionYaCompletada: Si una petición concurrente la completó primero
+    """
+    resultado = calcular_cambios(usuario, leccion_data)
+    leccion_id = leccion_data['_id']
+
+    if getattr(settings, 'COMPLETADO_USAR_TRANSACCION', False):
+        from mongoengine.connection import get_db
+
+        with get_db().client.start_session() as session:
+            session.with_transaction(
+                lambda s: aplicar_cambios(usuario, leccion_id, resultado.racha, session=s)
+            )
+    else:
+        aplicar_cambios(usuario, leccion_id, resultado.racha)
+
+    usuario.marcar_guardado()
+    resultado.racha.marcar_guardado()
+    return resultado
@@ -0,0 +1,148 @@
+"""
+Registro declarativo de logros.
+
+Cada logro es una regla "estadística >= umbral". La misma definición la usan
+la verificación automática (RachaMixin.verificar_logros_automaticos) y el
+listado del frontend (serializar_logros_disponibles_frontend).
+
+RENDIMIENTO: Las reglas se evalúan en una sola pasada contra un snapshot de
+estadísticas que ya está en memoria (racha y temasCompletados del usuario).
+Las reglas de cada estadística están ordenadas por umbral, así que la
+evaluación se detiene en el primer umbral no alcanzado, y con `cambiadas`
+solo se evalúan las estadísticas que cambiaron. Agregar un logro no agrega
+consultas: los nuevos se guardan con un único $push $each.
+
+Estadísticas:
+    lecciones: totalLeccionesCompletadas de la racha
+    racha: rachaActual
+    tomins: totalTominsGanados
+    temas: temas distintos completados (claves de temasCompletados)
+
+Uso:
+    from apps.progreso.logros import evaluar_logros
+
+    reglas = evaluar_logros({'lecciones': 10, 'racha': 3}, desbloqueados={'primera_leccion'})
+"""
+
+LECCIONES = 'lecciones'
+RACHA = 'racha'
+TOMINS = 'tomins'
+TEMAS = 'temas'
+
+
+class ReglaLogro:
+    """
+    Definición de un logro.
+
+    Atributos:
+        id (str): ID único (se guarda en logrosDesbloqueados)
+        nombre (str): Nombre visible
+        descripcion (str): Descripción visible
+        icono (str): Emoji del logro
+        requisito (str): Texto del requisito para el frontend
+        estadistica (str): Estadística que evalúa (LECCIONES, RACHA, TOMINS, TEMAS)
+        umbral (int): Valor mínimo para desbloquearlo
+    """
+
+    __slots__ = ('id', 'nombre', 'descripcion', 'icono', 'requisito', 'estadistica', 'umbral')
+
+    def __init__(self, id: str, nombre: str, descripcion: str, icono: str,
+                 requisito: str, estadistica: str, umbral: int):
+        self.id = id
+        self.nombre = nombre
+        self.descripcion = descripcion
+        self.icono = icono
+        self.requisito = requisito
+        self.estadistica = estadistica
+        self.umbral = umbral
+
+    def campos(self, fecha) -> dict:
+        """
+        Subdocumento para logrosDesbloqueados.
+
+        Args:
+            fecha (datetime): Fecha de desbloqueo
+
+        Returns:
+            dict: {id, nombre, descripcion, icono, fechaDesbloqueo}
+        """
+        return {
+            'id': self.id,
+            'nombre': self.nombre,
+            'descripcion': self.descripcion,
+            'icono': self.icono,
+            'fechaDesbloqueo': fecha,
+        }
+
+
+# Orden de presentación en el frontend
+LOGROS = (
+    ReglaLogro('primera_leccion', 'Primera Lección', 'Completa tu primera lección', '🎯',
+               'Completar 1 lección', LECCIONES, 1),
+    ReglaLogro('estudiante_dedicado', 'Estudiante Dedicado', 'Completa 5 lecciones', '📚',
+               'Completar 5 lecciones', LECCIONES, 5),
+    ReglaLogro('lecciones_10', 'Aprendiz Constante', 'Completa 10 lecciones', '📖',
+               'Completar 10 lecciones', LECCIONES, 10),
+    ReglaLogro('lecciones_50', 'Tlamatini', 'Completa 50 lecciones', '🎓',
+               'Completar 50 lecciones', LECCIONES, 50),
+    ReglaLogro('racha_3', 'Racha de 3 Días', 'Estudia 3 días seguidos', '🔥',
+               'Racha de 3 días', RACHA, 3),
+    ReglaLogro('racha_7', 'Racha de 7 Días', 'Estudia 7 días seguidos', '⚡',
+               'Racha de 7 días', RACHA, 7),
+    ReglaLogro('racha_30', 'Racha de 30 Días', 'Estudia 30 días seguidos', '🌞',
+               'Racha de 30 días', RACHA, 30),
+    ReglaLogro('explorador', 'Explorador', 'Completa lecciones de 2 temas diferentes', '🗺️',
+               'Completar 2 temas diferentes', TEMAS, 2),
+    ReglaLogro('coleccionista', 'Coleccionista', 'Acumula 50 tomins', '💰',
+               'Acumular 50 tomins', TOMINS, 50),
+    ReglaLogro('rico', 'Rico', 'Acumula 100 tomins', '💎',
+               'Acumular 100 tomins', TOMINS, 100),
+    ReglaLogro('millonario', 'Millonario', 'Acumula 1000 tomins', '👑',
+               'Acumular 1000 tomins', TOMINS, 1000),
+)
+
+LOGROS_POR_ID = {regla.id: regla for regla in LOGROS}
+
+# Reglas agrupadas por estadística y ordenadas por umbral
+REGLAS_POR_ESTADISTICA = {}
+for _regla in sorted(LOGROS, key=lambda regla: regla.umbral):
+    REGLAS_POR_ESTADISTICA.setdefault(_regla.estadistica, []).append(_regla)
+del _regla
+
+
+def evaluar_logros(estadisticas: dict, desbloqueados, cambiadas=None) -> list:
+    """
+    Retorna las reglas alcanzadas que aún no están desbloqueadas.
+
+    Args:
+        estadisticas (dict): {estadistica: valor}; las que falten no se evalúan
+        desbloqueados (set): IDs de logros ya desbloqueados
+        cambiadas (set, optional): Estadísticas que cambiaron. Si se indica,
+            solo se evalúan sus reglas.
+
+    Returns:
+        list: ReglaLogro a desbloquear, en orden de umbral
+    """
+    nuevas = []
+    for estadistica, valor in estadisticas.items():
+        if cambiadas is not None and estadistica not in cambiadas:
+            continue
+        for regla in REGLAS_POR_ESTADISTICA.get(estadistica, ()):
+            if regla.umbral > valor:
+                break
+            if regla.id not in desbloqueados:
+                nuevas.append(regla)
+    return nuevas
+
+
+def pendientes(estadistica: str, desbloqueados) -> bool:
+    """
+    Indica si queda algún logro por desbloquear de la estadística.
+
+    Permite omitir el cálculo de una estadística costosa cuando todos sus
+    logros ya están desbloqueados.
+    """
+    return any(
+        regla.id not in desbloqueados
+        for regla in REGLAS_POR_ESTADISTICA.get(estadistica, ())
+    )
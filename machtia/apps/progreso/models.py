@@ -45,48 +45,17 @@ class Logro(EmbeddedDocument):
         return f"{self.icono} {self.nombre}"
 
 
-class Racha(Document):
+class RachaMixin:
     """
-    Modelo de Racha (Streak) para tracking de días consecutivos de estudio.
+    Lógica de dominio de la racha (días consecutivos, actividad y logros).
 
-    Campos:
-        usuario_id (str): ID del usuario (referencia a Usuario)
-        rachaActual (int): Días consecutivos actuales
-        rachaMaxima (int): Racha más larga alcanzada
-        ultimaActividad (datetime): Última vez que estudió
-        diasActivos (list): Lista de actividades diarias
-        logrosDesbloqueados (list): Lista de logros obtenidos
-        totalLeccionesCompletadas (int): Total histórico de lecciones
-        totalTominsGanados (int): Total histórico de tomins
+    RENDIMIENTO: La comparten el Document `Racha` y la vista de lectura
+    `RachaLigera` (apps.progreso.read_models). Los métodos con prefijo `_`
+    definen cómo se modifica el estado; RachaLigera los sobrescribe para
+    acumular operadores atómicos en lugar de reescribir el documento.
     """
-    # Referencia al usuario (usamos ObjectId como string)
-    usuario_id = StringField(required=True, unique=True)
-
-    # Racha
-    rachaActual = IntField(default=0, min_value=0)
-    rachaMaxima = IntField(default=0, min_value=0)
-    ultimaActividad = DateTimeField(default=None)
-
-    # Historial de actividad diaria
-    diasActivos = ListField(EmbeddedDocumentField(ActividadDiaria), default=list)
-
-    # Logros
-    logrosDesbloqueados = ListField(EmbeddedDocumentField(Logro), default=list)
-
-    # Estadísticas totales
-    totalLeccionesCompletadas = IntField(default=0, min_value=0)
-    totalTominsGanados = IntField(default=0, min_value=0)
-    totalTiempoEstudio = IntField(default=0, min_value=0)  # en minutos
-
-    # Timestamps
-    createdAt = DateTimeField(default=datetime.utcnow)
-    updatedAt = DateTimeField(default=datetime.utcnow)
 
-    # Configuración de la colección MongoDB
-    meta = {
-        'collection': 'rachas',
-        'indexes': ['usuario_id', 'ultimaActividad']
-    }
+    __slots__ = ()
 
     def __str__(self) -> str:
         return f"Racha de usuario {self.usuario_id}: {self.rachaActual} días"
@@ -164,40 +133,23 @@ class Racha(Document):
         """
         Registra la actividad del día de hoy.
 
+        RENDIMIENTO: La actividad diaria se suma con $inc al documento del
+        mes en `actividad_mensual` (ver apps.progreso.actividad); la racha
+        solo guarda los totales.
+
         Args:
             lecciones_completadas (int): Número de lecciones completadas hoy
             tomins_ganados (int): Tomins ganados hoy
             tiempo_estudio (int): Minutos de estudio (estimado)
         """
-        hoy = datetime.utcnow().date()
-
-        # Buscar si ya existe actividad de hoy
-        actividad_hoy = None
-        for actividad in self.diasActivos:
-            if actividad.fecha.date() == hoy:
-                actividad_hoy = actividad
-                break
-
-        # Si ya existe, actualizar
-        if actividad_hoy:
-            actividad_hoy.leccionesCompletadas += lecciones_completadas
-            actividad_hoy.tominsGanados += tomins_ganados
-            actividad_hoy.tiempoEstudio += tiempo_estudio
-        else:
-            # Crear nueva actividad
-            nueva_actividad = ActividadDiaria(
-                fecha=datetime.utcnow(),
-                leccionesCompletadas=lecciones_completadas,
-                tominsGanados=tomins_ganados,
-                tiempoEstudio=tiempo_estudio
-            )
-            self.diasActivos.append(nueva_actividad)
+        ahora = datetime.utcnow()
+        self._registrar_actividad_del_dia(ahora, lecciones_completadas, tomins_ganados, tiempo_estudio)
 
         # Actualizar totales
-        self.totalLeccionesCompletadas += lecciones_completadas
-        self.totalTominsGanados += tomins_ganados
-        self.totalTiempoEstudio += tiempo_estudio
-        self.updatedAt = datetime.utcnow()
+        self._incrementar('totalLeccionesCompletadas', lecciones_completadas)
+        self._incrementar('totalTominsGanados', tomins_ganados)
+        self._incrementar('totalTiempoEstudio', tiempo_estudio)
+        self.updatedAt = ahora
 
         self.save()
 
@@ -215,102 +167,187 @@ class Racha(Document):
             bool: True si se desbloqueó (nuevo), False si ya lo tenía
         """
         # Verificar si ya tiene el logro
-        for logro in self.logrosDesbloqueados:
-            if logro.id == logro_id:
-                return False
+        if self._tiene_logro(logro_id):
+            return False
 
         # Desbloquear nuevo logro
-        nuevo_logro = Logro(
-            id=logro_id,
-            nombre=nombre,
-            descripcion=descripcion,
-            icono=icono,
-            fechaDesbloqueo=datetime.utcnow()
-        )
-
-        self.logrosDesbloqueados.append(nuevo_logro)
+        self._agregar_logro({
+            'id': logro_id,
+            'nombre': nombre,
+            'descripcion': descripcion,
+            'icono': icono,
+            'fechaDesbloqueo': datetime.utcnow()
+        })
         self.updatedAt = datetime.utcnow()
         self.save()
 
         return True
 
-    def verificar_logros_automaticos(self):
+    def verificar_logros_automaticos(self, lecciones_completadas: list = None,
+                                     temas_completados: dict = None, cambiadas=None):
         """
         Verifica y desbloquea logros basados en estadísticas automáticamente.
 
-        Logros disponibles (Beta - objetivos realistas):
-        - primera_leccion: Completar primera lección
-        - estudiante_dedicado: Completar 5 lecciones
-        - racha_3: Mantener racha de 3 días
-        - explorador: Completar lecciones de 2 temas diferentes
-        - coleccionista: Acumular 50 tomins
+        Las reglas están en apps.progreso.logros (LOGROS); se evalúan en una
+        pasada y los nuevos logros se guardan juntos (un solo save()).
+
+        Args:
+            lecciones_completadas (list, optional): IDs de lecciones completadas
+                por el usuario. Solo se usa para contar temas si no se indica
+                temas_completados; si también se omite, se lee el usuario.
+            temas_completados (dict, optional): temasCompletados del usuario
+                {tema: cantidad}, solo si es confiable (ver
+                UsuarioMixin.temas_completados_confiables). Si se indica, los
+                logros por tema no consultan las lecciones completadas.
+            cambiadas (set, optional): Estadísticas que cambiaron (ver
+                logros.LECCIONES, RACHA, TOMINS, TEMAS). Si se omite se
+                evalúan todas.
 
         Returns:
             list: Lista de logros desbloqueados en esta verificación
         """
-        logros_nuevos = []
-
-        # Primera lección
-        if self.totalLeccionesCompletadas >= 1:
-            if self.desbloquear_logro(
-                'primera_leccion',
-                'Primera Lección',
-                'Completa tu primera lección',
-                '🎯'
-            ):
-                logros_nuevos.append('primera_leccion')
-
-        # Estudiante dedicado - 5 lecciones
-        if self.totalLeccionesCompletadas >= 5:
-            if self.desbloquear_logro(
-                'estudiante_dedicado',
-                'Estudiante Dedicado',
-                'Completa 5 lecciones',
-                '📚'
-            ):
-                logros_nuevos.append('estudiante_dedicado')
-
-        # Racha de 3 días
-        if self.rachaActual >= 3:
-            if self.desbloquear_logro(
-                'racha_3',
-                'Racha de 3 Días',
-                'Estudia 3 días seguidos',
-                '🔥'
-            ):
-                logros_nuevos.append('racha_3')
-
-        # Explorador - completar lecciones de 2 temas diferentes
-        # Verificar temas únicos de las lecciones completadas
-        from mongoengine.connection import get_db
-        db = get_db()
-
-        # Obtener usuario para acceder a leccionesCompletadas
-        usuario_data = db.usuarios.find_one({'_id': self.usuario_id})
-        if usuario_data:
-            temas_unicos = set()
-            for leccion_id in usuario_data.get('leccionesCompletadas', []):
-                leccion_data = db.lecciones.find_one({'_id': leccion_id})
-                if leccion_data and 'tema' in leccion_data:
-                    temas_unicos.add(leccion_data['tema'])
-
-            if len(temas_unicos) >= 2:
-                if self.desbloquear_logro(
-                    'explorador',
-                    'Explorador',
-                    'Completa lecciones de 2 temas diferentes',
-                    '🗺️'
-                ):
-                    logros_nuevos.append('explorador')
-
-        # Coleccionista - 50 tomins
-        if self.totalTominsGanados >= 50:
-            if self.desbloquear_logro(
-                'coleccionista',
-                'Coleccionista',
-                'Acumula 50 tomins',
-                '💰'
-            ):
-                logros_nuevos.append('coleccionista')
-
-        return logros_nuevos
+        from . import logros
+
+        desbloqueados = self._ids_logros()
+        estadisticas = {
+            logros.LECCIONES: self.totalLeccionesCompletadas,
+            logros.RACHA: self.rachaActual,
+            logros.TOMINS: self.totalTominsGanados,
+        }
+
+        # RENDIMIENTO: Los temas distintos son las claves de temasCompletados
+        # (contador mantenido al completar cada lección)
+        if temas_completados is not None:
+            estadisticas[logros.TEMAS] = len(temas_completados)
+        elif ((cambiadas is None or logros.TEMAS in cambiadas)
+                and logros.pendientes(logros.TEMAS, desbloqueados)):
+            estadisticas[logros.TEMAS] = self._contar_temas_de_lecciones(
+                lecciones_completadas, limite=logros.REGLAS_POR_ESTADISTICA[logros.TEMAS][-1].umbral
+            )
+
+        reglas = logros.evaluar_logros(estadisticas, desbloqueados, cambiadas)
+        return self.desbloquear_logros(reglas)
+
+    def desbloquear_logros(self, reglas) -> list:
+        """
+        Desbloquea varios logros con un solo save().
+
+        Args:
+            reglas (list): ReglaLogro a desbloquear (las ya obtenidas se omiten)
+
+        Returns:
+            list: IDs de los logros desbloqueados
+        """
+        ahora = datetime.utcnow()
+        desbloqueados = self._ids_logros()
+        nuevos = []
+
+        for regla in reglas:
+            if regla.id in desbloqueados:
+                continue
+            desbloqueados.add(regla.id)
+            self._agregar_logro(regla.campos(ahora))
+            nuevos.append(regla.id)
+
+        if nuevos:
+            self.updatedAt = ahora
+            self.save()
+
+        return nuevos
+
+    def _contar_temas_de_lecciones(self, lecciones_completadas: list = None, limite: int = None) -> int:
+        """
+        Cuenta los temas distintos recorriendo las lecciones completadas.
+
+        Se usa cuando temasCompletados no cuenta todas las lecciones
+        completadas (usuarios sin migrar, ver
+        UsuarioMixin.temas_completados_confiables) o no se indicó.
+
+        Args:
+            lecciones_completadas (list, optional): IDs de lecciones completadas.
+                Si se omite, se lee el usuario de MongoDB.
+            limite (int, optional): Deja de contar al alcanzar este número de temas
+
+        Returns:
+            int: Temas distintos (como máximo `limite`)
+        """
+        from bson import ObjectId
+        from apps.autenticacion.request_context import obtener_documento
+        from apps.lecciones.catalogo import catalogo
+
+        if lecciones_completadas is None:
+            # Obtener usuario para acceder a leccionesCompletadas
+            usuario_data = obtener_documento('usuarios', ObjectId(self.usuario_id))
+            lecciones_completadas = usuario_data.get('leccionesCompletadas', []) if usuario_data else []
+
+        temas_unicos = set()
+        for leccion_id in lecciones_completadas:
+            leccion_data = catalogo.leccion(leccion_id)
+            if leccion_data and 'tema' in leccion_data:
+                temas_unicos.add(leccion_data['tema'])
+                if limite is not None and len(temas_unicos) >= limite:
+                    break
+        return len(temas_unicos)
+
+    def _registrar_actividad_del_dia(self, fecha, lecciones: int, tomins: int, tiempo: int) -> None:
+        """Suma la actividad al bucket mensual (upsert inmediato)."""
+        from .actividad import registrar_actividad
+
+        registrar_actividad(self.usuario_id, fecha, lecciones, tomins, tiempo)
+
+    def _incrementar(self, campo: str, cantidad: int) -> None:
+        setattr(self, campo, getattr(self, campo) + cantidad)
+
+    def _tiene_logro(self, logro_id: str) -> bool:
+        return any(logro.id == logro_id for logro in self.logrosDesbloqueados)
+
+    def _ids_logros(self) -> set:
+        return {logro.id for logro in self.logrosDesbloqueados}
+
+    def _agregar_logro(self, campos: dict) -> None:
+        self.logrosDesbloqueados.append(Logro(**campos))
+
+
+class Racha(RachaMixin, Document):
+    """
+    Modelo de Racha (Streak) para tracking de días consecutivos de estudio.
+
+    Campos:
+        usuario_id (str): ID del usuario (referencia a Usuario)
+        rachaActual (int): Días consecutivos actuales
+        rachaMaxima (int): Racha más larga alcanzada
+        ultimaActividad (datetime): Última vez que estudió
+        diasActivos (list): Legado; la actividad diaria está en `actividad_mensual`
+        logrosDesbloqueados (list): Lista de logros obtenidos
+        totalLeccionesCompletadas (int): Total histórico de lecciones
+        totalTominsGanados (int): Total histórico de tomins
+    """
+    # Referencia al usuario (usamos ObjectId como string)
+    usuario_id = StringField(required=True, unique=True)
+
+    # Racha
+    rachaActual = IntField(default=0, min_value=0)
+    rachaMaxima = IntField(default=0, min_value=0)
+    ultimaActividad = DateTimeField(default=None)
+
+    # Legado: la actividad diaria vive en `actividad_mensual` (apps.progreso.actividad).
+    # migrar_actividad_mensual.py mueve el historial existente y elimina el campo.
+    diasActivos = ListField(EmbeddedDocumentField(ActividadDiaria), default=list)
+
+    # Logros
+    logrosDesbloqueados = ListField(EmbeddedDocumentField(Logro), default=list)
+
+    # Estadísticas totales
+    totalLeccionesCompletadas = IntField(default=0, min_value=0)
+    totalTominsGanados = IntField(default=0, min_value=0)
+    totalTiempoEstudio = IntField(default=0, min_value=0)  # en minutos
+
+    # Timestamps
+    createdAt = DateTimeField(default=datetime.utcnow)
+    updatedAt = DateTimeField(default=datetime.utcnow)
+
+    # Configuración de la colección MongoDB
+    meta = {
+        'collection': 'rachas',
+        'indexes': ['usuario_id', 'ultimaActividad']
+    }
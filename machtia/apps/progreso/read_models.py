@@ -0,0 +1,252 @@
+"""
+Vista de lectura ligera (sin mongoengine) de la racha del usuario.
+
+RENDIMIENTO: Reconstruir `Racha` convertía cada entrada de
+logrosDesbloqueados en un EmbeddedDocument. `RachaLigera` guarda el dict
+crudo de PyMongo, decodifica la lista solo si alguien la lee y comparte la
+lógica de dominio con `Racha` a través de `RachaMixin`. La actividad diaria
+no forma parte de la racha (ver apps.progreso.actividad).
+
+save() traduce los cambios a operadores atómicos:
+    - $set para campos asignados (rachaActual, ultimaActividad, ...)
+    - $inc para totales
+    - $push para logros nuevos
+    - upserts en `actividad_mensual` y `actividad_anual` para la actividad del día
+
+Con diferir_guardado() los métodos de dominio no escriben; quien difiere
+aplica operaciones_actualizacion() y operaciones_actividad_pendientes() una
+sola vez (ver completion_engine).
+
+Uso:
+    from apps.progreso.read_models import cargar_racha
+
+    racha = cargar_racha(str(usuario.id))
+    racha.registrar_actividad(lecciones_completadas=1, tomins_ganados=5)
+"""
+from datetime import datetime
+from pymongo.errors import DuplicateKeyError
+from apps.autenticacion.request_context import obtener_documento, registrar_documento, invalidar_documento
+from .actividad import operaciones_actividad
+from .models import RachaMixin
+
+# Campos escalares persistentes y su valor por defecto (mismos defaults que Racha)
+CAMPOS_RACHA = {
+    'usuario_id': None,
+    'rachaActual': 0,
+    'rachaMaxima': 0,
+    'ultimaActividad': None,
+    'totalLeccionesCompletadas': 0,
+    'totalTominsGanados': 0,
+    'totalTiempoEstudio': 0,
+    'createdAt': datetime.utcnow,
+    'updatedAt': datetime.utcnow,
+}
+
+
+class LogroLigero:
+    """Logro decodificado del subdocumento de logrosDesbloqueados."""
+
+    __slots__ = ('id', 'nombre', 'descripcion', 'icono', 'fechaDesbloqueo')
+
+    def __init__(self, logro_data: dict):
+        self.id = logro_data['id']
+        self.nombre = logro_data.get('nombre')
+        self.descripcion = logro_data.get('descripcion')
+        self.icono = logro_data.get('icono', '🏆')
+        self.fechaDesbloqueo = logro_data.get('fechaDesbloqueo')
+
+
+class RachaLigera(RachaMixin):
+    """
+    Racha decodificada del documento crudo de MongoDB.
+
+    Tiene los mismos atributos y métodos de dominio que `Racha`, por lo que
+    las vistas y serializadores la usan sin cambios.
+    """
+
+    __slots__ = (
+        'id', '_logros_raw', '_logros', '_actividad',
+        '_cambios', '_incrementos', '_nuevos', '_diferido'
+    ) + tuple(CAMPOS_RACHA)
+
+    def __init__(self, racha_data: dict):
+        """
+        Args:
+            racha_data (dict): Documento de la colección `rachas`
+        """
+        asignar = object.__setattr__
+        asignar(self, 'id', racha_data['_id'])
+
+        for campo, default in CAMPOS_RACHA.items():
+            valor = racha_data.get(campo)
+            if valor is None and default is not None:
+                valor = default() if callable(default) else default
+            asignar(self, campo, valor)
+
+        # Copia de la lista: el dict puede estar compartido en el mapa de identidad
+        asignar(self, '_logros_raw', list(racha_data.get('logrosDesbloqueados', [])))
+        asignar(self, '_logros', None)
+        asignar(self, '_actividad', None)  # [fecha, lecciones, tomins, tiempo] pendiente
+
+        asignar(self, '_cambios', set())
+        asignar(self, '_incrementos', {})
+        asignar(self, '_nuevos', {})
+        asignar(self, '_diferido', False)
+
+    def __setattr__(self, campo: str, valor) -> None:
+        object.__setattr__(self, campo, valor)
+        if campo in CAMPOS_RACHA:
+            self._cambios.add(campo)
+            self._incrementos.pop(campo, None)
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def logrosDesbloqueados(self) -> list:
+        """Logros desbloqueados (se decodifican en el primer acceso)."""
+        if self._logros is None:
+            object.__setattr__(self, '_logros', [LogroLigero(l) for l in self._logros_raw])
+        return self._logros
+
+    # ------------------------------------------------------------------
+    # Modificaciones (ver RachaMixin): acumulan operadores atómicos
+    # ------------------------------------------------------------------
+
+    def _registrar_actividad_del_dia(self, fecha, lecciones: int, tomins: int, tiempo: int) -> None:
+        # Se escribe en save() (o la aplica quien difirió el guardado)
+        pendiente = self._actividad
+        if pendiente is None:
+            object.__setattr__(self, '_actividad', [fecha, lecciones, tomins, tiempo])
+        else:
+            pendiente[1] += lecciones
+            pendiente[2] += tomins
+            pendiente[3] += tiempo
+
+    def _incrementar(self, campo: str, cantidad: int) -> None:
+        object.__setattr__(self, campo, getattr(self, campo) + cantidad)
+        if campo not in self._cambios:  # Un $set del campo ya incluye el incremento
+            self._incrementos[campo] = self._incrementos.get(campo, 0) + cantidad
+
+    def _tiene_logro(self, logro_id: str) -> bool:
+        return any(logro.get('id') == logro_id for logro in self._logros_raw)
+
+    def _ids_logros(self) -> set:
+        return {logro.get('id') for logro in self._logros_raw}
+
+    def _agregar_logro(self, campos: dict) -> None:
+        self._logros_raw.append(campos)
+        self._nuevos.setdefault('logrosDesbloqueados', []).append(campos)
+        object.__setattr__(self, '_logros', None)
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def operaciones_actualizacion(self) -> dict:
+        """
+        Traduce los cambios pendientes a operadores de actualización.
+
+        La actividad del día va en otro documento (ver
+        operaciones_actividad_pendientes).
+
+        Returns:
+            dict: Update para update_one (vacío si no hay cambios)
+        """
+        operaciones = {}
+
+        if self._cambios:
+            operaciones['$set'] = {campo: getattr(self, campo) for campo in self._cambios}
+        if self._incrementos:
+            operaciones['$inc'] = dict(self._incrementos)
+        if self._nuevos:
+            operaciones['$push'] = {
+                campo: {'$each': valores} for campo, valores in self._nuevos.items()
+            }
+
+        return operaciones
+
+    def operaciones_actividad_pendientes(self) -> list:
+        """
+        Upserts pendientes de la actividad del día (mensual y mapa anual).
+
+        Returns:
+            list: Tuplas (coleccion, filtro, update); vacía si no hay actividad
+        """
+        if self._actividad is None:
+            return []
+        return operaciones_actividad(self.usuario_id, *self._actividad)
+
+    def diferir_guardado(self) -> None:
+        """save() deja de escribir hasta marcar_guardado()."""
+        object.__setattr__(self, '_diferido', True)
+
+    def marcar_guardado(self) -> None:
+        """Descarta los cambios pendientes (ya aplicados por quien difirió)."""
+        self._cambios.clear()
+        self._incrementos.clear()
+        self._nuevos.clear()
+        object.__setattr__(self, '_actividad', None)
+        object.__setattr__(self, '_diferido', False)
+
+        # El documento cacheado en la petición ya no refleja MongoDB
+        invalidar_documento('rachas', self.usuario_id, campo='usuario_id')
+
+    def save(self) -> None:
+        """Persiste los cambios pendientes (un update por colección)."""
+        if self._diferido:
+            return
+
+        operaciones = self.operaciones_actualizacion()
+        actividad = self.operaciones_actividad_pendientes()
+        if not operaciones and not actividad:
+            return
+
+        from mongoengine.connection import get_db
+
+        db = get_db()
+        if operaciones:
+            db.rachas.update_one({'_id': self.id}, operaciones)
+        for coleccion, filtro, update in actividad:
+            db[coleccion].update_one(filtro, update, upsert=True)
+        self.marcar_guardado()
+
+
+def cargar_racha(usuario_id: str) -> RachaLigera:
+    """
+    Obtiene la racha del usuario o la crea si no existe.
+
+    Args:
+        usuario_id (str): ID del usuario
+
+    Returns:
+        RachaLigera: Racha del usuario
+    """
+    racha_data = obtener_documento('rachas', usuario_id, campo='usuario_id')
+
+    if not racha_data:
+        from mongoengine.connection import get_db
+
+        db = get_db()
+        ahora = datetime.utcnow()
+        racha_data = {
+            'usuario_id': usuario_id,
+            'rachaActual': 0,
+            'rachaMaxima': 0,
+            'logrosDesbloqueados': [],
+            'totalLeccionesCompletadas': 0,
+            'totalTominsGanados': 0,
+            'totalTiempoEstudio': 0,
+            'createdAt': ahora,
+            'updatedAt': ahora,
+        }
+        try:
+            db.rachas.insert_one(racha_data)
+        except DuplicateKeyError:
+            # Otra petición la creó al mismo tiempo (índice único en usuario_id)
+            racha_data = db.rachas.find_one({'usuario_id': usuario_id})
+
+        registrar_documento('rachas', racha_data, campo='usuario_id')
+
+    return RachaLigera(racha_data)
@@ -3,6 +3,7 @@ Serializadores para el módulo de progreso.
 Mapean los datos del backend a formato esperado por el frontend TypeScript.
 """
 from datetime import datetime, timedelta
+from .logros import LOGROS
 
 
 def serializar_racha_frontend(racha) -> dict:
@@ -75,11 +76,10 @@ def serializar_estadisticas_frontend(racha, usuario) -> dict:
     Returns:
         dict: Estadísticas serializadas para frontend
     """
-    from mongoengine.connection import get_db
-    db = get_db()
+    from apps.lecciones.catalogo import catalogo
 
-    # Contar total de lecciones
-    total_lecciones = db.lecciones.count_documents({})
+    # RENDIMIENTO: Total de lecciones desde el catálogo en memoria
+    total_lecciones = catalogo.total_lecciones()
 
     # Calcular progreso porcentual
     lecciones_completadas = len(usuario.leccionesCompletadas)
@@ -99,12 +99,8 @@ def serializar_estadisticas_frontend(racha, usuario) -> dict:
     else:
         nivel = 'Maestro'
 
-    # Calcular palabras aprendidas (cada lección tiene palabras)
-    palabras_aprendidas = 0
-    for leccion_id in usuario.leccionesCompletadas:
-        leccion_data = db.lecciones.find_one({'_id': leccion_id})
-        if leccion_data:
-            palabras_aprendidas += len(leccion_data.get('palabras', []))
+    # Palabras aprendidas: contador mantenido al completar cada lección
+    palabras_aprendidas = usuario.palabrasAprendidas
 
     # Tomins gastados = tomins ganados - tomins actuales
     tomins_gastados = racha.totalTominsGanados - usuario.tomin if racha.totalTominsGanados > usuario.tomin else 0
@@ -157,66 +153,29 @@ def serializar_logros_disponibles_frontend(racha) -> list:
     """
     Serializa todos los logros (desbloqueados y bloqueados) al formato del frontend.
 
+    Los logros disponibles se toman del registro apps.progreso.logros.LOGROS.
+
     Args:
         racha: Instancia de Racha
 
     Returns:
         list: Lista de todos los logros con su estado
     """
-    # Definir todos los logros disponibles (Beta - objetivos realistas)
-    logros_disponibles = [
-        {
-            'id': 'primera_leccion',
-            'nombre': 'Primera Lección',
-            'descripcion': 'Completa tu primera lección',
-            'icono': '🎯',
-            'requisito': 'Completar 1 lección',
-            'desbloqueado': False
-        },
-        {
-            'id': 'estudiante_dedicado',
-            'nombre': 'Estudiante Dedicado',
-            'descripcion': 'Completa 5 lecciones',
-            'icono': '📚',
-            'requisito': 'Completar 5 lecciones',
-            'desbloqueado': False
-        },
-        {
-            'id': 'racha_3',
-            'nombre': 'Racha de 3 Días',
-            'descripcion': 'Estudia 3 días seguidos',
-            'icono': '🔥',
-            'requisito': 'Racha de 3 días',
-            'desbloqueado': False
-        },
-        {
-            'id': 'explorador',
-            'nombre': 'Explorador',
-            'descripcion': 'Completa lecciones de 2 temas diferentes',
-            'icono': '🗺️',
-            'requisito': 'Completar 2 temas diferentes',
-            'desbloqueado': False
-        },
-        {
-            'id': 'coleccionista',
-            'nombre': 'Coleccionista',
-            'descripcion': 'Acumula 50 tomins',
-            'icono': '💰',
-            'requisito': 'Acumular 50 tomins',
-            'desbloqueado': False
+    # Fecha de desbloqueo por ID (una pasada sobre los logros del usuario)
+    fechas = {logro.id: logro.fechaDesbloqueo for logro in racha.logrosDesbloqueados}
+
+    logros_disponibles = []
+    for regla in LOGROS:
+        logro = {
+            'id': regla.id,
+            'nombre': regla.nombre,
+            'descripcion': regla.descripcion,
+            'icono': regla.icono,
+            'requisito': regla.requisito,
+            'desbloqueado': regla.id in fechas
         }
-    ]
-
-    # Marcar como desbloqueados los que el usuario tiene
-    ids_desbloqueados = {logro.id for logro in racha.logrosDesbloqueados}
-
-    for logro in logros_disponibles:
-        if logro['id'] in ids_desbloqueados:
-            logro['desbloqueado'] = True
-            # Buscar fecha de desbloqueo
-            for logro_desbloqueado in racha.logrosDesbloqueados:
-                if logro_desbloqueado.id == logro['id']:
-                    logro['fechaDesbloqueo'] = logro_desbloqueado.fechaDesbloqueo.strftime('%Y-%m-%dT%H:%M:%S.000Z')
-                    break
+        if regla.id in fechas:
+            logro['fechaDesbloqueo'] = fechas[regla.id].strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        logros_disponibles.append(logro)
 
     return logros_disponibles
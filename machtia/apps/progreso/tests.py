@@ -1,3 +1,448 @@
-from django.test import TestCase
+"""
+Tests para el módulo de progreso
+"""
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from mongoengine.connection import get_db
+from bson import ObjectId
+from apps.autenticacion.read_models import UsuarioLigero
+from apps.progreso.read_models import RachaLigera
+from apps.progreso.actividad import (
+    obtener_actividades, resumen_actividad, operacion_anual, obtener_mapa_anual,
+    registrar_actividad
+)
+from apps.progreso.completion_engine import completar_leccion, LeccionYaCompletada
+from apps.progreso import logros
+from apps.progreso.serializers import (
+    serializar_logros_disponibles_frontend, serializar_estadisticas_frontend
+)
 
-# Create your tests here.
+
+class RachaLigeraTest(SimpleTestCase):
+    """Tests para la vista ligera de la racha"""
+
+    def setUp(self):
+        self.db = mock.MagicMock()
+        patcher = mock.patch('mongoengine.connection.get_db', return_value=self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.ahora = datetime.utcnow()
+        self.racha_data = {
+            '_id': ObjectId(),
+            'usuario_id': 'u1',
+            'rachaActual': 2,
+            'rachaMaxima': 2,
+            'ultimaActividad': self.ahora - timedelta(days=1),
+            'logrosDesbloqueados': [{'id': 'primera_leccion', 'nombre': 'Primera Lección',
+                                     'descripcion': 'x', 'icono': '🎯'}],
+            'totalLeccionesCompletadas': 1,
+            'totalTominsGanados': 5,
+            'totalTiempoEstudio': 10,
+        }
+
+    def ultima_actualizacion(self):
+        filtro, operaciones = self.db.rachas.update_one.call_args[0]
+        self.assertEqual(filtro, {'_id': self.racha_data['_id']})
+        return operaciones
+
+    def test_actividad_va_al_bucket_mensual(self):
+        """Test: La actividad se suma con $inc al documento del mes"""
+        racha = RachaLigera(self.racha_data)
+        racha.registrar_actividad(lecciones_completadas=1, tomins_ganados=5, tiempo_estudio=10)
+
+        operaciones = self.ultima_actualizacion()
+        self.assertNotIn('$push', operaciones)
+        self.assertEqual(operaciones['$inc'], {
+            'totalLeccionesCompletadas': 1, 'totalTominsGanados': 5, 'totalTiempoEstudio': 10
+        })
+        self.assertIn('updatedAt', operaciones['$set'])
+
+        mensual, anual = self.db.__getitem__.return_value.update_one.call_args_list
+        filtro, update = mensual[0]
+        hoy = datetime.utcnow()
+        self.assertEqual(filtro, {'_id': f'u1:{hoy:%Y-%m}'})
+        self.assertEqual(update['$inc'], {
+            f'dias.{hoy.day}.leccionesCompletadas': 1,
+            f'dias.{hoy.day}.tominsGanados': 5,
+            f'dias.{hoy.day}.tiempoEstudio': 10,
+        })
+        self.assertEqual(update['$setOnInsert']['mes'], datetime(hoy.year, hoy.month, 1))
+        self.assertTrue(mensual[1]['upsert'])
+        self.assertEqual(anual[0][0], {'_id': f'u1:{hoy.year}'})
+        self.assertIn('$bit', anual[0][1])
+
+    def test_buckets_se_decodifican_por_rango(self):
+        """Test: Las actividades se leen por rango de _id y se filtran por fecha"""
+        self.db.__getitem__.return_value.find.return_value.sort.return_value = [
+            {'_id': 'u1:2025-01', 'mes': datetime(2025, 1, 1),
+             'dias': {'31': {'leccionesCompletadas': 2}, '5': {'leccionesCompletadas': 1}}},
+            {'_id': 'u1:2025-02', 'mes': datetime(2025, 2, 1),
+             'dias': {'1': {'leccionesCompletadas': 3, 'tiempoEstudio': 30}}},
+        ]
+
+        actividades = obtener_actividades('u1', date(2025, 1, 10), date(2025, 2, 28))
+
+        filtro = self.db.__getitem__.return_value.find.call_args[0][0]
+        self.assertEqual(filtro, {'_id': {'$gte': 'u1:2025-01', '$lte': 'u1:2025-02'}})
+        self.assertEqual([a.fecha for a in actividades], [datetime(2025, 1, 31), datetime(2025, 2, 1)])
+        self.assertEqual(actividades[1].tiempoEstudio, 30)
+        self.assertEqual(actividades[1].tominsGanados, 0)
+
+    def test_actualizar_racha_usa_set(self):
+        """Test: Estudiar al día siguiente incrementa la racha con $set"""
+        racha = RachaLigera(self.racha_data)
+        racha.actualizar_racha()
+
+        operaciones = self.ultima_actualizacion()
+        self.assertEqual(operaciones['$set']['rachaActual'], 3)
+        self.assertEqual(operaciones['$set']['rachaMaxima'], 3)
+
+    def test_logro_existente_no_se_repite(self):
+        """Test: Un logro ya desbloqueado no genera escritura"""
+        racha = RachaLigera(self.racha_data)
+        self.assertFalse(racha.desbloquear_logro('primera_leccion', 'x', 'y'))
+        self.db.rachas.update_one.assert_not_called()
+
+        self.assertTrue(racha.desbloquear_logro('racha_3', 'Racha de 3 Días', 'z', '🔥'))
+        operaciones = self.ultima_actualizacion()
+        self.assertEqual(operaciones['$push']['logrosDesbloqueados']['$each'][0]['id'], 'racha_3')
+        self.assertEqual([l.id for l in racha.logrosDesbloqueados], ['primera_leccion', 'racha_3'])
+
+
+class ResumenActividadTest(SimpleTestCase):
+    """Tests del historial de actividad calculado con agregación"""
+
+    def setUp(self):
+        self.db = mock.MagicMock()
+        self.coleccion = self.db.__getitem__.return_value
+        patcher = mock.patch('mongoengine.connection.get_db', return_value=self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_solo_lee_los_meses_del_rango(self):
+        """Test: El pipeline empieza con un rango sobre _id y devuelve el resumen"""
+        self.coleccion.aggregate.return_value = iter([{
+            'historial': [{'fecha': '2025-03-02', 'leccionesCompletadas': 2}],
+            'resumen': [{'dias': 1, 'totalLecciones': 2, 'promedioLeccionesPorDia': 2.0}],
+        }])
+
+        historial, resumen = resumen_actividad('u1', date(2025, 2, 10), date(2025, 3, 11))
+
+        self.db.__getitem__.assert_called_with('actividad_mensual')
+        pipeline = self.coleccion.aggregate.call_args[0][0]
+        self.assertEqual(pipeline[0], {'$match': {'_id': {'$gte': 'u1:2025-02', '$lte': 'u1:2025-03'}}})
+        self.assertEqual(historial[0]['fecha'], '2025-03-02')
+        self.assertEqual(resumen['totalLecciones'], 2)
+
+    def test_rango_sin_actividad(self):
+        """Test: Sin documentos el resumen queda en ceros"""
+        self.coleccion.aggregate.return_value = iter([{'historial': [], 'resumen': []}])
+
+        historial, resumen = resumen_actividad('u1', date(2025, 1, 1), date(2025, 1, 31))
+
+        self.assertEqual(historial, [])
+        self.assertEqual(resumen['dias'], 0)
+        self.assertEqual(resumen['promedioTiempoPorDia'], 0)
+
+
+class ResumenActividadMongoTest(TestCase):
+    """Tests del pipeline de actividad ejecutado en MongoDB"""
+
+    USUARIO = 'usuario-resumen-test'
+
+    @classmethod
+    def setUpClass(cls):
+        """Configuración inicial para todos los tests"""
+        from pymongo import MongoClient
+        from pymongo.errors import PyMongoError
+
+        # El pipeline solo se puede probar contra un servidor real
+        try:
+            with MongoClient(settings.MONGODB_URI, serverSelectionTimeoutMS=2000) as cliente:
+                cliente.admin.command('ping')
+        except PyMongoError:
+            raise unittest.SkipTest('Requiere un servidor MongoDB (MONGODB_URI)')
+
+        super().setUpClass()
+        cls.db = get_db()
+
+    def setUp(self):
+        """Buckets de enero a marzo; la ventana corta enero y marzo"""
+        self.limpiar()
+        for fecha, lecciones, tomins, tiempo in [
+            (datetime(2025, 1, 30), 9, 45, 90),   # Fuera (antes de la ventana)
+            (datetime(2025, 1, 31), 1, 5, 10),
+            (datetime(2025, 2, 1), 2, 10, 25),
+            (datetime(2025, 2, 10), 3, 0, 0),     # Sin tomins ni tiempo
+            (datetime(2025, 2, 28), 1, 5, 7),
+            (datetime(2025, 3, 1), 4, 20, 33),
+            (datetime(2025, 3, 2), 9, 45, 90),    # Fuera (después de la ventana)
+        ]:
+            registrar_actividad(self.USUARIO, fecha, lecciones, tomins, tiempo)
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        self.limpiar()
+
+    def limpiar(self):
+        self.db.actividad_mensual.delete_many({'usuario_id': self.USUARIO})
+        self.db.actividad_anual.delete_many({'usuario_id': self.USUARIO})
+
+    def test_historial_de_la_ventana(self):
+        """Test: Solo los días de la ventana, del más reciente al más antiguo"""
+        historial, resumen = resumen_actividad(self.USUARIO, date(2025, 1, 31), date(2025, 3, 1))
+
+        self.assertEqual(
+            [dia['fecha'] for dia in historial],
+            ['2025-03-01', '2025-02-28', '2025-02-10', '2025-02-01', '2025-01-31']
+        )
+        self.assertEqual(historial[2], {
+            'fecha': '2025-02-10', 'leccionesCompletadas': 3, 'tominsGanados': 0, 'tiempoEstudio': 0
+        })
+        self.assertEqual(resumen['dias'], 5)
+
+    def test_resumen_igual_al_calculo_en_python(self):
+        """Test: Totales y promedios iguales a los que se calculaban en la vista"""
+        desde, hasta = date(2025, 1, 31), date(2025, 3, 1)
+
+        _, resumen = resumen_actividad(self.USUARIO, desde, hasta)
+
+        actividades = obtener_actividades(self.USUARIO, desde, hasta)
+        dias = len(actividades)
+        total_lecciones = sum(a.leccionesCompletadas for a in actividades)
+        total_tomins = sum(a.tominsGanados for a in actividades)
+        total_tiempo = sum(a.tiempoEstudio for a in actividades)
+        self.assertEqual(resumen, {
+            'dias': dias,
+            'totalLecciones': total_lecciones,
+            'totalTomins': total_tomins,
+            'totalTiempoMinutos': total_tiempo,
+            'totalTiempoHoras': round(total_tiempo / 60, 2),
+            'promedioLeccionesPorDia': round(total_lecciones / dias, 2),
+            'promedioTominsPorDia': round(total_tomins / dias, 2),
+            'promedioTiempoPorDia': round(total_tiempo / dias, 2),
+        })
+        self.assertEqual(resumen['totalLecciones'], 11)
+        self.assertEqual(resumen['promedioTiempoPorDia'], 15.0)
+
+    def test_ventana_sin_actividad(self):
+        """Test: Un rango con buckets pero sin días dentro da el resumen vacío"""
+        historial, resumen = resumen_actividad(self.USUARIO, date(2025, 2, 11), date(2025, 2, 27))
+
+        self.assertEqual(historial, [])
+        self.assertEqual(resumen['dias'], 0)
+
+
+class MapaAnualTest(SimpleTestCase):
+    """Tests del mapa anual de actividad (heatmap)"""
+
+    def test_bit_del_dia_con_signo(self):
+        """Test: El día 63 usa el bit alto de la primera palabra como Int64"""
+        filtro, update = operacion_anual('u1', datetime(2025, 3, 5), lecciones=2)
+
+        self.assertEqual(filtro, {'_id': 'u1:2025'})
+        self.assertEqual(update['$bit'], {'bits.0': {'or': -(1 << 63)}})
+        self.assertEqual(update['$inc'], {'lecciones.63': 2})
+
+    def test_mapa_de_46_bytes_en_una_lectura(self):
+        """Test: El documento se codifica en 46 bytes y un byte de intensidad por día"""
+        db = mock.MagicMock()
+        db.__getitem__.return_value.find_one.return_value = {
+            'bits': {'0': -(1 << 63) | 1, '5': 1 << 45},
+            'lecciones': {'0': 3, '63': 300},
+        }
+        with mock.patch('mongoengine.connection.get_db', return_value=db):
+            mapa = obtener_mapa_anual('u1', 2024, con_intensidad=True)
+
+        db.__getitem__.assert_called_once_with('actividad_anual')
+        self.assertEqual(len(mapa['mapa']), 46)
+        self.assertEqual(mapa['dias'], 366)
+        activos = [d for d in range(366) if mapa['mapa'][d // 8] >> (d % 8) & 1]
+        self.assertEqual(activos, [0, 63, 365])
+        self.assertEqual(mapa['intensidad'][0], 3)
+        self.assertEqual(mapa['intensidad'][63], 255)
+
+
+class RegistroLogrosTest(SimpleTestCase):
+    """Tests del registro declarativo de logros"""
+
+    def test_evaluar_por_umbral(self):
+        """Test: Solo se devuelven reglas alcanzadas y no desbloqueadas"""
+        reglas = logros.evaluar_logros(
+            {logros.LECCIONES: 12, logros.RACHA: 7}, desbloqueados={'primera_leccion'}
+        )
+        self.assertEqual(
+            [r.id for r in reglas],
+            ['estudiante_dedicado', 'lecciones_10', 'racha_3', 'racha_7']
+        )
+
+    def test_solo_estadisticas_cambiadas(self):
+        """Test: Las reglas de estadísticas sin cambios no se evalúan"""
+        reglas = logros.evaluar_logros(
+            {logros.LECCIONES: 1, logros.TOMINS: 1000}, desbloqueados=set(),
+            cambiadas={logros.LECCIONES}
+        )
+        self.assertEqual([r.id for r in reglas], ['primera_leccion'])
+
+    def test_varios_logros_en_un_update(self):
+        """Test: Los logros nuevos se guardan con un solo $push $each"""
+        db = mock.Mock()
+        with mock.patch('mongoengine.connection.get_db', return_value=db):
+            racha = RachaLigera({
+                '_id': ObjectId(), 'usuario_id': 'u1', 'rachaActual': 30,
+                'totalLeccionesCompletadas': 50, 'totalTominsGanados': 120,
+                'logrosDesbloqueados': [{'id': 'primera_leccion', 'nombre': 'x', 'descripcion': 'y'}],
+            })
+            nuevos = racha.verificar_logros_automaticos(temas_completados={'saludos': 3})
+
+        self.assertEqual(db.rachas.update_one.call_count, 1)
+        operaciones = db.rachas.update_one.call_args[0][1]
+        self.assertEqual(
+            [l['id'] for l in operaciones['$push']['logrosDesbloqueados']['$each']], nuevos
+        )
+        self.assertEqual(set(nuevos), {
+            'estudiante_dedicado', 'lecciones_10', 'lecciones_50',
+            'racha_3', 'racha_7', 'racha_30', 'coleccionista', 'rico'
+        })
+
+    def test_serializador_usa_el_registro(self):
+        """Test: El listado del frontend incluye todas las reglas"""
+        racha = RachaLigera({
+            '_id': ObjectId(), 'usuario_id': 'u1',
+            'logrosDesbloqueados': [{'id': 'racha_7', 'nombre': 'x', 'descripcion': 'y',
+                                     'fechaDesbloqueo': datetime(2024, 5, 1)}],
+        })
+        serializados = serializar_logros_disponibles_frontend(racha)
+
+        self.assertEqual([l['id'] for l in serializados], [r.id for r in logros.LOGROS])
+        racha_7 = next(l for l in serializados if l['id'] == 'racha_7')
+        self.assertTrue(racha_7['desbloqueado'])
+        self.assertEqual(racha_7['fechaDesbloqueo'], '2024-05-01T00:00:00.000Z')
+
+
+class MotorCompletadoTest(SimpleTestCase):
+    """Tests del motor de completado de lecciones"""
+
+    def setUp(self):
+        self.db = mock.MagicMock()
+        self.db.__getitem__.side_effect = lambda coleccion: getattr(self.db, coleccion)
+        self.db.usuarios.find_one_and_update.return_value = {'tomin': 25}
+        self.db.rachas.find_one.return_value = None
+        patcher = mock.patch('mongoengine.connection.get_db', return_value=self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.catalogo = mock.Mock()
+        self.catalogo.ids_de_nivel.return_value = [1, 2]
+        self.catalogo.cantidad_palabras.return_value = 0
+        self.catalogo.leccion.side_effect = lambda lid: {'_id': lid, 'tema': 'saludos'}
+        patcher = mock.patch('apps.lecciones.catalogo.catalogo', self.catalogo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.usuario = UsuarioLigero({
+            '_id': ObjectId(), 'email': 'a@b.com', 'nombre': 'Ana', 'password': 'x',
+            'tomin': 20, 'leccionesCompletadas': [1], 'progresoContiguo': 1, 'leccionActual': 2
+        })
+        self.leccion = {'_id': 2, 'nivel_id': 1, 'tominsAlCompletar': 5}
+
+    def test_dos_escrituras_y_una_lectura(self):
+        """Test: Usuario y racha se guardan con un update cada uno"""
+        resultado = completar_leccion(self.usuario, self.leccion)
+
+        self.assertEqual(self.db.usuarios.find_one_and_update.call_count, 1)
+        self.assertEqual(self.db.rachas.update_one.call_count, 1)
+        self.assertEqual(self.db.rachas.find_one.call_count, 1)
+        self.db.usuarios.update_one.assert_not_called()
+        self.db.rachas.insert_one.assert_not_called()
+
+        filtro, operaciones = self.db.usuarios.find_one_and_update.call_args[0]
+        self.assertEqual(filtro['leccionesCompletadas'], {'$ne': 2})
+        self.assertEqual(operaciones['$inc'], {'tomin': 5})
+        self.assertEqual(operaciones['$max'], {'progresoContiguo': 2})
+        self.assertEqual(operaciones['$addToSet'], {
+            'leccionesCompletadas': {'$each': [2]}, 'nivelesCompletados': {'$each': [1]}
+        })
+        self.assertEqual(operaciones['$set'], {'leccionActual': 3, 'nivelActual': 2})
+
+        self.assertTrue(resultado.nivel_completado)
+        self.assertEqual(resultado.logros_nuevos, ['primera_leccion'])
+        self.assertEqual(self.usuario.tomin, 25)
+        self.assertEqual(self.usuario.operaciones_actualizacion(), {})
+
+    def test_racha_nueva_se_crea_con_upsert(self):
+        """Test: Sin racha previa se inserta con el mismo update"""
+        completar_leccion(self.usuario, self.leccion)
+
+        filtro, operaciones = self.db.rachas.update_one.call_args[0]
+        self.assertEqual(filtro, {'usuario_id': str(self.usuario.id)})
+        self.assertTrue(self.db.rachas.update_one.call_args[1]['upsert'])
+        self.assertIn('createdAt', operaciones['$setOnInsert'])
+        self.assertEqual(operaciones['$set']['rachaActual'], 1)
+        self.assertNotIn('diasActivos', operaciones.get('$push', {}))
+        self.assertEqual(self.db.actividad_mensual.update_one.call_count, 1)
+        self.assertEqual(self.db.actividad_anual.update_one.call_count, 1)
+        self.assertEqual(operaciones['$push']['logrosDesbloqueados']['$each'][0]['id'], 'primera_leccion')
+        self.assertEqual(operaciones['$inc']['totalLeccionesCompletadas'], 1)
+
+    def test_completado_concurrente_no_toca_la_racha(self):
+        """Test: Si otra petición ya la completó no se otorga de nuevo"""
+        self.db.usuarios.find_one_and_update.return_value = None
+
+        with self.assertRaises(LeccionYaCompletada):
+            completar_leccion(self.usuario, self.leccion)
+        self.db.rachas.update_one.assert_not_called()
+
+    def test_contador_de_temas_sin_leer_lecciones(self):
+        """Test: El tema se cuenta con $inc y explorador no consulta lecciones"""
+        self.usuario.temasCompletados['saludos'] = 1
+        self.leccion['tema'] = 'numeros'
+
+        resultado = completar_leccion(self.usuario, self.leccion)
+
+        operaciones = self.db.usuarios.find_one_and_update.call_args[0][1]
+        self.assertEqual(operaciones['$inc'], {'tomin': 5, 'temasCompletados.numeros': 1})
+        self.assertIn('explorador', resultado.logros_nuevos)
+        self.assertEqual(self.usuario.temasCompletados, {'saludos': 1, 'numeros': 1})
+        self.catalogo.leccion.assert_not_called()
+
+    def test_temas_de_usuario_sin_migrar(self):
+        """Test: Sin temasCompletados migrado, explorador cuenta las lecciones"""
+        self.catalogo.leccion.side_effect = lambda lid: {
+            '_id': lid, 'tema': 'saludos' if lid == 1 else 'numeros'
+        }
+        self.leccion['tema'] = 'numeros'
+
+        # temasCompletados solo tiene la lección completada tras el despliegue
+        resultado = completar_leccion(self.usuario, self.leccion)
+
+        self.assertEqual(self.usuario.temasCompletados, {'numeros': 1})
+        self.assertIsNone(self.usuario.temas_completados_confiables())
+        self.assertIn('explorador', resultado.logros_nuevos)
+
+    def test_palabras_aprendidas_en_el_mismo_update(self):
+        """Test: Las palabras de la lección se suman con $inc"""
+        self.catalogo.cantidad_palabras.return_value = 4
+
+        completar_leccion(self.usuario, self.leccion)
+
+        operaciones = self.db.usuarios.find_one_and_update.call_args[0][1]
+        self.assertEqual(operaciones['$inc']['palabrasAprendidas'], 4)
+        self.assertEqual(self.usuario.palabrasAprendidas, 4)
+
+    def test_estadisticas_sin_consultas(self):
+        """Test: Las estadísticas salen del usuario, la racha y el catálogo"""
+        self.catalogo.total_lecciones.return_value = 4
+        self.usuario.palabrasAprendidas = 12
+        racha = RachaLigera({'_id': ObjectId(), 'usuario_id': 'u1', 'totalTominsGanados': 30})
+
+        estadisticas = serializar_estadisticas_frontend(racha, self.usuario)
+
+        self.assertEqual(estadisticas['palabrasAprendidas'], 12)
+        self.assertEqual(estadisticas['totalLecciones'], 4)
+        self.assertEqual(estadisticas['progreso'], 25.0)
+        self.assertEqual(self.db.mock_calls, [])
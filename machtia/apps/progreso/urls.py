@@ -9,4 +9,5 @@ urlpatterns = [
     path('racha/', views.obtener_racha, name='obtener_racha'),
     path('logros/', views.obtener_logros, name='obtener_logros'),
     path('actividad/', views.obtener_actividad, name='obtener_actividad'),
+    path('heatmap/', views.obtener_heatmap, name='obtener_heatmap'),
 ]
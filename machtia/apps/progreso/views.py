@@ -4,41 +4,24 @@ Vistas (endpoints) para el módulo de progreso
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from mongoengine.connection import get_db
 from apps.autenticacion.utils import require_auth
-from .models import Racha, ActividadDiaria, Logro
+from .actividad import resumen_actividad, obtener_mapa_anual
+from .read_models import cargar_racha
 from .serializers import (
     serializar_racha_frontend,
     serializar_estadisticas_frontend,
     serializar_logros_disponibles_frontend
 )
 from datetime import datetime, timedelta
-
-
-def serializar_actividad(actividad) -> dict:
-    """
-    Serializa un objeto ActividadDiaria embebido a diccionario.
-
-    Args:
-        actividad (ActividadDiaria): Instancia de ActividadDiaria (EmbeddedDocument)
-
-    Returns:
-        dict: Actividad serializada
-    """
-    return {
-        'fecha': actividad.fecha.strftime('%Y-%m-%d'),
-        'leccionesCompletadas': actividad.leccionesCompletadas,
-        'tominsGanados': actividad.tominsGanados,
-        'tiempoEstudio': actividad.tiempoEstudio
-    }
+import base64
 
 
 def serializar_logro(logro) -> dict:
     """
-    Serializa un objeto Logro embebido a diccionario.
+    Serializa un logro desbloqueado a diccionario.
 
     Args:
-        logro (Logro): Instancia de Logro (EmbeddedDocument)
+        logro (LogroLigero): Logro desbloqueado
 
     Returns:
         dict: Logro serializado
@@ -60,22 +43,9 @@ def obtener_o_crear_racha(usuario_id: str):
         usuario_id (str): ID del usuario
 
     Returns:
-        Racha: Objeto Racha del usuario
+        RachaLigera: Racha del usuario (vista ligera, ver read_models)
     """
-    db = get_db()
-    racha_data = db.rachas.find_one({'usuario_id': usuario_id})
-
-    if not racha_data:
-        # Crear nueva racha
-        racha = Racha(usuario_id=usuario_id)
-        racha.save()
-    else:
-        # Reconstruir objeto Racha
-        racha_dict = {k: v for k, v in racha_data.items() if k != '_id'}
-        racha = Racha(**racha_dict)
-        racha.id = racha_data['_id']
-
-    return racha
+    return cargar_racha(usuario_id)
 
 
 @api_view(['GET'])
@@ -168,7 +138,6 @@ def obtener_actividad(request):
     """
     try:
         usuario = request.user
-        racha = obtener_o_crear_racha(str(usuario.id))
 
         # Obtener parámetro de días
         try:
@@ -184,43 +153,18 @@ def obtener_actividad(request):
         hoy = datetime.utcnow().date()
         fecha_limite = hoy - timedelta(days=dias)
 
-        # Filtrar actividades
-        actividades_filtradas = []
-        total_lecciones = 0
-        total_tomins = 0
-        total_tiempo = 0
-
-        for actividad in racha.diasActivos:
-            if actividad.fecha.date() >= fecha_limite:
-                actividades_filtradas.append(serializar_actividad(actividad))
-                total_lecciones += actividad.leccionesCompletadas
-                total_tomins += actividad.tominsGanados
-                total_tiempo += actividad.tiempoEstudio
-
-        # Ordenar por fecha descendente (más reciente primero)
-        actividades_filtradas.sort(key=lambda x: x['fecha'], reverse=True)
-
-        # Calcular resumen
-        dias_con_actividad = len(actividades_filtradas)
-        promedio_lecciones = (total_lecciones / dias_con_actividad) if dias_con_actividad > 0 else 0
-        promedio_tomins = (total_tomins / dias_con_actividad) if dias_con_actividad > 0 else 0
-        promedio_tiempo = (total_tiempo / dias_con_actividad) if dias_con_actividad > 0 else 0
+        # RENDIMIENTO: Una agregación sobre los documentos mensuales del rango
+        # devuelve el historial (más reciente primero) y el resumen
+        historial, resumen = resumen_actividad(str(usuario.id), fecha_limite, hoy)
+        dias_con_actividad = resumen.pop('dias')
 
         return Response({
             'status': 'success',
             'actividad': {
                 'diasMostrados': dias,
                 'diasConActividad': dias_con_actividad,
-                'historial': actividades_filtradas,
-                'resumen': {
-                    'totalLecciones': total_lecciones,
-                    'totalTomins': total_tomins,
-                    'totalTiempoMinutos': total_tiempo,
-                    'totalTiempoHoras': round(total_tiempo / 60, 2),
-                    'promedioLeccionesPorDia': round(promedio_lecciones, 2),
-                    'promedioTominsPorDia': round(promedio_tomins, 2),
-                    'promedioTiempoPorDia': round(promedio_tiempo, 2)
-                }
+                'historial': historial,
+                'resumen': resumen
             }
         })
 
@@ -229,3 +173,60 @@ def obtener_actividad(request):
             'status': 'error',
             'message': f'Error al obtener actividad: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@require_auth
+def obtener_heatmap(request):
+    """
+    GET /api/progreso/heatmap/
+
+    Retorna los días con actividad de un año en formato compacto (heatmap).
+
+    RENDIMIENTO: Lee un solo documento de `actividad_anual`; la respuesta
+    pesa menos de 1 KB aun con la intensidad.
+
+    Query params:
+        - anio: Año a consultar (default: año actual)
+        - intensidad: '1' para incluir las lecciones por día
+
+    Returns:
+        {status, heatmap: {anio, dias, mapa, intensidad?}}
+        mapa: base64 de 46 bytes; el día d del año (0 = 1 de enero) está
+              activo si el bit (d % 8) del byte (d // 8) vale 1
+        intensidad: base64 de un byte por día (lecciones, máximo 255)
+
+    Requiere autenticación.
+    """
+    try:
+        usuario = request.user
+        anio_actual = datetime.utcnow().year
+
+        try:
+            anio = int(request.GET.get('anio', anio_actual))
+        except ValueError:
+            anio = None
+        if anio is None or not 2000 <= anio <= anio_actual:
+            return Response({
+                'status': 'error',
+                'message': 'Año inválido'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        con_intensidad = request.GET.get('intensidad') == '1'
+        mapa = obtener_mapa_anual(str(usuario.id), anio, con_intensidad)
+
+        heatmap = {
+            'anio': anio,
+            'dias': mapa['dias'],
+            'mapa': base64.b64encode(mapa['mapa']).decode('ascii'),
+        }
+        if con_intensidad:
+            heatmap['intensidad'] = base64.b64encode(mapa['intensidad']).decode('ascii')
+
+        return Response({'status': 'success', 'heatmap': heatmap})
+
+    except Exception as e:
+        return Response({
+            'status': 'error',
+            'message': f'Error al obtener heatmap: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
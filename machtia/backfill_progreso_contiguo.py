@@ -0,0 +1,74 @@
+"""
+Script para calcular progresoContiguo en los usuarios existentes
+
+progresoContiguo es la mayor lección N tal que 1..N están completadas; las
+vistas lo usan para decidir en O(1) si una lección está bloqueada. Los
+usuarios nuevos lo mantienen al completar lecciones; este script lo calcula
+para los usuarios creados antes del cambio. Es idempotente (usa $max).
+
+Uso:
+    python backfill_progreso_contiguo.py
+    python backfill_progreso_contiguo.py --lote 500
+"""
+import os
+import argparse
+import django
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from pymongo import UpdateOne
+from mongoengine.connection import get_db
+from apps.autenticacion.models import calcular_prefijo_contiguo
+
+
+def backfill(tamano_lote: int = 1000) -> int:
+    """
+    Calcula y guarda progresoContiguo para todos los usuarios.
+
+    Args:
+        tamano_lote (int): Actualizaciones por bulk_write
+
+    Returns:
+        int: Usuarios modificados
+    """
+    db = get_db()
+    modificados = 0
+    lote = []
+
+    cursor = db.usuarios.find(
+        {}, {'leccionesCompletadas': 1, 'progresoContiguo': 1}
+    ).batch_size(tamano_lote)
+
+    for usuario_data in cursor:
+        prefijo = calcular_prefijo_contiguo(set(usuario_data.get('leccionesCompletadas', [])))
+        if prefijo == usuario_data.get('progresoContiguo'):
+            continue
+
+        # $max: no retroceder si el usuario completó lecciones mientras corre el script
+        lote.append(UpdateOne(
+            {'_id': usuario_data['_id']},
+            {'$max': {'progresoContiguo': prefijo}}
+        ))
+        if len(lote) >= tamano_lote:
+            modificados += db.usuarios.bulk_write(lote, ordered=False).modified_count
+            lote = []
+
+    if lote:
+        modificados += db.usuarios.bulk_write(lote, ordered=False).modified_count
+
+    return modificados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Calcula progresoContiguo de los usuarios existentes')
+    parser.add_argument('--lote', type=int, default=1000, help='Actualizaciones por lote')
+    args = parser.parse_args()
+
+    try:
+        print('🔄 Calculando progresoContiguo...\n')
+        modificados = backfill(args.lote)
+        print(f'✅ Usuarios actualizados: {modificados}\n')
+    except Exception as e:
+        print(f'\n❌ Error: {e}\n')
@@ -0,0 +1,223 @@
+"""
+Benchmark: completar una lección paso a paso vs motor de completado
+
+Compara las operaciones contra MongoDB (round trips) y la latencia p50/p99
+de POST /api/lecciones/:id/completar/ con el camino anterior (cada método
+de dominio guarda por su cuenta) y con apps.progreso.completion_engine.
+
+No necesita MongoDB: las colecciones se simulan en memoria y cada operación
+espera --latencia-ms para representar el round trip de red. El escenario es
+el más costoso: primera lección del día que completa el nivel y desbloquea
+varios logros a la vez.
+
+Uso:
+    python benchmark_completar_leccion.py
+    python benchmark_completar_leccion.py --latencia-ms 2 --repeticiones 300
+"""
+import os
+import argparse
+import copy
+import statistics
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+import django
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from bson import ObjectId
+from apps.autenticacion.read_models import UsuarioLigero
+from apps.lecciones.catalogo import catalogo
+from apps.progreso.completion_engine import completar_leccion, TIEMPO_ESTUDIO_POR_LECCION
+from apps.progreso.read_models import cargar_racha
+
+
+class _Resultado:
+    """Resultado mínimo de insert_one / update_one."""
+
+    def __init__(self, inserted_id=None):
+        self.inserted_id = inserted_id
+        self.modified_count = 1
+
+
+class _Cursor(list):
+    def sort(self, campo, direccion):
+        return _Cursor(sorted(self, key=lambda d: d[campo], reverse=direccion < 0))
+
+
+class ColeccionSimulada:
+    """
+    Colección en memoria que cuenta operaciones y simula la latencia.
+
+    Las actualizaciones no se aplican: cada repetición parte del mismo
+    estado, que es lo que se quiere medir.
+    """
+
+    def __init__(self, bd, documentos):
+        self._bd = bd
+        self._documentos = documentos
+
+    def _buscar(self, filtro):
+        for documento in self._documentos:
+            if all(documento.get(k) == v for k, v in filtro.items() if not isinstance(v, dict)):
+                return copy.deepcopy(documento)
+        return None
+
+    def find(self, filtro=None, *args, **kwargs):
+        return _Cursor(copy.deepcopy(self._documentos))
+
+    def find_one(self, filtro, *args, **kwargs):
+        self._bd.operacion()
+        return self._buscar(filtro)
+
+    def find_one_and_update(self, filtro, update, *args, **kwargs):
+        self._bd.operacion()
+        return self._buscar(filtro)
+
+    def update_one(self, filtro, update, *args, **kwargs):
+        self._bd.operacion()
+        return _Resultado()
+
+    def insert_one(self, documento, *args, **kwargs):
+        self._bd.operacion()
+        documento['_id'] = ObjectId()
+        return _Resultado(documento['_id'])
+
+
+class BaseDatosSimulada:
+    """Base de datos en memoria con latencia fija por operación."""
+
+    def __init__(self, latencia_ms: float, colecciones: dict):
+        self._latencia = latencia_ms / 1000
+        self.operaciones = 0
+        self._colecciones = {
+            nombre: ColeccionSimulada(self, documentos)
+            for nombre, documentos in colecciones.items()
+        }
+
+    def operacion(self):
+        self.operaciones += 1
+        if self._latencia:
+            time.sleep(self._latencia)
+
+    def __getitem__(self, nombre):
+        return self._colecciones[nombre]
+
+    def __getattr__(self, nombre):
+        try:
+            return self.__dict__['_colecciones'][nombre]
+        except KeyError:
+            raise AttributeError(nombre)
+
+
+def generar_datos():
+    """Catálogo de un nivel con 3 lecciones, usuario en la 3 y su racha"""
+    usuario_id = ObjectId()
+    ayer = datetime.utcnow() - timedelta(days=1)
+    lecciones = [
+        {'_id': 1, 'nombre': 'Saludos', 'tema': 'saludos', 'nivel_id': 1, 'tominsAlCompletar': 5},
+        {'_id': 2, 'nombre': 'Números', 'tema': 'numeros', 'nivel_id': 1, 'tominsAlCompletar': 5},
+        {'_id': 3, 'nombre': 'Familia', 'tema': 'familia', 'nivel_id': 1, 'tominsAlCompletar': 5},
+    ]
+    usuario = {
+        '_id': usuario_id, 'email': 'benchmark@machtia.mx', 'nombre': 'Benchmark',
+        'rol': 'estudiante', 'tomin': 45, 'vidas': 5,
+        'leccionesCompletadas': [1, 2], 'progresoContiguo': 2, 'leccionActual': 3,
+        'nivelesCompletados': [], 'nivelActual': 1,
+    }
+    racha = {
+        '_id': ObjectId(), 'usuario_id': str(usuario_id),
+        'rachaActual': 2, 'rachaMaxima': 2, 'ultimaActividad': ayer,
+        'logrosDesbloqueados': [],
+        'totalLeccionesCompletadas': 4, 'totalTominsGanados': 40, 'totalTiempoEstudio': 40,
+        'createdAt': ayer, 'updatedAt': ayer,
+    }
+    return {
+        'lecciones': lecciones,
+        'niveles': [{'_id': 1, 'nombre': 'Básico'}],
+        'catalogo_version': [{'_id': 'catalogo', 'version': 1}],
+        'usuarios': [usuario],
+        'rachas': [racha],
+        'actividad_mensual': [],
+        'actividad_anual': [],
+    }
+
+
+def ruta_paso_a_paso(usuario_data: dict, leccion_data: dict):
+    """Camino anterior: cada método de dominio guarda por su cuenta"""
+    usuario = UsuarioLigero(usuario_data)
+    tomins_recompensa = leccion_data.get('tominsAlCompletar', 5)
+    usuario.completar_leccion(leccion_data['_id'], tomins_recompensa)
+
+    racha = cargar_racha(str(usuario.id))
+    racha.actualizar_racha()
+    racha.registrar_actividad(
+        lecciones_completadas=1,
+        tomins_ganados=tomins_recompensa,
+        tiempo_estudio=TIEMPO_ESTUDIO_POR_LECCION
+    )
+    racha.verificar_logros_automaticos(lecciones_completadas=usuario.leccionesCompletadas)
+
+    nivel_id = leccion_data.get('nivel_id', 1)
+    indice = usuario.indice_progreso
+    if all(indice.completada(lid) for lid in catalogo.ids_de_nivel(nivel_id)):
+        usuario.completar_nivel(nivel_id)
+
+
+def ruta_motor(usuario_data: dict, leccion_data: dict):
+    """Camino nuevo: cambios en memoria y un update por colección"""
+    completar_leccion(UsuarioLigero(usuario_data), leccion_data)
+
+
+def medir(ruta, bd, repeticiones: int):
+    """
+    Ejecuta `ruta` y retorna (operaciones por petición, latencias en ms).
+    """
+    usuario_data = bd.usuarios._documentos[0]
+    leccion_data = catalogo.leccion(3)
+    latencias = []
+
+    bd.operaciones = 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        ruta(copy.deepcopy(usuario_data), leccion_data)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+    return bd.operaciones / repeticiones, latencias
+
+
+def percentil(valores: list, p: float) -> float:
+    return statistics.quantiles(valores, n=100, method='inclusive')[p - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--latencia-ms', type=float, default=1.0, help='Round trip simulado')
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    bd = BaseDatosSimulada(args.latencia_ms, generar_datos())
+
+    with mock.patch('mongoengine.connection.get_db', return_value=bd):
+        catalogo.limpiar()
+        catalogo.lecciones()  # Carga inicial fuera de la medición
+
+        print(f"Latencia simulada por operación: {args.latencia_ms} ms\n")
+        print(f"{'Camino':>14} | {'Round trips':>11} | {'p50 (ms)':>9} | {'p99 (ms)':>9}")
+        print('-' * 53)
+
+        for nombre, ruta in (('paso a paso', ruta_paso_a_paso), ('motor', ruta_motor)):
+            operaciones, latencias = medir(ruta, bd, args.repeticiones)
+            print(
+                f"{nombre:>14} | {operaciones:>11.1f} | "
+                f"{percentil(latencias, 50):>9.2f} | {percentil(latencias, 99):>9.2f}"
+            )
+
+        catalogo.limpiar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Micro-benchmark: reconstrucción de Documents de mongoengine vs vistas ligeras
+
+Mide el CPU por petición que cuesta decodificar el usuario autenticado y su
+racha desde el dict crudo de PyMongo, para distintos tamaños de diasActivos.
+No necesita MongoDB (los documentos se generan en memoria).
+
+Uso:
+    python benchmark_modelos_ligeros.py
+    python benchmark_modelos_ligeros.py --dias 30 365 1000 --repeticiones 2000
+"""
+import os
+import argparse
+import timeit
+from datetime import datetime, timedelta
+
+import django
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import bcrypt
+from bson import ObjectId
+from apps.autenticacion.models import Usuario
+from apps.autenticacion.read_models import UsuarioLigero
+from apps.progreso.models import Racha, ActividadDiaria, Logro
+from apps.progreso.read_models import RachaLigera
+
+
+def generar_usuario() -> dict:
+    """Documento de usuario con progreso realista"""
+    return {
+        '_id': ObjectId(),
+        'email': 'benchmark@machtia.mx',
+        'nombre': 'Benchmark',
+        'password': bcrypt.hashpw(b'Password-Segura-123', bcrypt.gensalt(4)).decode('utf-8'),
+        'rol': 'estudiante',
+        'tomin': 120,
+        'vidas': 4,
+        'leccionesCompletadas': list(range(1, 41)),
+        'leccionActual': 41,
+        'nivelesCompletados': [1, 2, 3],
+        'nivelActual': 4,
+        'ultimaRegeneracionVida': datetime.utcnow(),
+        'createdAt': datetime.utcnow(),
+    }
+
+
+def generar_racha(dias: int) -> dict:
+    """Documento de racha con `dias` entradas en diasActivos"""
+    hoy = datetime.utcnow()
+    return {
+        '_id': ObjectId(),
+        'usuario_id': str(ObjectId()),
+        'rachaActual': 5,
+        'rachaMaxima': 12,
+        'ultimaActividad': hoy - timedelta(days=1),
+        'diasActivos': [
+            {
+                'fecha': hoy - timedelta(days=dias - i),
+                'leccionesCompletadas': 2,
+                'tominsGanados': 10,
+                'tiempoEstudio': 20,
+            }
+            for i in range(dias)
+        ],
+        'logrosDesbloqueados': [
+            {'id': f'logro_{i}', 'nombre': 'Logro', 'descripcion': 'Descripción',
+             'icono': '🏆', 'fechaDesbloqueo': hoy}
+            for i in range(5)
+        ],
+        'totalLeccionesCompletadas': dias * 2,
+        'totalTominsGanados': dias * 10,
+        'totalTiempoEstudio': dias * 20,
+        'createdAt': hoy,
+        'updatedAt': hoy,
+    }
+
+
+def ruta_documentos(usuario_data: dict, racha_data: dict):
+    """Camino anterior: Usuario(**dict) + Racha con EmbeddedDocuments"""
+    usuario = Usuario(**{k: v for k, v in usuario_data.items() if k != '_id'})
+    usuario.id = usuario_data['_id']
+
+    racha_dict = {
+        k: v for k, v in racha_data.items()
+        if k not in ['_id', 'diasActivos', 'logrosDesbloqueados']
+    }
+    racha_dict['diasActivos'] = [ActividadDiaria(**d) for d in racha_data['diasActivos']]
+    racha_dict['logrosDesbloqueados'] = [Logro(**l) for l in racha_data['logrosDesbloqueados']]
+    racha = Racha(**racha_dict)
+    racha.id = racha_data['_id']
+
+    # Búsqueda lineal de la actividad de hoy (registrar_actividad anterior)
+    hoy = datetime.utcnow().date()
+    for actividad in racha.diasActivos:
+        if actividad.fecha.date() == hoy:
+            break
+    return usuario, racha
+
+
+def ruta_ligera(usuario_data: dict, racha_data: dict):
+    """Camino nuevo: vistas con __slots__ decodificadas del dict crudo"""
+    usuario = UsuarioLigero(usuario_data)
+    racha = RachaLigera(racha_data)  # diasActivos ya no se decodifica (actividad_mensual)
+    return usuario, racha
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--dias', type=int, nargs='+', default=[7, 30, 180, 365, 1000])
+    parser.add_argument('--repeticiones', type=int, default=1000)
+    args = parser.parse_args()
+
+    usuario_data = generar_usuario()
+
+    print(f"{'diasActivos':>12} | {'Documents (µs)':>15} | {'Ligero (µs)':>12} | {'Ahorro':>8}")
+    print('-' * 58)
+
+    for dias in args.dias:
+        racha_data = generar_racha(dias)
+
+        tiempo_documentos = timeit.timeit(
+            lambda: ruta_documentos(usuario_data, racha_data), number=args.repeticiones
+        )
+        tiempo_ligero = timeit.timeit(
+            lambda: ruta_ligera(usuario_data, racha_data), number=args.repeticiones
+        )
+
+        us_documentos = tiempo_documentos / args.repeticiones * 1e6
+        us_ligero = tiempo_ligero / args.repeticiones * 1e6
+        print(
+            f"{dias:>12} | {us_documentos:>15.1f} | {us_ligero:>12.1f} | "
+            f"{us_documentos / us_ligero:>7.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Micro-benchmark: JSONRenderer de DRF vs renderers con orjson/msgpack
+
+Mide el CPU de codificar la respuesta de los listados (lecciones serializadas
+para el frontend) y de una respuesta con fechas (racha con diasActivos), para
+distintos tamaños. No necesita MongoDB (los datos se generan en memoria).
+
+Uso:
+    python benchmark_renderers.py
+    python benchmark_renderers.py --lecciones 15 100 1000 --repeticiones 500
+"""
+import os
+import argparse
+import importlib.util
+import timeit
+from datetime import datetime, timedelta
+
+import django
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from bson import ObjectId
+from rest_framework.renderers import JSONRenderer
+from apps.autenticacion.renderers import RenderizadorJSON, RenderizadorMsgPack
+from apps.lecciones.serializers import serializar_leccion_frontend
+
+
+def generar_lecciones(cantidad: int) -> list:
+    """Lista de lecciones serializadas como la de GET /api/lecciones/"""
+    return [
+        serializar_leccion_frontend({
+            '_id': i,
+            'nombre': f'Lección {i}: Saludos y cortesía',
+            'tema': 'saludos',
+            'dificultad': 'principiante',
+            'contenido': 'Aprende a saludar en náhuatl. ' * 10,
+            'nivel_id': i // 15 + 1,
+            'tominsAlCompletar': 5,
+            'palabras': [
+                {'palabra_nahuatl': f'Niltze {j}', 'español': f'Hola {j}', 'audio': None}
+                for j in range(10)
+            ],
+        })
+        for i in range(1, cantidad + 1)
+    ]
+
+
+def generar_racha(dias: int) -> dict:
+    """Respuesta con fechas, como las de progreso (los IDs ya como texto)"""
+    hoy = datetime.utcnow()
+    return {
+        'id': str(ObjectId()),
+        'usuario_id': str(ObjectId()),
+        'ultimaActividad': hoy,
+        'diasActivos': [
+            {'fecha': hoy - timedelta(days=dias - i), 'leccionesCompletadas': 2, 'tominsGanados': 10}
+            for i in range(dias)
+        ],
+    }
+
+
+def medir(renderer, datos, repeticiones: int) -> float:
+    """µs por render"""
+    return timeit.timeit(lambda: renderer.render(datos), number=repeticiones) / repeticiones * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--lecciones', type=int, nargs='+', default=[15, 100, 500, 1000])
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    renderers = [('DRF', JSONRenderer()), ('orjson', RenderizadorJSON())]
+    if importlib.util.find_spec('msgpack') is not None:
+        renderers.append(('msgpack', RenderizadorMsgPack()))
+
+    casos = [(f'{n} lecciones', generar_lecciones(n)) for n in args.lecciones]
+    casos.append(('racha 365 días', generar_racha(365)))
+
+    encabezado = ' | '.join(f'{nombre + " (µs)":>14}' for nombre, _ in renderers)
+    print(f"{'Respuesta':>16} | {encabezado} | {'Ahorro':>8}")
+    print('-' * (30 + 17 * len(renderers)))
+
+    for descripcion, datos in casos:
+        tiempos = [medir(renderer, datos, args.repeticiones) for _, renderer in renderers]
+        columnas = ' | '.join(f'{tiempo:>14.1f}' for tiempo in tiempos)
+        print(f'{descripcion:>16} | {columnas} | {tiempos[0] / tiempos[1]:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
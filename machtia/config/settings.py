@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import importlib.util
 from dotenv import load_dotenv
 import mongoengine
 
@@ -64,6 +65,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # RENDIMIENTO: Mapa de identidad y contador de consultas por petición
+    'apps.autenticacion.request_context_middleware.ContextoPeticionMiddleware',
     # SEGURIDAD MEDIA CORREGIDA: Headers de seguridad HTTP modernos (CSP, Permissions-Policy)
     'apps.autenticacion.security_headers_middleware.SecurityHeadersMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS debe estar antes de CommonMiddleware
@@ -163,11 +166,14 @@ if not MONGODB_URI:
     )
 
 # Configurar conexión a MongoDB usando mongoengine
+from apps.autenticacion.request_context import ContadorConsultas
+
 mongoengine.connect(
     db='nahuatl_db',
     host=MONGODB_URI,
     alias='default',
-    connect=False  # Evita problemas de threading con Django
+    connect=False,  # Evita problemas de threading con Django
+    event_listeners=[ContadorConsultas()]  # Cuenta consultas por petición
 )
 
 # ===========================
@@ -193,12 +199,20 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'if-none-match',  # Revalidación con ETag (respuestas 304)
 ]
 
 # CRÍTICO: Exponer headers para que el navegador pueda leerlos
 CORS_EXPOSE_HEADERS = [
     'content-type',
     'set-cookie',
+    'retry-after',
+    'ratelimit-limit',
+    'ratelimit-remaining',
+    'ratelimit-reset',
+    'ratelimit-policy',
+    'etag',
+    'link',  # Paginación por cursor (rel="next")
 ]
 
 # Permitir todos los métodos HTTP
@@ -224,12 +238,20 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # RENDIMIENTO: JSON con orjson (ver apps/autenticacion/renderers.py)
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',  # API navegable en desarrollo
+        'apps.autenticacion.renderers.RenderizadorJSON',
     ],
 }
 
+# MessagePack solo si el paquete está instalado (Accept: application/msgpack)
+if importlib.util.find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('apps.autenticacion.renderers.RenderizadorMsgPack')
+
+# API navegable solo en desarrollo: en producción no se carga ni se negocia
+if DEBUG:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('rest_framework.renderers.BrowsableAPIRenderer')
+
 # ===========================
 # JWT CONFIGURATION
 # ===========================
@@ -252,6 +274,72 @@ JWT_REFRESH_TOKEN_EXPIRATION_DAYS = 7     # 7 días
 # Mantener por compatibilidad temporal pero no se usa
 JWT_EXPIRATION_HOURS = 24
 
+# RENDIMIENTO: Cache en memoria de tokens revocados (por worker)
+# Cada cuántos segundos se sincroniza con la colección tokens_blacklist.
+# Es también la ventana máxima en la que un token revocado en otro worker
+# puede seguir siendo aceptado. 0 = desactivada (consulta MongoDB siempre).
+JWT_BLACKLIST_CACHE_SEGUNDOS = int(os.getenv('JWT_BLACKLIST_CACHE_SEGUNDOS', '5'))
+
+# RENDIMIENTO: Cache LRU de tokens ya verificados (por worker), indexada por
+# el digest SHA-256 del token. Evita repetir la verificación HMAC del mismo
+# access token; la revocación se sigue comprobando en cada petición.
+# 0 = desactivada.
+JWT_TOKEN_CACHE_TAMANO = int(os.getenv('JWT_TOKEN_CACHE_TAMANO', '10000'))
+
+# ===========================
+# PASSWORD HASHING (bcrypt)
+# ===========================
+# Factor de costo para hashes nuevos. Al cambiarlo, los hashes existentes
+# se recalculan en segundo plano en el siguiente login exitoso.
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+
+# RENDIMIENTO: Pool acotado para bcrypt (por proceso). Con WORKERS hashes en
+# curso y MAX_PENDIENTES en espera, las peticiones extra reciben 503 inmediato.
+PASSWORD_POOL_WORKERS = int(os.getenv('PASSWORD_POOL_WORKERS', '2'))
+PASSWORD_POOL_MAX_PENDIENTES = int(os.getenv('PASSWORD_POOL_MAX_PENDIENTES', '8'))
+PASSWORD_POOL_TIMEOUT_SEGUNDOS = float(os.getenv('PASSWORD_POOL_TIMEOUT_SEGUNDOS', '5'))
+
+# ===========================
+# CATÁLOGO DE LECCIONES
+# ===========================
+# RENDIMIENTO: Lecciones y niveles se sirven desde memoria (por worker).
+# Cada cuántos segundos se compara la versión del catálogo con MongoDB; es
+# también la ventana máxima en la que otro worker sirve datos anteriores a
+# una modificación del admin.
+CATALOGO_VERIFICACION_SEGUNDOS = int(os.getenv('CATALOGO_VERIFICACION_SEGUNDOS', '5'))
+# Máximo de lecciones por página en GET /api/lecciones/?limit=
+LECCIONES_PAGINA_MAXIMA = int(os.getenv('LECCIONES_PAGINA_MAXIMA', '100'))
+
+# ===========================
+# IMPORTACIÓN Y EXPORTACIÓN DE LECCIONES
+# ===========================
+# RENDIMIENTO: POST /api/lecciones/importar/ lee el JSONL línea por línea y
+# escribe en lotes de IMPORTACION_LOTE con bulk_write. IMPORTACION_MAX_FILAS
+# limita el tamaño de una importación (las filas extra no se procesan).
+IMPORTACION_LOTE = int(os.getenv('IMPORTACION_LOTE', '500'))
+IMPORTACION_MAX_FILAS = int(os.getenv('IMPORTACION_MAX_FILAS', '20000'))
+# GET /api/lecciones/exportar/ recorre el catálogo con un cursor de este
+# tamaño de lote y emite un bloque por lote (memoria constante).
+EXPORTACION_LOTE = int(os.getenv('EXPORTACION_LOTE', '500'))
+
+# ===========================
+# COMPLETADO DE LECCIONES
+# ===========================
+# Aplicar los updates de usuarios y rachas en una transacción. Requiere que
+# MongoDB corra como replica set; sin transacción, un fallo entre ambos
+# updates deja la lección completada sin actualizar la racha.
+COMPLETADO_USAR_TRANSACCION = os.getenv('COMPLETADO_USAR_TRANSACCION', 'False') == 'True'
+
+# ===========================
+# RATE LIMITING
+# ===========================
+# SEGURIDAD: Contadores de ventana deslizante compartidos por todos los workers.
+# 'mongo' guarda los contadores en la colección rate_limits (con TTL);
+# 'memoria' los guarda por proceso (solo desarrollo/tests: con N workers el
+# límite real sería N veces el configurado).
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'mongo')
+RATE_LIMIT_HABILITADO = os.getenv('RATE_LIMIT_HABILITADO', 'True') == 'True'
+
 # ===========================
 # SECURITY HEADERS (PRODUCCIÓN)
 # ===========================
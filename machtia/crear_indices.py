@@ -0,0 +1,34 @@
+"""
+Script para crear los índices que la aplicación necesita en MongoDB
+
+Crea el índice TTL de tokens_blacklist (los tokens revocados se eliminan
+solos al expirar) y el de rate_limits. Es idempotente: se puede ejecutar en
+cada despliegue.
+
+Uso:
+    python crear_indices.py
+"""
+import os
+import django
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from mongoengine.connection import get_db
+from apps.autenticacion.blacklist_models import TokenBlacklist
+
+
+def crear_indices():
+    """Crea (o actualiza) los índices TTL"""
+    if TokenBlacklist.asegurar_indice_ttl():
+        print('✅ tokens_blacklist: índice TTL sobre expira_en creado')
+    else:
+        print('⚠️  tokens_blacklist: el índice TTL ya existía')
+
+    get_db().rate_limits.create_index('expira_en', expireAfterSeconds=0)
+    print('✅ rate_limits: índice TTL sobre expira_en')
+
+
+if __name__ == '__main__':
+    crear_indices()
@@ -0,0 +1,63 @@
+"""
+Script para exportar el catálogo (lecciones, niveles o diccionario)
+
+Escribe la misma salida que GET /api/lecciones/exportar/ a un archivo o a la
+salida estándar, lote por lote (la memoria no crece con el catálogo). El
+JSONL de lecciones se puede volver a cargar con POST /api/lecciones/importar/
+y el de niveles con POST /api/lecciones/importar/?tipo=niveles (o con
+apps.lecciones.importacion.importar_lecciones / importar_niveles).
+
+Uso:
+    python exportar_catalogo.py --tipo lecciones > lecciones.jsonl
+    python exportar_catalogo.py --tipo palabras --formato csv --salida diccionario.csv
+    python exportar_catalogo.py --tipo niveles --lote 1000 --salida niveles.jsonl
+"""
+import os
+import sys
+import argparse
+import django
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from apps.lecciones.exportacion import exportar, COLUMNAS, FORMATOS
+
+
+def escribir(tipo: str, formato: str, destino, tamano_lote: int = None) -> int:
+    """
+    Escribe la exportación en `destino`.
+
+    Args:
+        tipo (str): 'lecciones', 'niveles' o 'palabras'
+        formato (str): 'jsonl' o 'csv'
+        destino: Archivo binario abierto
+        tamano_lote (int, optional): Documentos por lote
+
+    Returns:
+        int: Bytes escritos
+    """
+    escritos = 0
+    for bloque in exportar(tipo, formato, tamano_lote):
+        destino.write(bloque)
+        escritos += len(bloque)
+    return escritos
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Exporta el catálogo en JSONL o CSV')
+    parser.add_argument('--tipo', choices=list(COLUMNAS), default='lecciones')
+    parser.add_argument('--formato', choices=list(FORMATOS), default='jsonl')
+    parser.add_argument('--salida', help='Archivo destino (por defecto, salida estándar)')
+    parser.add_argument('--lote', type=int, default=None, help='Documentos por lote')
+    args = parser.parse_args()
+
+    try:
+        if args.salida:
+            with open(args.salida, 'wb') as destino:
+                escritos = escribir(args.tipo, args.formato, destino, args.lote)
+            print(f'✅ Exportación de {args.tipo} guardada en {args.salida} ({escritos} bytes)')
+        else:
+            escribir(args.tipo, args.formato, sys.stdout.buffer, args.lote)
+    except Exception as e:
+        print(f'\n❌ Error: {e}\n', file=sys.stderr)
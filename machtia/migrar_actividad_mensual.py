@@ -0,0 +1,166 @@
+"""
+Script para mover Racha.diasActivos a la colección actividad_mensual
+
+La actividad diaria ahora se guarda en un documento por usuario y mes (ver
+apps.progreso.actividad). Este script suma el historial embebido de cada
+racha a sus documentos mensuales y a su mapa anual (actividad_anual) y
+elimina diasActivos de la racha.
+
+Ejecutar después de desplegar la versión que escribe en actividad_mensual.
+Volver a ejecutarlo es seguro aunque una ejecución anterior se haya
+interrumpido: cada racha suma su historial con un único update por
+documento mensual/anual que también registra el _id de la racha en
+`rachasMigradas`, y ese update filtra por las rachas ya sumadas. Un
+documento nunca recibe dos veces el mismo historial, y las rachas ya
+migradas no tienen diasActivos y se omiten.
+
+Uso:
+    python migrar_actividad_mensual.py
+    python migrar_actividad_mensual.py --lote 200
+"""
+import os
+import argparse
+import django
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from bson.int64 import Int64
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from mongoengine.connection import get_db
+from apps.progreso.actividad import COLECCION, operaciones_actividad
+
+# Código de MongoDB para _id duplicado
+CODIGO_DUPLICADO = 11000
+
+
+def _combinar(destino: dict, update: dict) -> None:
+    """Suma los $inc y une con OR los $bit de `update` en `destino`."""
+    for campo, cantidad in update.get('$inc', {}).items():
+        incrementos = destino.setdefault('$inc', {})
+        incrementos[campo] = incrementos.get(campo, 0) + cantidad
+    for campo, operacion in update.get('$bit', {}).items():
+        bits = destino.setdefault('$bit', {})
+        actual = bits.get(campo, {'or': Int64(0)})['or']
+        bits[campo] = {'or': Int64(actual | operacion['or'])}
+
+
+def operaciones_de_racha(racha_data: dict, operaciones: dict) -> None:
+    """
+    Agrega los upserts del historial de una racha: uno por documento
+    mensual y anual, con todos los días de la racha que le corresponden.
+
+    El update solo se aplica si la racha aún no está en `rachasMigradas` del
+    documento y la agrega en la misma operación (atómica por documento).
+
+    Args:
+        racha_data (dict): Documento de `rachas` con diasActivos
+        operaciones (dict): {coleccion: [(filtro, update)]} a completar
+    """
+    marca = racha_data['_id']
+    combinadas = {}
+
+    for actividad in racha_data.get('diasActivos', []):
+        for coleccion, filtro, update in operaciones_actividad(
+            racha_data['usuario_id'],
+            actividad['fecha'],
+            actividad.get('leccionesCompletadas', 0),
+            actividad.get('tominsGanados', 0),
+            actividad.get('tiempoEstudio', 0)
+        ):
+            clave = (coleccion, filtro['_id'])
+            if clave not in combinadas:
+                combinadas[clave] = {
+                    '$setOnInsert': update['$setOnInsert'],
+                    '$addToSet': {'rachasMigradas': marca},
+                }
+            _combinar(combinadas[clave], update)
+
+    for (coleccion, documento_id), update in combinadas.items():
+        operaciones.setdefault(coleccion, []).append(
+            ({'_id': documento_id, 'rachasMigradas': {'$ne': marca}}, update)
+        )
+
+
+def escribir(db, coleccion: str, operaciones: list) -> None:
+    """
+    Aplica los upserts de `operaciones` ([(filtro, update)]).
+
+    Si el documento ya tiene la racha en rachasMigradas el filtro no
+    coincide y el upsert choca con su _id (error 11000): ese historial ya
+    se sumó. Esas operaciones se repiten sin upsert por si el choque fue con
+    un documento creado a la vez por la aplicación (y entonces sí aplican).
+    """
+    try:
+        db[coleccion].bulk_write(
+            [UpdateOne(filtro, update, upsert=True) for filtro, update in operaciones],
+            ordered=False
+        )
+    except BulkWriteError as e:
+        errores = e.details.get('writeErrors', [])
+        if any(error.get('code') != CODIGO_DUPLICADO for error in errores):
+            raise
+        db[coleccion].bulk_write(
+            [UpdateOne(*operaciones[error['index']]) for error in errores],
+            ordered=False
+        )
+
+
+def migrar(tamano_lote: int = 500) -> tuple:
+    """
+    Migra el historial de todas las rachas.
+
+    Cada lote escribe primero la actividad y después elimina diasActivos de
+    sus rachas, de modo que un fallo nunca pierde historial (y repetir el
+    lote no lo duplica, ver operaciones_de_racha).
+
+    Args:
+        tamano_lote (int): Rachas por lote
+
+    Returns:
+        tuple: (rachas migradas, documentos mensuales escritos)
+    """
+    db = get_db()
+    rachas_migradas = 0
+    meses_escritos = 0
+    actividad = {}
+    limpiar = []
+
+    def aplicar():
+        nonlocal rachas_migradas, meses_escritos
+        for coleccion, operaciones in actividad.items():
+            escribir(db, coleccion, operaciones)
+        meses_escritos += len(actividad.get(COLECCION, []))
+        if limpiar:
+            rachas_migradas += db.rachas.bulk_write(limpiar, ordered=False).modified_count
+        actividad.clear()
+        limpiar.clear()
+
+    cursor = db.rachas.find(
+        {'diasActivos': {'$exists': True}}, {'usuario_id': 1, 'diasActivos': 1}
+    ).batch_size(tamano_lote)
+
+    for racha_data in cursor:
+        operaciones_de_racha(racha_data, actividad)
+        limpiar.append(UpdateOne({'_id': racha_data['_id']}, {'$unset': {'diasActivos': ''}}))
+        if len(limpiar) >= tamano_lote:
+            aplicar()
+
+    aplicar()
+    return rachas_migradas, meses_escritos
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mueve diasActivos a actividad_mensual')
+    parser.add_argument('--lote', type=int, default=500, help='Rachas por lote')
+    args = parser.parse_args()
+
+    try:
+        print('🔄 Migrando actividad diaria...\n')
+        rachas, meses = migrar(args.lote)
+        print(f'✅ Rachas migradas: {rachas}')
+        print(f'✅ Documentos escritos en {COLECCION}: {meses}\n')
+    except Exception as e:
+        print(f'\n❌ Error: {e}\n')
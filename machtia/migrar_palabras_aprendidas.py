@@ -0,0 +1,86 @@
+"""
+Script para calcular palabrasAprendidas en los usuarios existentes
+
+palabrasAprendidas (suma de las palabras de las lecciones completadas) se
+mantiene con $inc al completar cada lección y /api/progreso/estadisticas/
+lo lee en lugar de consultar cada lección completada. Este script lo
+calcula para los usuarios creados antes del cambio.
+
+Es idempotente: cada update solo se aplica si leccionesCompletadas no cambió
+desde que se leyó (un usuario que completa una lección mientras corre el
+script se omite y se corrige en la siguiente ejecución).
+
+Uso:
+    python migrar_palabras_aprendidas.py
+    python migrar_palabras_aprendidas.py --lote 500
+"""
+import os
+import argparse
+import django
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from pymongo import UpdateOne
+from mongoengine.connection import get_db
+
+
+def migrar(tamano_lote: int = 1000) -> int:
+    """
+    Calcula y guarda palabrasAprendidas para todos los usuarios.
+
+    Args:
+        tamano_lote (int): Actualizaciones por bulk_write
+
+    Returns:
+        int: Usuarios modificados
+    """
+    db = get_db()
+
+    # Palabras por lección calculadas en el servidor (sin traer las listas)
+    palabras_por_leccion = {
+        leccion['_id']: leccion['cantidad']
+        for leccion in db.lecciones.aggregate([
+            {'$project': {'cantidad': {'$size': {'$ifNull': ['$palabras', []]}}}}
+        ])
+    }
+
+    modificados = 0
+    lote = []
+
+    cursor = db.usuarios.find(
+        {}, {'leccionesCompletadas': 1, 'palabrasAprendidas': 1}
+    ).batch_size(tamano_lote)
+
+    for usuario_data in cursor:
+        completadas = usuario_data.get('leccionesCompletadas', [])
+        palabras = sum(palabras_por_leccion.get(leccion_id, 0) for leccion_id in set(completadas))
+        if palabras == usuario_data.get('palabrasAprendidas'):
+            continue
+
+        lote.append(UpdateOne(
+            {'_id': usuario_data['_id'], 'leccionesCompletadas': {'$size': len(completadas)}},
+            {'$set': {'palabrasAprendidas': palabras}}
+        ))
+        if len(lote) >= tamano_lote:
+            modificados += db.usuarios.bulk_write(lote, ordered=False).modified_count
+            lote = []
+
+    if lote:
+        modificados += db.usuarios.bulk_write(lote, ordered=False).modified_count
+
+    return modificados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Calcula palabrasAprendidas de los usuarios existentes')
+    parser.add_argument('--lote', type=int, default=1000, help='Actualizaciones por lote')
+    args = parser.parse_args()
+
+    try:
+        print('🔄 Calculando palabrasAprendidas...\n')
+        modificados = migrar(args.lote)
+        print(f'✅ Usuarios actualizados: {modificados}\n')
+    except Exception as e:
+        print(f'\n❌ Error: {e}\n')
@@ -0,0 +1,100 @@
+"""
+Script para calcular temasCompletados en los usuarios existentes
+
+temasCompletados ({tema: lecciones completadas}) se mantiene con $inc al
+completar cada lección y los logros por tema lo leen en lugar de consultar
+las lecciones completadas. Este script lo calcula para los usuarios creados
+antes del cambio a partir de leccionesCompletadas y el tema de cada lección.
+
+Es idempotente: cada update solo se aplica si leccionesCompletadas no cambió
+desde que se leyó (un usuario que completa una lección mientras corre el
+script se omite y se corrige en la siguiente ejecución).
+
+Uso:
+    python migrar_temas_completados.py
+    python migrar_temas_completados.py --lote 500
+"""
+import os
+import argparse
+from collections import Counter
+import django
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from pymongo import UpdateOne
+from mongoengine.connection import get_db
+from apps.autenticacion.models import clave_tema
+
+
+def calcular_temas(lecciones_completadas: list, temas_por_leccion: dict) -> dict:
+    """
+    Args:
+        lecciones_completadas (list): IDs de lecciones completadas
+        temas_por_leccion (dict): {leccion_id: tema}
+
+    Returns:
+        dict: {clave_tema: cantidad}
+    """
+    return dict(Counter(
+        clave_tema(temas_por_leccion[leccion_id])
+        for leccion_id in set(lecciones_completadas)
+        if temas_por_leccion.get(leccion_id)
+    ))
+
+
+def migrar(tamano_lote: int = 1000) -> int:
+    """
+    Calcula y guarda temasCompletados para todos los usuarios.
+
+    Args:
+        tamano_lote (int): Actualizaciones por bulk_write
+
+    Returns:
+        int: Usuarios modificados
+    """
+    db = get_db()
+    temas_por_leccion = {
+        leccion['_id']: leccion.get('tema')
+        for leccion in db.lecciones.find({}, {'tema': 1})
+    }
+
+    modificados = 0
+    lote = []
+
+    cursor = db.usuarios.find(
+        {}, {'leccionesCompletadas': 1, 'temasCompletados': 1}
+    ).batch_size(tamano_lote)
+
+    for usuario_data in cursor:
+        completadas = usuario_data.get('leccionesCompletadas', [])
+        temas = calcular_temas(completadas, temas_por_leccion)
+        if temas == usuario_data.get('temasCompletados'):
+            continue
+
+        lote.append(UpdateOne(
+            {'_id': usuario_data['_id'], 'leccionesCompletadas': {'$size': len(completadas)}},
+            {'$set': {'temasCompletados': temas}}
+        ))
+        if len(lote) >= tamano_lote:
+            modificados += db.usuarios.bulk_write(lote, ordered=False).modified_count
+            lote = []
+
+    if lote:
+        modificados += db.usuarios.bulk_write(lote, ordered=False).modified_count
+
+    return modificados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Calcula temasCompletados de los usuarios existentes')
+    parser.add_argument('--lote', type=int, default=1000, help='Actualizaciones por lote')
+    args = parser.parse_args()
+
+    try:
+        print('🔄 Calculando temasCompletados...\n')
+        modificados = migrar(args.lote)
+        print(f'✅ Usuarios actualizados: {modificados}\n')
+    except Exception as e:
+        print(f'\n❌ Error: {e}\n')
@@ -15,8 +15,9 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
-from apps.lecciones.models import Leccion, Palabra
 from mongoengine.connection import get_db
+from apps.lecciones.catalogo import catalogo
+from apps.lecciones.importacion import importar_lecciones
 
 
 def crear_lecciones(force=False):
@@ -275,59 +276,31 @@ def crear_lecciones(force=False):
 
     print('🌱 Poblando base de datos con 15 lecciones de Náhuatl...\n')
 
-    db = get_db()
-    creadas = 0
-    actualizadas = 0
-    saltadas = 0
+    # RENDIMIENTO: Un bulk_write para todas las lecciones; con --force las
+    # existentes se reemplazan en el mismo lote
+    resultado = importar_lecciones(lecciones_data, sobrescribir=force)
 
-    for leccion_data in lecciones_data:
-        # Verificar si la lección ya existe
-        leccion_existente = db.lecciones.find_one({'_id': leccion_data['_id']})
-
-        if leccion_existente and not force:
-            print(f'⏭️  Lección {leccion_data["_id"]} ya existe: {leccion_data["nombre"]} (usar --force para sobrescribir)')
-            saltadas += 1
-            continue
-
-        if leccion_existente and force:
-            # Eliminar lección existente
-            db.lecciones.delete_one({'_id': leccion_data['_id']})
-            print(f'🔄 Sobrescribiendo lección {leccion_data["_id"]}: {leccion_data["nombre"]}')
-
-        # Crear lección
-        leccion = Leccion(
-            _id=leccion_data['_id'],
-            nombre=leccion_data['nombre'],
-            tema=leccion_data['tema'],
-            dificultad=leccion_data['dificultad'],
-            contenido=leccion_data['contenido'],
-            tominsAlCompletar=leccion_data['tominsAlCompletar']
-        )
-
-        # Agregar palabras
-        for palabra_data in leccion_data['palabras']:
-            palabra = Palabra(
-                palabra_nahuatl=palabra_data['palabra_nahuatl'],
-                español=palabra_data['español'],
-                audio=palabra_data.get('audio')
-            )
-            leccion.palabras.append(palabra)
-
-        # Guardar
-        leccion.save()
-
-        if leccion_existente:
-            print(f'✅ Lección {leccion._id} actualizada: {leccion.nombre} ({len(leccion.palabras)} palabras)')
-            actualizadas += 1
+    for fila in resultado.reporte()['filas']:
+        leccion_data = lecciones_data[fila['linea'] - 1]
+        palabras = len(leccion_data['palabras'])
+        if fila['status'] == 'creada':
+            print(f'✅ Lección {fila["id"]} creada: {leccion_data["nombre"]} ({palabras} palabras)')
+        elif fila['status'] == 'actualizada':
+            print(f'✅ Lección {fila["id"]} actualizada: {leccion_data["nombre"]} ({palabras} palabras)')
+        elif fila['status'] == 'existente':
+            print(f'⏭️  Lección {fila["id"]} ya existe: {leccion_data["nombre"]} (usar --force para sobrescribir)')
         else:
-            print(f'✅ Lección {leccion._id} creada: {leccion.nombre} ({len(leccion.palabras)} palabras)')
-            creadas += 1
+            print(f'❌ Lección {leccion_data["_id"]}: {fila["message"]}')
+
+    # Los workers en ejecución recargan el catálogo en su siguiente verificación
+    if resultado.escritas:
+        catalogo.invalidar()
 
     print(f'\n📊 Resumen:')
-    print(f'   Creadas: {creadas}')
-    print(f'   Actualizadas: {actualizadas}')
-    print(f'   Saltadas: {saltadas}')
-    print(f'   Total en BD: {db.lecciones.count_documents({})}')
+    print(f'   Creadas: {resultado.contar("creada")}')
+    print(f'   Actualizadas: {resultado.contar("actualizada")}')
+    print(f'   Saltadas: {resultado.contar("existente")}')
+    print(f'   Total en BD: {get_db().lecciones.count_documents({})}')
     print(f'\n🎉 ¡Proceso completado exitosamente!\n')
 
 
@@ -11,7 +11,8 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
-from apps.lecciones.models import Leccion, Palabra
+from apps.lecciones.catalogo import catalogo
+from apps.lecciones.importacion import importar_lecciones
 
 
 def crear_lecciones():
@@ -158,51 +159,27 @@ def crear_lecciones():
 
     print('🌱 Poblando base de datos con lecciones de Náhuatl...\n')
 
-    creadas = 0
-    actualizadas = 0
+    # RENDIMIENTO: Un bulk_write para todas las lecciones (las existentes se omiten)
+    resultado = importar_lecciones(lecciones_data)
 
-    for leccion_data in lecciones_data:
-        # Verificar si la lección ya existe
-        from mongoengine.connection import get_db
-        db = get_db()
-        leccion_existente = db.lecciones.find_one({'_id': leccion_data['_id']})
+    for fila in resultado.reporte()['filas']:
+        leccion_data = lecciones_data[fila['linea'] - 1]
+        if fila['status'] == 'creada':
+            print(f'✅ Lección {fila["id"]} creada: {leccion_data["nombre"]} ({len(leccion_data["palabras"])} palabras)')
+        elif fila['status'] == 'existente':
+            print(f'⚠️  Lección {fila["id"]} ya existe: {leccion_data["nombre"]}')
+        else:
+            print(f'❌ Lección {leccion_data["_id"]}: {fila["message"]}')
 
-        if leccion_existente:
-            print(f'⚠️  Lección {leccion_data["_id"]} ya existe: {leccion_data["nombre"]}')
-            actualizadas += 1
-            continue
-
-        # Crear lección
-        leccion = Leccion(
-            _id=leccion_data['_id'],
-            nombre=leccion_data['nombre'],
-            tema=leccion_data['tema'],
-            dificultad=leccion_data['dificultad'],
-            contenido=leccion_data['contenido'],
-            tominsAlCompletar=leccion_data['tominsAlCompletar'],
-            nivel_id=leccion_data.get('nivel_id', 1)  # Por defecto nivel 1
-        )
-
-        # Agregar palabras
-        for palabra_data in leccion_data['palabras']:
-            palabra = Palabra(
-                palabra_nahuatl=palabra_data['palabra_nahuatl'],
-                español=palabra_data['español'],
-                audio=palabra_data.get('audio')
-            )
-            leccion.palabras.append(palabra)
-
-        # Guardar
-        leccion.save()
-        print(f'✅ Lección {leccion._id} creada: {leccion.nombre} ({len(leccion.palabras)} palabras)')
-        creadas += 1
+    # Los workers en ejecución recargan el catálogo en su siguiente verificación
+    if resultado.escritas:
+        catalogo.invalidar()
 
     print(f'\n📊 Resumen:')
-    print(f'   Creadas: {creadas}')
-    print(f'   Ya existían: {actualizadas}')
+    print(f'   Creadas: {resultado.contar("creada")}')
+    print(f'   Ya existían: {resultado.contar("existente")}')
     print(f'\n🎉 ¡Lecciones cargadas exitosamente!\n')
 
-
 if __name__ == '__main__':
     try:
         crear_lecciones()
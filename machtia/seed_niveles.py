@@ -11,8 +11,8 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
-from apps.niveles.models import Nivel
-from mongoengine.connection import get_db
+from apps.lecciones.catalogo import catalogo
+from apps.lecciones.importacion import importar_niveles
 
 
 def crear_niveles():
@@ -44,34 +44,25 @@ def crear_niveles():
 
     print('🌱 Poblando base de datos con niveles de Náhuatl...\n')
 
-    creados = 0
-    existentes = 0
+    # RENDIMIENTO: Un bulk_write para todos los niveles (los existentes se omiten)
+    resultado = importar_niveles(niveles_data)
 
-    db = get_db()
+    for fila in resultado.reporte()['filas']:
+        nivel_data = niveles_data[fila['linea'] - 1]
+        if fila['status'] == 'creada':
+            print(f'✅ Nivel {fila["id"]} creado: {nivel_data["nombre"]}')
+        elif fila['status'] == 'existente':
+            print(f'⚠️  Nivel {fila["id"]} ya existe: {nivel_data["nombre"]}')
+        else:
+            print(f'❌ Nivel {nivel_data["_id"]}: {fila["message"]}')
 
-    for nivel_data in niveles_data:
-        nivel_existente = db.niveles.find_one({'_id': nivel_data['_id']})
-
-        if nivel_existente:
-            print(f'⚠️  Nivel {nivel_data["_id"]} ya existe: {nivel_data["nombre"]}')
-            existentes += 1
-            continue
-
-        nivel = Nivel(
-            _id=nivel_data['_id'],
-            nombre=nivel_data['nombre'],
-            contenido=nivel_data['contenido'],
-            dificultad=nivel_data['dificultad'],
-            tema=nivel_data['tema']
-        )
-
-        nivel.save()
-        print(f'✅ Nivel {nivel._id} creado: {nivel.nombre}')
-        creados += 1
+    # Los workers en ejecución recargan el catálogo en su siguiente verificación
+    if resultado.escritas:
+        catalogo.invalidar()
 
     print('\n📊 Resumen:')
-    print(f'   Creados: {creados}')
-    print(f'   Ya existían: {existentes}')
+    print(f'   Creados: {resultado.contar("creada")}')
+    print(f'   Ya existían: {resultado.contar("existente")}')
     print('\n🎉 ¡Niveles cargados exitosamente!\n')
 
 